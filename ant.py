@@ -1,4 +1,6 @@
+import copy
 from abc import ABC, abstractmethod
+from array import array
 from common import Direction, AntPerception, AntAction
 
 
@@ -14,8 +16,157 @@ class AntStrategy(ABC):
         return self.__class__.__name__
 
 
+# Strategy interface deciding for a whole population at once
+class BatchAntStrategy(AntStrategy):
+    """Strategy deciding the actions of all its ants in a single call
+
+    Environment.update() detects these strategies and calls decide_actions()
+    once per step with the PerceptionBatch of their ants, instead of building
+    an AntPerception and calling decide_action() for each ant.
+    """
+
+    @abstractmethod
+    def decide_actions(self, batch):
+        """Decide the actions of the ants of a PerceptionBatch
+
+        Returns a sequence (list or NumPy array) of AntAction values, one per
+        ant of the batch, in the same order.
+        """
+        pass
+
+    def decide_action(self, perception: AntPerception) -> AntAction:
+        raise NotImplementedError(
+            f"{self.get_name()} decides for the whole population, use decide_actions"
+        )
+
+
+# Per-ant state kept in typed arrays, (attribute, array typecode)
+ANT_FIELDS = (
+    ("x", "i"),
+    ("y", "i"),
+    ("direction", "b"),  # Direction value
+    ("has_food", "b"),
+    ("home_pheromone", "d"),
+    ("food_pheromone", "d"),
+    ("pheromone_decrease_rate", "d"),
+    ("food_collected", "i"),
+    ("steps_taken", "i"),
+    ("vision_range", "B"),
+    ("vision_angle", "d"),
+    ("id", "q"),  # NO_ID for ants without id
+    ("strategy_index", "H"),  # Index in AntPopulation.strategies
+)
+
+DIRECTIONS = tuple(Direction)
+NO_ID = -1
+
+
+class AntPopulation:
+    """State of a group of ants, stored as parallel typed arrays
+
+    Entry i of each array (x, y, direction, has_food...) belongs to ant i.
+    The population is a sequence of Ant objects, lightweight views created
+    on access that read and write their entry, so strategies and the GUI
+    keep using ants while batch code works on whole arrays.
+    """
+
+    def __init__(self):
+        for name, typecode in ANT_FIELDS:
+            setattr(self, name, array(typecode))
+        # Distinct strategies of the ants, strategy_index refers to them
+        self.strategies = []
+
+    def copy(self, copy_strategies: bool = True) -> "AntPopulation":
+        """Independent copy, the strategies are deep-copied with their state
+
+        With copy_strategies=False the copy shares the strategy objects.
+        """
+        clone = AntPopulation.__new__(AntPopulation)
+        for name, _ in ANT_FIELDS:
+            setattr(clone, name, getattr(self, name)[:])
+        if copy_strategies:
+            clone.strategies = copy.deepcopy(self.strategies)
+        else:
+            clone.strategies = list(self.strategies)
+        return clone
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ant index out of range")
+        return Ant.view(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield Ant.view(self, index)
+
+    def get_strategy_index(self, strategy) -> int:
+        """Index of a strategy in self.strategies, added if needed"""
+        for index, known in enumerate(self.strategies):
+            if known is strategy:
+                return index
+        self.strategies.append(strategy)
+        return len(self.strategies) - 1
+
+    def append(self, x: int, y: int, direction: Direction, strategy, ant_id=None) -> int:
+        """Add a new ant with default state, returns its index"""
+        self.x.append(x)
+        self.y.append(y)
+        self.direction.append(Direction(direction).value)
+        self.has_food.append(False)
+        self.home_pheromone.append(100.0)
+        self.food_pheromone.append(100.0)
+        self.pheromone_decrease_rate.append(0.995)
+        self.food_collected.append(0)
+        self.steps_taken.append(0)
+        self.vision_range.append(3)  # How far the ant can see
+        self.vision_angle.append(120)  # Field of view angle in degrees (total angle)
+        self.id.append(NO_ID if ant_id is None else ant_id)
+        self.strategy_index.append(self.get_strategy_index(strategy))
+        return len(self) - 1
+
+    def remove(self, index: int) -> None:
+        """Remove the ant at index, the following ants move down by one"""
+        for name, _ in ANT_FIELDS:
+            del getattr(self, name)[index]
+
+    def adopt(self, ant: "Ant") -> None:
+        """Move the state of an ant to the end of this population
+
+        The ant becomes a view on its new entry.
+        """
+        old_population, old_slot = ant.population, ant.slot
+        for name, _ in ANT_FIELDS[:-1]:
+            getattr(self, name).append(getattr(old_population, name)[old_slot])
+        self.strategy_index.append(self.get_strategy_index(ant.strategy))
+        ant.population = self
+        ant.slot = len(self) - 1
+
+
+def _population_field(name: str) -> property:
+    """Property reading and writing the entry of an ant in a population array"""
+
+    def get_value(ant):
+        return getattr(ant.population, name)[ant.slot]
+
+    def set_value(ant, value):
+        getattr(ant.population, name)[ant.slot] = value
+
+    return property(get_value, set_value)
+
+
 # Ant class with possible actions
 class Ant:
+    # The state lives in an AntPopulation, a new ant gets a population of its
+    # own until an Environment adopts it
+    __slots__ = ("population", "slot")
+
     def __init__(
         self,
         x: int,
@@ -24,59 +175,120 @@ class Ant:
         strategy: AntStrategy,
         ant_id: int = None,
     ):
-        self.x = x
-        self.y = y
-        self.direction = direction
-        self.strategy = strategy
-        self.has_food = False
-        self.home_pheromone = 100.0
-        self.food_pheromone = 100.0
-        self.pheromone_decrease_rate = 0.995
-        self.vision_range = 3  # How far the ant can see
-        self.vision_angle = 120  # Field of view angle in degrees (total angle)
-        self.food_collected = 0
-        self.steps_taken = 0
-        self.id = ant_id
+        self.population = AntPopulation()
+        self.slot = self.population.append(x, y, direction, strategy, ant_id)
+
+    @classmethod
+    def view(cls, population: AntPopulation, slot: int) -> "Ant":
+        """Get the ant at index slot of a population"""
+        ant = cls.__new__(cls)
+        ant.population = population
+        ant.slot = slot
+        return ant
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, Ant)
+            and self.population is other.population
+            and self.slot == other.slot
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self.population), self.slot))
+
+    x = _population_field("x")
+    y = _population_field("y")
+    home_pheromone = _population_field("home_pheromone")
+    food_pheromone = _population_field("food_pheromone")
+    pheromone_decrease_rate = _population_field("pheromone_decrease_rate")
+    food_collected = _population_field("food_collected")
+    steps_taken = _population_field("steps_taken")
+    vision_range = _population_field("vision_range")
+    vision_angle = _population_field("vision_angle")
+
+    @property
+    def direction(self) -> Direction:
+        return DIRECTIONS[self.population.direction[self.slot]]
+
+    @direction.setter
+    def direction(self, direction: Direction) -> None:
+        self.population.direction[self.slot] = Direction(direction).value
+
+    @property
+    def has_food(self) -> bool:
+        return bool(self.population.has_food[self.slot])
+
+    @has_food.setter
+    def has_food(self, has_food: bool) -> None:
+        self.population.has_food[self.slot] = bool(has_food)
+
+    @property
+    def id(self):
+        ant_id = self.population.id[self.slot]
+        return None if ant_id == NO_ID else ant_id
+
+    @id.setter
+    def id(self, ant_id) -> None:
+        self.population.id[self.slot] = NO_ID if ant_id is None else ant_id
+
+    @property
+    def strategy(self) -> AntStrategy:
+        population = self.population
+        return population.strategies[population.strategy_index[self.slot]]
+
+    @strategy.setter
+    def strategy(self, strategy: AntStrategy) -> None:
+        population = self.population
+        population.strategy_index[self.slot] = population.get_strategy_index(strategy)
 
     def set_strategy(self, strategy: AntStrategy) -> None:
         self.strategy = strategy
 
+    # The methods below run for every ant at every step, they use the
+    # population arrays directly rather than the properties
+
     def decide_action(self, perception: AntPerception) -> AntAction:
-        if self.strategy:
-            self.steps_taken += 1
-            return self.strategy.decide_action(perception)
+        population, slot = self.population, self.slot
+        strategy = population.strategies[population.strategy_index[slot]]
+        if strategy:
+            population.steps_taken[slot] += 1
+            return strategy.decide_action(perception)
         return AntAction(AntAction.NONE)
 
     def turn_left(self) -> None:
-        self.direction = Direction.get_left(self.direction)
+        directions = self.population.direction
+        directions[self.slot] = (directions[self.slot] - 1) % len(DIRECTIONS)
 
     def turn_right(self) -> None:
-        self.direction = Direction.get_right(self.direction)
+        directions = self.population.direction
+        directions[self.slot] = (directions[self.slot] + 1) % len(DIRECTIONS)
 
     def move_forward(self, success: bool) -> None:
         if success:
-            dx, dy = Direction.get_delta(self.direction)
-            self.x += dx
-            self.y += dy
+            population, slot = self.population, self.slot
+            dx, dy = Direction.get_delta(population.direction[slot])
+            population.x[slot] += dx
+            population.y[slot] += dy
 
     def pick_up_food(self, success: bool) -> None:
         if success:
-            self.has_food = True
+            self.population.has_food[self.slot] = True
 
     def drop_food(self, success: bool) -> None:
-        if success and self.has_food:
-            self.has_food = False
-            self.food_collected += 1
+        population, slot = self.population, self.slot
+        if success and population.has_food[slot]:
+            population.has_food[slot] = False
+            population.food_collected[slot] += 1
             # Reset pheromone levels
-            self.home_pheromone = 100.0
-            self.food_pheromone = 100.0
+            population.home_pheromone[slot] = 100.0
+            population.food_pheromone[slot] = 100.0
 
     def deposit_pheromone(self) -> float:
-        if self.has_food:
-            amount = self.food_pheromone
-            self.food_pheromone *= self.pheromone_decrease_rate
-            return amount
+        population, slot = self.population, self.slot
+        if population.has_food[slot]:
+            levels = population.food_pheromone
         else:
-            amount = self.home_pheromone
-            self.home_pheromone *= self.pheromone_decrease_rate
-            return amount
+            levels = population.home_pheromone
+        amount = levels[slot]
+        levels[slot] = amount * population.pheromone_decrease_rate[slot]
+        return amount
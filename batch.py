@@ -0,0 +1,476 @@
+# Batched perception and actions of a whole ant population, built with NumPy arrays.
+
+from functools import lru_cache
+
+import numpy as np
+
+from ant import ANT_FIELDS, NO_ID
+from rng import GAMMA, MASK64, AntRandom
+from common import AntAction, AntPerception, Direction, TerrainType
+from environment import OUTSIDE, TERRAIN_BY_ZONE, TERRAIN_TYPES, get_vision_offsets
+
+# Occupancy value of the slots where no other ant is visible
+NO_ANT = -1
+
+# get_terrain() value for [in colony zone][grid value], see TERRAIN_BY_ZONE
+_ZONE_TERRAIN = np.full((2, 256), OUTSIDE, dtype=np.uint8)
+for _zone, _terrains in enumerate(TERRAIN_BY_ZONE):
+    _ZONE_TERRAIN[_zone, : len(_terrains)] = [terrain.value for terrain in _terrains]
+
+# (dx, dy) of a forward move, by Direction value
+_DELTAS = np.array([Direction.get_delta(direction) for direction in Direction], dtype=np.int64)
+
+EMPTY = TerrainType.EMPTY.value
+WALL = TerrainType.WALL.value
+COLONY = TerrainType.COLONY.value
+FOOD = TerrainType.FOOD.value
+
+
+@lru_cache(maxsize=None)
+def get_slot_layout(radius: int):
+    """Get the perception slots of a square of side 2 * radius + 1
+
+    Returns (offsets, center_slot, line_of_sight): offsets is a (slots, 2)
+    array of (dx, dy), enumerated like get_perception_for_ant (dx first, then
+    dy), and line_of_sight a (slots, slots) matrix whose row s flags the
+    slots that block the view of slot s when they are walls.
+    """
+    offsets = [
+        (dx, dy) for dx in range(-radius, radius + 1) for dy in range(-radius, radius + 1)
+    ]
+    slot_of = {offset: slot for slot, offset in enumerate(offsets)}
+
+    # The line of sight of a cell only depends on its offset, collect it from
+    # the vision cones of all directions
+    line_of_sight = np.zeros((len(offsets), len(offsets)), dtype=np.float32)
+    for direction in Direction:
+        for dx, dy, cells in get_vision_offsets(direction, radius, 360):
+            for los_offset in cells:
+                line_of_sight[slot_of[(dx, dy)], slot_of[los_offset]] = 1.0
+
+    return np.array(offsets, dtype=np.int64), slot_of[(0, 0)], line_of_sight
+
+
+@lru_cache(maxsize=None)
+def get_cone_masks(radius: int, vision_range: int, vision_angle: float):
+    """Get a (directions, slots) mask of the slots inside each vision cone"""
+    offsets, _, _ = get_slot_layout(radius)
+    slot_of = {offset: slot for slot, offset in enumerate(map(tuple, offsets.tolist()))}
+    masks = np.zeros((len(Direction), len(offsets)), dtype=bool)
+    for direction in Direction:
+        for dx, dy, _ in get_vision_offsets(direction, vision_range, vision_angle):
+            masks[direction.value, slot_of[(dx, dy)]] = True
+    return masks
+
+
+class PerceptionBatch:
+    """Perceptions of a whole ant population, as arrays indexed [ant, slot]
+
+    Slot k is the cell at offsets[k] = (dx, dy) from the ant. Cells an ant
+    cannot see have terrain OUTSIDE, no pheromone and NO_ANT occupancy. The
+    center slot holds the terrain under the ant as returned by get_terrain(),
+    like visible_cells[(0, 0)] in AntPerception.
+
+    Per-ant state (position, direction, food, pheromone levels...) is kept in
+    one array per attribute, in the order of Environment.ants.
+    """
+
+    def __init__(
+        self,
+        offsets,
+        center_slot: int,
+        terrain,
+        food_pheromone,
+        home_pheromone,
+        occupancy,
+        states: dict,
+        ant_ids: list,
+        seed: int = 0,
+        step: int = 0,
+    ):
+        self.offsets = offsets  # (slots, 2) array of (dx, dy)
+        self.center_slot = center_slot
+        self.terrain = terrain  # (ants, slots) TerrainType values, OUTSIDE if not visible
+        self.visible = terrain != OUTSIDE
+        self.food_pheromone = food_pheromone  # (ants, slots) pheromone levels
+        self.home_pheromone = home_pheromone
+        self.occupancy = occupancy  # (ants, slots) has_food of the ant there, or NO_ANT
+
+        self.x = states["x"]
+        self.y = states["y"]
+        self.direction = states["direction"]  # Direction values
+        self.has_food = states["has_food"]
+        self.home_pheromone_level = states["home_pheromone_level"]
+        self.food_pheromone_level = states["food_pheromone_level"]
+        self.pheromone_decrease_rate = states["pheromone_decrease_rate"]
+        self.food_collected = states["food_collected"]
+        self.steps_taken = states["steps_taken"]
+        self.ant_key = states["ant_key"]  # uint64 Environment.ant_random_key of the ants
+        self.ant_ids = ant_ids
+        self.seed = seed
+        self.step = step
+        self.draws = 0  # Number of random() calls
+        self._stream_keys = None
+
+        self._offset_tuples = [tuple(offset) for offset in offsets.tolist()]
+
+    def __len__(self) -> int:
+        return len(self.ant_ids)
+
+    def select(self, indices) -> "PerceptionBatch":
+        """Get the batch restricted to the ants at the given indices"""
+        indices = np.asarray(indices, dtype=np.int64)
+        states = {
+            name: getattr(self, name)[indices]
+            for name in (
+                "x",
+                "y",
+                "direction",
+                "has_food",
+                "home_pheromone_level",
+                "food_pheromone_level",
+                "pheromone_decrease_rate",
+                "food_collected",
+                "steps_taken",
+                "ant_key",
+            )
+        }
+        return PerceptionBatch(
+            self.offsets,
+            self.center_slot,
+            self.terrain[indices],
+            self.food_pheromone[indices],
+            self.home_pheromone[indices],
+            self.occupancy[indices],
+            states,
+            [self.ant_ids[i] for i in indices.tolist()],
+            self.seed,
+            self.step,
+        )
+
+    def random(self):
+        """Draw one uniform float in [0, 1) per ant
+
+        The n-th call gives each ant the n-th draw of its random stream, the
+        same values as the n-th perception.rng.random() call of a per-ant
+        strategy, whatever the other ants of the batch.
+        """
+        if self._stream_keys is None:
+            self._stream_keys = stream_keys(self.seed, self.ant_key, self.step)
+        self.draws += 1
+        return (draw64(self._stream_keys, self.draws) >> np.uint64(11)) * (1.0 / (1 << 53))
+
+    def perception(self, i: int) -> AntPerception:
+        """Build the AntPerception of the i-th ant, for per-ant strategies"""
+        perception = AntPerception()
+        perception.has_food = bool(self.has_food[i])
+        perception.direction = Direction(int(self.direction[i]))
+        perception.home_pheromone_level = float(self.home_pheromone_level[i])
+        perception.food_pheromone_level = float(self.food_pheromone_level[i])
+        perception.pheromone_decrease_rate = float(self.pheromone_decrease_rate[i])
+        perception.food_collected = int(self.food_collected[i])
+        perception.steps_taken = int(self.steps_taken[i])
+        perception.ant_id = self.ant_ids[i]
+        perception.rng = AntRandom(self.seed, int(self.ant_key[i]), self.step)
+
+        center = self.center_slot
+        terrain = self.terrain[i].tolist()
+        food_pheromone = self.food_pheromone[i].tolist()
+        home_pheromone = self.home_pheromone[i].tolist()
+        occupancy = self.occupancy[i].tolist()
+
+        perception.visible_cells[(0, 0)] = TERRAIN_TYPES[terrain[center]]
+        for slot, offset in enumerate(self._offset_tuples):
+            if terrain[slot] == OUTSIDE or slot == center:
+                continue
+            perception.visible_cells[offset] = TERRAIN_TYPES[terrain[slot]]
+            perception.food_pheromone[offset] = food_pheromone[slot]
+            perception.home_pheromone[offset] = home_pheromone[slot]
+            if occupancy[slot] != NO_ANT:
+                perception.nearby_ants.append((offset, bool(occupancy[slot])))
+        return perception
+
+
+# NumPy dtype of the AntPopulation array typecodes
+_DTYPES = {
+    "b": np.int8,
+    "B": np.uint8,
+    "H": np.uint16,
+    "i": np.intc,
+    "q": np.int64,
+    "d": np.float64,
+}
+
+
+def population_arrays(population) -> dict:
+    """Get NumPy views on the state arrays of an AntPopulation
+
+    The views share memory with the population, writing to them updates the
+    ants. They must be released before ants are added to the population, as
+    its arrays cannot grow while views exist.
+    """
+    arrays = {
+        name: np.frombuffer(getattr(population, name), dtype=_DTYPES[typecode])
+        for name, typecode in ANT_FIELDS
+    }
+    arrays["has_food"] = arrays["has_food"].view(bool)
+    return arrays
+
+
+def _gather_ant_states(population) -> dict:
+    """Copy the state of the ants into one array per attribute"""
+    arrays = population_arrays(population)
+    states = {
+        name: arrays[name].astype(np.int64)
+        for name in ("x", "y", "direction", "food_collected", "steps_taken")
+    }
+    states["has_food"] = arrays["has_food"].copy()
+    states["home_pheromone_level"] = arrays["home_pheromone"].copy()
+    states["food_pheromone_level"] = arrays["food_pheromone"].copy()
+    states["pheromone_decrease_rate"] = arrays["pheromone_decrease_rate"].copy()
+    return states
+
+
+def mix64(z):
+    """SplitMix64 finalizer of rng.py on uint64 arrays"""
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def stream_keys(seed: int, ant_keys, step: int):
+    """rng.stream_key for an array of ant keys"""
+    gamma = np.uint64(GAMMA)
+    key = mix64(np.full(len(ant_keys), seed & MASK64, dtype=np.uint64) + gamma)
+    key = mix64((key ^ ant_keys) + gamma)
+    return mix64((key ^ np.uint64(step & MASK64)) + gamma)
+
+
+def draw64(keys, draw: int):
+    """rng.draw64 for an array of stream keys"""
+    return mix64(keys + np.uint64((draw * GAMMA) & MASK64))
+
+
+def _ant_random_keys(population):
+    """Environment.ant_random_key of every ant"""
+    ant_keys = np.frombuffer(population.id, dtype=np.int64).astype(np.uint64)
+    no_id = ant_keys == np.uint64(NO_ID & MASK64)
+    ant_keys[no_id] = np.flatnonzero(no_id).astype(np.uint64) | np.uint64(1 << 63)
+    return ant_keys
+
+
+def build_perception_batch(environment) -> PerceptionBatch:
+    """Build the PerceptionBatch of all ants of an environment"""
+    population = environment.population
+    states = _gather_ant_states(population)
+    states["ant_key"] = _ant_random_keys(population)
+    x, y, direction = states["x"], states["y"], states["direction"]
+
+    # Ants with different vision settings get different cone masks
+    vision_keys = {}
+    key_index = np.array(
+        [
+            vision_keys.setdefault(key, len(vision_keys))
+            for key in zip(population.vision_range, population.vision_angle)
+        ],
+        dtype=np.int64,
+    )
+    radius = max((vision_range for vision_range, _ in vision_keys), default=1)
+    offsets, center_slot, line_of_sight = get_slot_layout(radius)
+    cone_masks = np.stack(
+        [get_cone_masks(radius, *key) for key in vision_keys]
+        or [np.zeros((len(Direction), len(offsets)), dtype=bool)]
+    )
+
+    # Terrain of the square around each ant, read from the padded grid buffer
+    environment.ensure_border(radius)
+    cells = np.frombuffer(environment.cells, dtype=np.uint8)
+    index = (y + environment.border) * environment.stride + x + environment.border
+    cell_index = index[:, None] + (offsets[:, 1] * environment.stride + offsets[:, 0])
+    neighbourhood = cells[cell_index]
+
+    walls = (neighbourhood == TerrainType.WALL.value).astype(np.float32)
+    blocked = walls @ line_of_sight.T > 0
+    visible = cone_masks[key_index, direction] & (neighbourhood != OUTSIDE) & ~blocked
+
+    terrain = np.where(visible, neighbourhood, OUTSIDE).astype(np.uint8)
+    zone = np.frombuffer(environment.zone_cells, dtype=np.uint8)[index]
+    terrain[:, center_slot] = _ZONE_TERRAIN[zone, cells[index]]
+    visible[:, center_slot] = True
+
+    # Pheromones, coordinates are clipped as out-of-map slots are not visible
+    check_x = np.clip(x[:, None] + offsets[:, 0], 0, environment.width - 1)
+    check_y = np.clip(y[:, None] + offsets[:, 1], 0, environment.height - 1)
+    food_pheromone = environment.food_pheromones.to_array()[check_y, check_x]
+    home_pheromone = environment.home_pheromones.to_array()[check_y, check_x]
+    food_pheromone[~visible] = 0.0
+    home_pheromone[~visible] = 0.0
+
+    # Occupancy: the first ant (in Environment.ants order) on each cell
+    occupied_cells, first_ant = np.unique(index, return_index=True)
+    slot = np.minimum(
+        np.searchsorted(occupied_cells, cell_index), max(len(occupied_cells) - 1, 0)
+    )
+    found = (occupied_cells[slot] == cell_index) & visible
+    occupancy = np.where(
+        found, states["has_food"][first_ant][slot].astype(np.int8), NO_ANT
+    ).astype(np.int8)
+    occupancy[:, center_slot] = NO_ANT
+
+    return PerceptionBatch(
+        offsets,
+        center_slot,
+        terrain,
+        food_pheromone,
+        home_pheromone,
+        occupancy,
+        states,
+        [None if ant_id == NO_ID else ant_id for ant_id in population.id],
+        environment.seed,
+        environment.steps,
+    )
+
+
+def to_action_codes(actions):
+    """Convert a sequence of AntAction members or values to an array of values"""
+    if isinstance(actions, np.ndarray):
+        return actions.astype(np.int64, copy=False)
+    return np.array(
+        [action.value if isinstance(action, AntAction) else action for action in actions],
+        dtype=np.int64,
+    )
+
+
+def _rank_in_cell(cell_index):
+    """Rank of each entry among the entries with the same cell, in array order"""
+    order = np.argsort(cell_index, kind="stable")
+    sorted_cells = cell_index[order]
+    positions = np.arange(len(cell_index))
+    group_start = np.where(
+        np.concatenate(([True], sorted_cells[1:] != sorted_cells[:-1])), positions, 0
+    )
+    rank = np.empty(len(cell_index), dtype=np.int64)
+    rank[order] = positions - np.maximum.accumulate(group_start)
+    return rank
+
+
+def apply_actions(environment, codes) -> "np.ndarray":
+    """Apply one action value per ant, see Environment.execute_actions
+
+    The actions of the ants only interact through the food they pick up (the
+    first ants in Environment.ants order get it) and the pheromones they
+    deposit (the maximum is kept, whatever the order), so the sequential
+    semantics of execute_action can be reproduced with array operations.
+    """
+    ants = environment.ants
+    if len(codes) != len(ants):
+        raise ValueError(f"Expected {len(ants)} actions, got {len(codes)}")
+
+    # Decisions use the state at the start of the step, the views are only
+    # written once everything is decided
+    population = population_arrays(environment.population)
+    states = _gather_ant_states(environment.population)
+    x, y, direction, has_food = states["x"], states["y"], states["direction"], states["has_food"]
+    home_level = states["home_pheromone_level"]
+    food_level = states["food_pheromone_level"]
+    decrease_rate = states["pheromone_decrease_rate"]
+
+    environment.ensure_border(1)
+    if environment._shared_layers and (codes == AntAction.PICK_UP_FOOD.value).any():
+        # Copy the terrain shared with a fork before taking food from it
+        environment._own("terrain")
+    stride, border = environment.stride, environment.border
+    cells = np.frombuffer(environment.cells, dtype=np.uint8)
+    food_cells = np.frombuffer(environment.food_cells, dtype=np.intc)
+    index = (y + border) * stride + x + border
+    zone = np.frombuffer(environment.zone_cells, dtype=np.uint8)
+    terrain = _ZONE_TERRAIN[zone[index], cells[index]]
+
+    always_succeed = (AntAction.TURN_LEFT.value, AntAction.TURN_RIGHT.value, AntAction.NO_ACTION.value)
+    success = np.isin(codes, always_succeed)
+
+    # Moves, the border of the grid buffer blocks moves out of the map
+    dx, dy = _DELTAS[direction, 0], _DELTAS[direction, 1]
+    target = cells[index + dy * stride + dx]
+    moved = (codes == AntAction.MOVE_FORWARD.value) & (target != WALL) & (target != OUTSIDE)
+    success |= moved
+
+    # Picking up food, the first ants on a cell get its remaining food
+    pickers = np.flatnonzero(
+        (codes == AntAction.PICK_UP_FOOD.value) & ~has_food & (terrain == FOOD)
+    )
+    pick_cells = index[pickers]
+    rank = _rank_in_cell(pick_cells)
+    amounts = food_cells[pick_cells]
+    picked = rank < amounts
+    success[pickers[picked]] = True
+    picked_cells, taken = np.unique(pick_cells[picked], return_counts=True)
+    food_cells[picked_cells] -= taken.astype(np.intc)
+    emptied = food_cells[picked_cells] == 0
+    emptied_cells = picked_cells[emptied]
+    cells[emptied_cells] = EMPTY
+    for cell in emptied_cells.tolist():
+        position = (cell % stride - border, cell // stride - border)
+        environment.food_positions.discard(position)
+        if environment.terrain_changes.active:
+            environment.terrain_changes.add(position)
+
+    # Dropping food, food in a colony zone that was emptied by an ant earlier
+    # in the step leaves a colony cell for the next ants
+    dropping = (codes == AntAction.DROP_FOOD.value) & has_food
+    dropped = dropping & (terrain == COLONY)
+    if len(emptied_cells):
+        last_picker = rank == amounts - 1
+        emptied_by = dict(zip(pick_cells[last_picker].tolist(), pickers[last_picker].tolist()))
+        for ant_index in np.flatnonzero(dropping & (terrain == FOOD)).tolist():
+            picker = emptied_by.get(index.item(ant_index))
+            if picker is not None and picker < ant_index:
+                dropped[ant_index] = True
+    success |= dropped
+    environment.food_collected += int(dropped.sum())
+
+    # Pheromones
+    deposit_home = codes == AntAction.DEPOSIT_HOME_PHEROMONE.value
+    deposit_food = codes == AntAction.DEPOSIT_FOOD_PHEROMONE.value
+    depositing = np.flatnonzero(deposit_home | deposit_food)
+    if environment.pheromones_enabled and len(depositing):
+        success[depositing] = True
+        carrying = has_food[depositing]
+        amounts = np.where(carrying, food_level[depositing], home_level[depositing])
+        decreased = amounts * decrease_rate[depositing]
+        for pheromones, deposits in (
+            (environment.home_pheromones, deposit_home[depositing]),
+            (environment.food_pheromones, deposit_food[depositing]),
+        ):
+            if deposits.any():
+                ant_indices = depositing[deposits]
+                pheromones.add_pheromones(x[ant_indices], y[ant_indices], amounts[deposits])
+    else:
+        depositing, decreased = depositing[:0], home_level[:0]
+
+    # Write the new state back to the ants
+    turned_left = codes == AntAction.TURN_LEFT.value
+    turned_right = codes == AntAction.TURN_RIGHT.value
+    population["direction"][turned_left] = (direction[turned_left] - 1) % len(Direction)
+    population["direction"][turned_right] = (direction[turned_right] + 1) % len(Direction)
+
+    movers = np.flatnonzero(moved)
+    new_x, new_y = x[movers] + dx[movers], y[movers] + dy[movers]
+    population["x"][movers] = new_x
+    population["y"][movers] = new_y
+    for ant_index, old_x, old_y, cell_x, cell_y in zip(
+        movers.tolist(), x[movers].tolist(), y[movers].tolist(), new_x.tolist(), new_y.tolist()
+    ):
+        environment._move_occupant(ant_index, (old_x, old_y), (cell_x, cell_y))
+
+    population["has_food"][pickers[picked]] = True
+    population["has_food"][dropped] = False
+    population["food_collected"][dropped] += 1
+    population["home_pheromone"][dropped] = 100.0
+    population["food_pheromone"][dropped] = 100.0
+
+    carrying = has_food[depositing]
+    population["food_pheromone"][depositing[carrying]] = decreased[carrying]
+    population["home_pheromone"][depositing[~carrying]] = decreased[~carrying]
+
+    return success
@@ -0,0 +1,108 @@
+# RandomStrategy for batch decisions: the same rules applied to a whole
+# PerceptionBatch with NumPy array operations, see BatchAntStrategy in ant.py.
+# Selected with --strategy random_batch.
+
+import numpy as np
+from ant import AntAction, BatchAntStrategy
+from common import TerrainType
+
+FOOD = TerrainType.FOOD.value
+COLONY = TerrainType.COLONY.value
+MOVE_FORWARD = AntAction.MOVE_FORWARD.value
+TURN_LEFT = AntAction.TURN_LEFT.value
+TURN_RIGHT = AntAction.TURN_RIGHT.value
+PICK_UP_FOOD = AntAction.PICK_UP_FOOD.value
+DROP_FOOD = AntAction.DROP_FOOD.value
+DEPOSIT_HOME_PHEROMONE = AntAction.DEPOSIT_HOME_PHEROMONE.value
+DEPOSIT_FOOD_PHEROMONE = AntAction.DEPOSIT_FOOD_PHEROMONE.value
+
+
+class BatchRandomStrategy(BatchAntStrategy):
+    """
+    Batched port of RandomStrategy, deciding for all ants at once with NumPy.
+
+    It follows the same rules and gives the same action distribution:
+    - Picks up food when standing on it
+    - Drops food when standing on the colony
+    - Moves forward when food (or the colony, when carrying food) is visible ahead
+    - Otherwise moves randomly: 60% forward, 20% left, 20% right
+    - Always deposits pheromones after each step (home when searching, food when returning)
+
+    Like the ants_last_action dict of RandomStrategy, the last action of
+    each ant is kept by ant (its Environment.ant_random_key: the ant id, or
+    its index for ants without id), not by position in the batch, which
+    changes when ants are removed or switch strategies.
+    """
+
+    def __init__(self):
+        """Initialize the strategy with last action tracking"""
+        # Sorted ant keys and the last action of each of them
+        self.ant_keys = np.empty(0, dtype=np.uint64)
+        self.last_actions = np.empty(0, dtype=np.int64)
+
+    def __setstate__(self, state):
+        # Strategies pickled in older checkpoints kept the last actions by
+        # position in the batch, they cannot be matched to ants
+        if "ant_keys" not in state:
+            state = {
+                "ant_keys": np.empty(0, dtype=np.uint64),
+                "last_actions": np.empty(0, dtype=np.int64),
+            }
+        self.__dict__.update(state)
+
+    def decide_actions(self, batch):
+        """Decide the actions of all ants of the batch"""
+        count = len(batch)
+        keys = batch.ant_key
+        # Last action of each ant of the batch, -1 for ants never seen
+        found = np.searchsorted(self.ant_keys, keys)
+        known = found < len(self.ant_keys)
+        known[known] = self.ant_keys[found[known]] == keys[known]
+        last_actions = np.full(count, -1, dtype=np.int64)
+        last_actions[known] = self.last_actions[found[known]]
+
+        has_food = batch.has_food
+        current_terrain = batch.terrain[:, batch.center_slot]
+
+        # Movement: forward if the target is visible ahead (dy > 0 as in
+        # RandomStrategy), random otherwise
+        target = np.where(has_food, COLONY, FOOD)[:, None]
+        ahead = batch.offsets[:, 1] > 0
+        target_ahead = ((batch.terrain == target) & ahead).any(axis=1)
+
+        # Same draw as the perception.rng.random() call of RandomStrategy
+        movement_choice = batch.random()
+        actions = np.where(
+            movement_choice < 0.6,
+            MOVE_FORWARD,
+            np.where(movement_choice < 0.8, TURN_LEFT, TURN_RIGHT),
+        )
+        actions[target_ahead] = MOVE_FORWARD
+
+        # Alternate between movement and dropping pheromones
+        deposited = (last_actions == DEPOSIT_HOME_PHEROMONE) | (
+            last_actions == DEPOSIT_FOOD_PHEROMONE
+        )
+        deposit = np.where(has_food, DEPOSIT_FOOD_PHEROMONE, DEPOSIT_HOME_PHEROMONE)
+        actions = np.where(deposited, actions, deposit)
+
+        # Picking up and dropping food come first
+        actions[~has_food & (current_terrain == FOOD)] = PICK_UP_FOOD
+        actions[has_food & (current_terrain == COLONY)] = DROP_FOOD
+
+        if known.all():
+            # Same ants as before, the usual case
+            self.last_actions[found] = actions
+        else:
+            self._remember(keys, actions, found[known])
+        return actions
+
+    def _remember(self, keys, actions, replaced) -> None:
+        """Store the actions of the batch, replacing the entries at the replaced indices"""
+        kept = np.ones(len(self.ant_keys), dtype=bool)
+        kept[replaced] = False
+        all_keys = np.concatenate([self.ant_keys[kept], keys])
+        all_actions = np.concatenate([self.last_actions[kept], actions])
+        # Sorted unique keys, the last action wins for ants sharing a key
+        self.ant_keys, last = np.unique(all_keys[::-1], return_index=True)
+        self.last_actions = all_actions[::-1][last]
@@ -0,0 +1,297 @@
+# Run many headless simulations, (environment, strategy, seed) jobs, across a
+# pool of worker processes. Used by "simulation.py batch".
+
+import argparse
+import copy
+import glob
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from simulation import SimulationRunner
+from utils import create_environment, get_strategy_class, place_ants
+
+# Built-in environment types, generated for each job instead of loaded from a file
+BUILTIN_ENVIRONMENTS = {"simple", "obstacle", "maze", "empty"}
+
+# Per-process state, filled by _init_worker
+_worker = {}
+
+
+def parse_seeds(text: str) -> list:
+    """Parse a seed list such as "0..49", "1,2,3" or "0..9,100" ("a..b" includes b)"""
+    seeds = []
+    for part in text.split(","):
+        part = part.strip()
+        if ".." in part:
+            first, last = part.split("..", 1)
+            seeds.extend(range(int(first), int(last) + 1))
+        elif part:
+            seeds.append(int(part))
+    if not seeds:
+        raise ValueError(f"No seed in {text!r}")
+    return seeds
+
+
+def expand_environments(patterns: list) -> list:
+    """Expand glob patterns (for shells that do not) into environment files"""
+    environments = []
+    for pattern in patterns:
+        if pattern in BUILTIN_ENVIRONMENTS:
+            environments.append(pattern)
+            continue
+        matches = sorted(glob.glob(pattern))
+        if not matches:
+            raise ValueError(f"No environment file matches {pattern}")
+        environments.extend(matches)
+    return environments
+
+
+def _init_worker(environments: list, strategies: list, options: dict) -> None:
+    """Load the environment files and strategy classes once per worker"""
+    _worker["options"] = options
+    _worker["templates"] = {
+        env: create_environment(env, options["width"], options["height"], verbose=False)
+        for env in environments
+        if env not in BUILTIN_ENVIRONMENTS
+    }
+    _worker["strategies"] = {
+        strategy: get_strategy_class(*strategy, verbose=False) for strategy in strategies
+    }
+
+
+def _run_job(job: tuple) -> dict:
+    """Run one simulation, returns the SimulationRunner result with the job settings"""
+    index, env, strategy, seed = job
+    options = _worker["options"]
+    result = {
+        "job": index,
+        "env": env,
+        "strategy": strategy[1] or strategy[0],
+        "seed": seed,
+    }
+    try:
+        # The random module is seeded too for strategies that do not use perception.rng
+        random.seed(seed)
+        template = _worker["templates"].get(env)
+        if template is None:
+            environment = create_environment(
+                env, options["width"], options["height"], verbose=False, seed=seed
+            )
+        else:
+            environment = copy.deepcopy(template)
+            environment.set_seed(seed)
+        environment.set_pheromone_backend(options["pheromone_backend"])
+
+        # Command line values take precedence over the environment file, as in main()
+        ant_count = getattr(environment, "requested_ant_count", 0) or options["ants"]
+        max_steps = options["max_steps"] or getattr(environment, "max_steps", 0)
+        time_limit = options["time_limit"] or getattr(environment, "time_limit", 0)
+
+        place_ants(environment, _worker["strategies"][strategy](), ant_count)
+        runner = SimulationRunner(
+            environment,
+            max_steps=max_steps,
+            time_limit=time_limit,
+            profile=options["profile"],
+            decision_budget=options["decision_budget"],
+            step_budget=options["step_budget"],
+            budget_fallback=(
+                _worker["strategies"][options["budget_fallback"]]()
+                if options["budget_fallback"]
+                else None
+            ),
+        )
+        result.update(runner.run(verbose=False))
+    except Exception as e:
+        result.update(
+            {
+                "error": str(e),
+                "completion_percentage": 0,
+                "steps": 0,
+                "time_taken": 0,
+                "food_collected": 0,
+                "total_food": 0,
+            }
+        )
+    return result
+
+
+def run_batch(environments, strategies, seeds, options: dict, jobs: int = 1):
+    """Run every (environment, strategy, seed) combination
+
+    strategies holds (strategy name, strategy file or None) pairs. Yields the
+    result dict of each job as soon as it finishes, so not in job order: the
+    "job" key gives the position of the job.
+    """
+    job_list = [
+        (index, env, strategy, seed)
+        for index, (env, strategy, seed) in enumerate(
+            (env, strategy, seed)
+            for env in environments
+            for strategy in strategies
+            for seed in seeds
+        )
+    ]
+    # The workers load the fallback strategy class with the others
+    loaded_strategies = list(strategies)
+    fallback = options.get("budget_fallback")
+    if fallback is not None and fallback not in loaded_strategies:
+        loaded_strategies.append(fallback)
+    init_args = (environments, loaded_strategies, options)
+
+    if jobs <= 1:
+        _init_worker(*init_args)
+        for job in job_list:
+            yield _run_job(job)
+        return
+
+    with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=init_args) as pool:
+        yield from pool.imap_unordered(_run_job, job_list)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="simulation.py batch",
+        description="Run many headless simulations in parallel, one JSON line per result",
+    )
+    parser.add_argument(
+        "--envs",
+        nargs="+",
+        required=True,
+        help="Environment files or glob patterns (e.g., envs/*.txt), or built-in types (simple, obstacle, maze, empty)",
+    )
+    parser.add_argument(
+        "--strategy",
+        nargs="+",
+        default=[],
+        help="Built-in strategies to run (random, random_batch) (default: random unless --strategy-file is given)",
+    )
+    parser.add_argument(
+        "--strategy-file",
+        nargs="+",
+        default=[],
+        help="Python files containing custom ant strategies",
+    )
+    parser.add_argument(
+        "--seeds",
+        type=str,
+        default="0",
+        help="Seeds to run, e.g. 0..49 or 1,5,9 (default: 0)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--ants",
+        type=int,
+        default=10,
+        help="Number of ants (default: 10) - overridden by ANTS section in environment file if present",
+    )
+    parser.add_argument(
+        "--width",
+        type=int,
+        default=100,
+        help="Width of built-in environments (default: 100)",
+    )
+    parser.add_argument(
+        "--height",
+        type=int,
+        default=100,
+        help="Height of built-in environments (default: 100)",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=0,
+        help="Maximum simulation steps (default: 0, use the environment file value or no limit)",
+    )
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=0,
+        help="Time limit per simulation in seconds (default: 0, use the environment file value or no limit)",
+    )
+    parser.add_argument(
+        "--pheromone-backend",
+        type=str,
+        default="dict",
+        choices=["dict", "array", "lazy"],
+        help="Pheromone map storage (default: dict)",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="Write the JSON lines to this file instead of the standard output",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Add the time spent in each phase of the steps to each result",
+    )
+    parser.add_argument(
+        "--decision-budget",
+        type=float,
+        default=0,
+        help="Time budget per decision in milliseconds, slower decisions are replaced (default: 0, no limit)",
+    )
+    parser.add_argument(
+        "--step-budget",
+        type=float,
+        default=0,
+        help="Time budget for the decisions of a step in milliseconds (default: 0, no limit)",
+    )
+    parser.add_argument(
+        "--budget-fallback",
+        type=str,
+        help="Built-in strategy (e.g., random) replacing decisions over budget (default: NO_ACTION)",
+    )
+    parser.add_argument("--quiet", action="store_true", help="Suppress the final summary")
+
+    args = parser.parse_args(argv)
+
+    environments = expand_environments(args.envs)
+    strategies = [(name, None) for name in args.strategy]
+    strategies += [("custom", path) for path in args.strategy_file]
+    if not strategies:
+        strategies = [("random", None)]
+    seeds = parse_seeds(args.seeds)
+    options = {
+        "ants": args.ants,
+        "width": args.width,
+        "height": args.height,
+        "max_steps": args.max_steps,
+        "time_limit": args.time_limit,
+        "pheromone_backend": args.pheromone_backend,
+        "profile": args.profile,
+        "decision_budget": args.decision_budget / 1000,
+        "step_budget": args.step_budget / 1000,
+        "budget_fallback": (args.budget_fallback, None) if args.budget_fallback else None,
+    }
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    start_time = time.time()
+    count = errors = 0
+    try:
+        for result in run_batch(environments, strategies, seeds, options, args.jobs):
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+            count += 1
+            errors += "error" in result
+    finally:
+        if args.output:
+            output.close()
+
+    if not args.quiet:
+        print(
+            f"{count} simulations ({errors} failed) in {time.time() - start_time:.2f} seconds "
+            f"with {args.jobs} worker(s)",
+            file=sys.stderr,
+        )
+    return 1 if errors else 0
@@ -0,0 +1,103 @@
+# Measure the memory used per ant and the cost of reading the state of all ants.
+#
+# Compares the AntPopulation arrays (with their Ant views) with the previous
+# Ant class, a plain object keeping its state in its __dict__.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_ant_memory.py
+#   python benchmarks/bench_ant_memory.py --ants 100000
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ant import Ant, AntPopulation  # noqa: E402
+from common import Direction  # noqa: E402
+
+
+class LegacyAnt:
+    """Previous Ant, with its state in instance attributes"""
+
+    def __init__(self, x, y, direction, strategy, ant_id=None):
+        self.x = x
+        self.y = y
+        self.direction = direction
+        self.strategy = strategy
+        self.has_food = False
+        self.home_pheromone = 100.0
+        self.food_pheromone = 100.0
+        self.pheromone_decrease_rate = 0.995
+        self.vision_range = 3
+        self.vision_angle = 120
+        self.food_collected = 0
+        self.steps_taken = 0
+        self.id = ant_id
+
+
+def create_legacy_ants(count: int):
+    return [LegacyAnt(i % 100, i // 100, Direction.NORTH, None, i) for i in range(count)]
+
+
+def create_population(count: int):
+    population = AntPopulation()
+    for i in range(count):
+        population.adopt(Ant(i % 100, i // 100, Direction.NORTH, None, i))
+    return population
+
+
+def measure_memory(create, count: int) -> float:
+    """Return the memory allocated per ant in bytes"""
+    tracemalloc.start()
+    ants = create(count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del ants
+    return size / count
+
+
+def measure_reads(read, repeat: int = 20) -> float:
+    """Return the average time of one pass in milliseconds"""
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        read()
+    return (time.perf_counter() - start_time) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ant state storage")
+    parser.add_argument("--ants", type=int, default=10000, help="Number of ants (default: 10000)")
+    args = parser.parse_args()
+
+    legacy_bytes = measure_memory(create_legacy_ants, args.ants)
+    population_bytes = measure_memory(create_population, args.ants)
+    print(f"{args.ants} ants")
+    print(f"legacy Ant:    {legacy_bytes:7.1f} bytes/ant")
+    print(
+        f"AntPopulation: {population_bytes:7.1f} bytes/ant "
+        f"({legacy_bytes / population_bytes:.1f}x smaller)"
+    )
+
+    # What the GUI does each frame: positions, directions and food of all ants
+    legacy_ants = create_legacy_ants(args.ants)
+    population = create_population(args.ants)
+    legacy_ms = measure_reads(
+        lambda: [(ant.x, ant.y, ant.direction, ant.has_food) for ant in legacy_ants]
+    )
+    population_ms = measure_reads(
+        lambda: list(
+            zip(population.x, population.y, population.direction, population.has_food)
+        )
+    )
+    print(f"read state, legacy Ant:    {legacy_ms:6.2f} ms")
+    print(
+        f"read state, AntPopulation: {population_ms:6.2f} ms "
+        f"({legacy_ms / population_ms:.1f}x faster)"
+    )
+
+
+if __name__ == "__main__":
+    main()
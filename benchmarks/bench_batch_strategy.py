@@ -0,0 +1,62 @@
+# Compare the per-ant RandomStrategy with its batched port, BatchRandomStrategy.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_batch_strategy.py
+#   python benchmarks/bench_batch_strategy.py --ants 1000 --steps 50
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import create_environment, add_ants  # noqa: E402
+
+
+def measure(env_file: str, strategy: str, ants: int, steps: int, backend: str):
+    """Return the number of simulation steps per second"""
+    random.seed(0)
+    environment = create_environment(env_file, 100, 100, verbose=False)
+    environment.set_pheromone_backend(backend)
+    add_ants(environment, strategy, None, ants, verbose=False)
+
+    start_time = time.perf_counter()
+    for _ in range(steps):
+        environment.update()
+    return steps / (time.perf_counter() - start_time)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched strategies")
+    parser.add_argument(
+        "--env",
+        default="envs/05_square_four_food_spots.txt",
+        help="Environment file (default: envs/05_square_four_food_spots.txt)",
+    )
+    parser.add_argument("--ants", type=int, default=10000, help="Number of ants (default: 10000)")
+    parser.add_argument("--steps", type=int, default=20, help="Steps per run (default: 20)")
+    parser.add_argument(
+        "--pheromone-backend",
+        default="array",
+        help="Pheromone backend (default: array)",
+    )
+    args = parser.parse_args()
+
+    print(f"{args.ants} ants on {os.path.basename(args.env)}")
+    reference = None
+    for strategy in ("random", "random_batch"):
+        steps_per_second = measure(
+            args.env, strategy, args.ants, args.steps, args.pheromone_backend
+        )
+        if reference is None:
+            reference = steps_per_second
+        print(
+            f"{strategy:<14} {steps_per_second:8.2f} steps/s "
+            f"({steps_per_second / reference:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
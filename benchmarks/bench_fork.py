@@ -0,0 +1,77 @@
+# Compare Environment.fork() with copy.deepcopy() for what-if rollouts.
+#
+# Creates many copies of a running simulation, then runs one step on each
+# copy: forks share the terrain and copy the ants and pheromone maps on
+# their first step, deep copies duplicate everything up front.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_fork.py
+#   python benchmarks/bench_fork.py --size 400 --forks 100 --ants 500
+
+import argparse
+import copy
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import create_environment, add_ants  # noqa: E402
+
+
+def make_copies(environment, make_copy, count: int, step: bool) -> list:
+    copies = [make_copy(environment) for _ in range(count)]
+    if step:
+        for environment_copy in copies:
+            environment_copy.update()
+    return copies
+
+
+def measure(environment, make_copy, count: int, step: bool):
+    """Return the time in seconds and the memory in bytes taken by count copies"""
+    # Timed without tracemalloc, which slows down allocations
+    start_time = time.perf_counter()
+    make_copies(environment, make_copy, count, step)
+    elapsed = time.perf_counter() - start_time
+
+    tracemalloc.start()
+    copies = make_copies(environment, make_copy, count, step)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del copies
+    return elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark environment forking")
+    parser.add_argument("--size", type=int, default=300, help="Map width and height (default: 300)")
+    parser.add_argument("--ants", type=int, default=300, help="Number of ants (default: 300)")
+    parser.add_argument("--forks", type=int, default=100, help="Number of copies (default: 100)")
+    parser.add_argument(
+        "--warmup", type=int, default=200, help="Steps run before copying (default: 200)"
+    )
+    args = parser.parse_args()
+
+    random.seed(0)
+    environment = create_environment("simple", args.size, args.size, verbose=False, seed=0)
+    add_ants(environment, "random", None, args.ants, verbose=False)
+    for _ in range(args.warmup):
+        environment.update()
+
+    print(f"{args.forks} copies of a {args.size}x{args.size} map with {args.ants} ants")
+    print(f"{'':<20} {'deepcopy':>18} {'fork':>18} {'gain':>12}")
+    for step in (False, True):
+        deep_time, deep_memory = measure(environment, copy.deepcopy, args.forks, step)
+        fork_time, fork_memory = measure(environment, lambda env: env.fork(), args.forks, step)
+        label = "copy + 1 step" if step else "copy"
+        print(
+            f"{label:<20} {deep_time * 1000:>8.1f} ms {deep_memory / 2**20:>6.1f} MB "
+            f"{fork_time * 1000:>8.1f} ms {fork_memory / 2**20:>6.1f} MB "
+            f"{deep_time / fork_time:>5.1f}x {deep_memory / max(fork_memory, 1):>5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# Measure Environment.get_terrain on a map with many colonies.
+#
+# Compares the precomputed colony-zone lookup with the previous
+# implementation, which scanned every colony on each call.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_get_terrain.py
+#   python benchmarks/bench_get_terrain.py --colonies 200 --size 300
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from environment import Environment, TerrainType  # noqa: E402
+
+
+def get_terrain_by_scan(environment, x: int, y: int):
+    """Previous get_terrain, looping over all colony positions"""
+    if environment.is_valid_position(x, y):
+        for colony_x, colony_y in environment.colony_positions:
+            if (
+                abs(x - colony_x) <= environment.colony_radius
+                and abs(y - colony_y) <= environment.colony_radius
+            ):
+                if environment.grid[y][x] == TerrainType.FOOD.value:
+                    return TerrainType.FOOD
+                elif environment.grid[y][x] == TerrainType.WALL.value:
+                    return TerrainType.WALL
+                return TerrainType.COLONY
+        return TerrainType(environment.grid[y][x])
+    return None
+
+
+def build_environment(size: int, colonies: int, seed: int) -> Environment:
+    rng = random.Random(seed)
+    environment = Environment(size, size)
+    while len(environment.colony_positions) < colonies:
+        environment.add_colony(rng.randrange(size), rng.randrange(size))
+    for _ in range(size * size // 20):
+        environment.add_wall(rng.randrange(size), rng.randrange(size))
+        environment.add_food(rng.randrange(size), rng.randrange(size), 3)
+    return environment
+
+
+def measure(function, environment, repeat: int) -> float:
+    """Return the average time of one call in nanoseconds"""
+    cells = [(x, y) for y in range(environment.height) for x in range(environment.width)]
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        for x, y in cells:
+            function(x, y)
+    return (time.perf_counter() - start_time) / (repeat * len(cells)) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Environment.get_terrain")
+    parser.add_argument("--size", type=int, default=150, help="Map width and height (default: 150)")
+    parser.add_argument("--colonies", type=int, default=50, help="Number of colonies (default: 50)")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the map (default: 3)")
+    args = parser.parse_args()
+
+    environment = build_environment(args.size, args.colonies, seed=0)
+
+    # Both implementations must agree before comparing their speed
+    for y in range(environment.height):
+        for x in range(environment.width):
+            assert environment.get_terrain(x, y) == get_terrain_by_scan(environment, x, y)
+
+    scan_ns = measure(
+        lambda x, y: get_terrain_by_scan(environment, x, y), environment, args.repeat
+    )
+    lookup_ns = measure(environment.get_terrain, environment, args.repeat)
+
+    print(
+        f"{args.size}x{args.size} map, {len(environment.colony_positions)} colonies"
+    )
+    print(f"colony scan:   {scan_ns:8.1f} ns/call")
+    print(f"colony lookup: {lookup_ns:8.1f} ns/call ({scan_ns / lookup_ns:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
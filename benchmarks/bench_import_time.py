@@ -0,0 +1,100 @@
+# Start-up import budget of the headless simulation.
+#
+# Runs "simulation.py --help" and a one-step simulation under
+# "python -X importtime", reports the import time and checks that the
+# imports never load the GUI or numpy (only needed by batch strategies, the
+# array pheromone backend and the GUI). Exits with status 1 otherwise, so it
+# can run in CI next to run_benchmarks.py. Wall-clock import times vary too
+# much between machines for a default limit, --budget sets one for the
+# machine at hand.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_import_time.py
+#   python benchmarks/bench_import_time.py --budget 60 --repeat 10
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    "help": ["simulation.py", "--help"],
+    "one_step": ["simulation.py", "--max-steps", "1", "--ants", "10"],
+}
+
+# Modules the headless path must not import, with their submodules
+FORBIDDEN = ("pygame", "numpy", "gui", "inspect")
+
+
+def parse_importtime(stderr: str) -> list:
+    """(module, depth, self µs, cumulative µs) of each line of -X importtime output"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_time, cumulative, name = line[len("import time:") :].split("|")
+        # Nested imports are indented by two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), depth, int(self_time), int(cumulative)))
+    return imports
+
+
+def measure(arguments: list, env: dict) -> list:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *arguments],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    # simulation.py exits with 1 for an incomplete simulation, only crashes count
+    if "Traceback (most recent call last)" in result.stderr:
+        raise RuntimeError(f"{' '.join(arguments)} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the start-up import budget")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        help="Maximum total import time of each command, in ms (default: no limit)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Runs per command, the best is kept (default: 5)"
+    )
+    parser.add_argument("--top", type=int, default=8, help="Slowest imports shown (default: 8)")
+    args = parser.parse_args()
+
+    # Bytecode must be cached, otherwise compiling the sources dominates
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+    failed = False
+    for name, arguments in COMMANDS.items():
+        measure(arguments, env)  # Writes the bytecode cache
+        runs = [measure(arguments, env) for _ in range(args.repeat)]
+        totals = [sum(entry[3] for entry in run if entry[1] == 0) for run in runs]
+        best = min(range(len(runs)), key=totals.__getitem__)
+        imports, total = runs[best], totals[best] / 1000
+
+        forbidden = sorted({entry[0].split(".")[0] for entry in imports} & set(FORBIDDEN))
+        over_budget = args.budget is not None and total > args.budget
+        status = "FAIL" if forbidden or over_budget else "ok"
+        budget = "" if args.budget is None else f" / {args.budget:.0f} ms"
+        print(f"{name:<10} {total:7.1f} ms{budget}  {len(imports)} modules  {status}")
+        if over_budget:
+            print(f"  over the budget of {args.budget:.0f} ms")
+        if forbidden:
+            print(f"  forbidden imports: {', '.join(forbidden)}")
+        for module, _, _, cumulative in sorted(imports, key=lambda entry: -entry[3])[: args.top]:
+            print(f"  {cumulative / 1000:7.1f} ms  {module}")
+        failed |= bool(forbidden) or over_budget
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+# Compare simulation throughput of the pheromone map backends.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_pheromone_backends.py
+#   python benchmarks/bench_pheromone_backends.py --envs envs/09_spiral_maze.txt --steps 500
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from environment import PHEROMONE_BACKENDS, TerrainType  # noqa: E402
+from utils import create_environment, add_ants  # noqa: E402
+
+
+def prefill_trails(environment, coverage: float, seed: int) -> None:
+    """Cover a fraction of the walkable cells with pheromones, like a long run would"""
+    rng = random.Random(seed)
+    for y in range(environment.height):
+        for x in range(environment.width):
+            if environment.grid[y][x] == TerrainType.WALL.value:
+                continue
+            if rng.random() < coverage:
+                environment.home_pheromones.add_pheromone(x, y, rng.uniform(1.0, 100.0))
+            if rng.random() < coverage:
+                environment.food_pheromones.add_pheromone(x, y, rng.uniform(1.0, 100.0))
+
+
+def measure(env_file: str, backend: str, ants: int, steps: int, coverage: float) -> float:
+    """Return the number of simulation steps per second"""
+    random.seed(0)
+    environment = create_environment(env_file, 100, 100, verbose=False)
+    environment.set_pheromone_backend(backend)
+    prefill_trails(environment, coverage, seed=0)
+    add_ants(environment, "random", None, ants, verbose=False)
+
+    start_time = time.perf_counter()
+    for _ in range(steps):
+        environment.update()
+    return steps / (time.perf_counter() - start_time)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pheromone map backends")
+    parser.add_argument(
+        "--envs",
+        nargs="+",
+        default=["envs/07_round_maze.txt", "envs/09_spiral_maze.txt"],
+        help="Environment files to run (default: round and spiral mazes)",
+    )
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=list(PHEROMONE_BACKENDS),
+        help="Pheromone backends to compare (default: all)",
+    )
+    parser.add_argument("--ants", type=int, default=50, help="Number of ants (default: 50)")
+    parser.add_argument("--steps", type=int, default=200, help="Steps per run (default: 200)")
+    parser.add_argument(
+        "--coverage",
+        type=float,
+        default=0.8,
+        help="Fraction of walkable cells pre-filled with pheromones (default: 0.8)",
+    )
+    args = parser.parse_args()
+
+    print(f"{'environment':<32} {'backend':<8} {'steps/s':>10} {'speedup':>8}")
+    for env_file in args.envs:
+        reference = None
+        for backend in args.backends:
+            steps_per_second = measure(
+                env_file, backend, args.ants, args.steps, args.coverage
+            )
+            if reference is None:
+                reference = steps_per_second
+            print(
+                f"{os.path.basename(env_file):<32} {backend:<8} "
+                f"{steps_per_second:>10.1f} {steps_per_second / reference:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
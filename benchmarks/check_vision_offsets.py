@@ -0,0 +1,153 @@
+# Differential check of the precomputed vision cones of ant perception.
+#
+# Compares the visible_cells of Environment.get_perception_for_ant, built
+# from the get_vision_offsets tables, with the previous implementation,
+# which computed sqrt/acos/degrees and the line of sight for every cell
+# around the ant. Runs every envs/*.txt map, every walkable cell and every
+# direction, and exits with status 1 on the first mismatch.
+#
+# Usage (from the repository root):
+#   python benchmarks/check_vision_offsets.py
+#   python benchmarks/check_vision_offsets.py --vision-range 5 --vision-angle 90
+
+import argparse
+import glob
+import math
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ant import Ant  # noqa: E402
+from common import Direction  # noqa: E402
+from environment import TerrainType  # noqa: E402
+from utils import create_environment  # noqa: E402
+
+
+def visible_cells_by_angle(environment, ant) -> dict:
+    """visible_cells of the previous get_perception_for_ant"""
+    visible_cells = {}
+    current_terrain = environment.get_terrain(int(ant.x), int(ant.y))
+    if current_terrain is not None:
+        visible_cells[(0, 0)] = current_terrain
+
+    for dx in range(-ant.vision_range, ant.vision_range + 1):
+        for dy in range(-ant.vision_range, ant.vision_range + 1):
+            if dx == 0 and dy == 0:
+                continue
+
+            check_x = int(ant.x + dx)
+            check_y = int(ant.y + dy)
+
+            # Calculate distance
+            distance = math.sqrt(dx * dx + dy * dy)
+
+            # If point is too far, it's not in vision field
+            if distance > ant.vision_range:
+                continue
+
+            # Get ant's direction vector
+            dir_dx, dir_dy = Direction.get_delta(ant.direction)
+
+            # Calculate angle between ant's direction and point
+            # First normalize vectors
+            point_dx, point_dy = dx / distance, dy / distance
+
+            dir_magnitude = math.sqrt(dir_dx * dir_dx + dir_dy * dir_dy)
+            if dir_magnitude > 0:
+                dir_dx, dir_dy = dir_dx / dir_magnitude, dir_dy / dir_magnitude
+
+            # Calculate dot product
+            dot_product = dir_dx * point_dx + dir_dy * point_dy
+
+            # Clamp to valid range for acos
+            dot_product = max(-1.0, min(1.0, dot_product))
+
+            # Calculate angle in degrees
+            angle = math.degrees(math.acos(dot_product))
+
+            # Check if angle is within vision field
+            half_vision_angle = ant.vision_angle / 2
+            if angle > half_vision_angle:
+                continue
+
+            is_blocked = False
+
+            # Simple line-of-sight check
+            if abs(dx) > 1 or abs(dy) > 1:
+                # Calculate steps for line-of-sight check
+                steps = max(abs(dx), abs(dy))
+                step_x = dx / steps
+                step_y = dy / steps
+
+                # Check each step along the line of sight
+                for step in range(1, steps):
+                    check_step_x = int(ant.x + step * step_x)
+                    check_step_y = int(ant.y + step * step_y)
+
+                    if (
+                        environment.is_valid_position(check_step_x, check_step_y)
+                        and environment.grid[check_step_y][check_step_x]
+                        == TerrainType.WALL.value
+                    ):
+                        is_blocked = True
+                        break
+
+            if is_blocked:
+                continue
+
+            # If valid position and not blocked, add to visible cells
+            if environment.is_valid_position(check_x, check_y):
+                terrain = environment.grid[check_y][check_x]
+                visible_cells[(dx, dy)] = TerrainType(terrain)
+    return visible_cells
+
+
+def check_map(env_file: str, vision_range: int, vision_angle: float) -> int:
+    """Perceptions compared on one map, exits on the first mismatch"""
+    environment = create_environment(env_file, 100, 100, verbose=False, seed=0)
+    ant = Ant(0, 0, Direction.NORTH, None)
+    ant.vision_range = vision_range
+    ant.vision_angle = vision_angle
+    checked = 0
+    for y in range(environment.height):
+        for x in range(environment.width):
+            if environment.get_terrain(x, y) == TerrainType.WALL:
+                continue
+            ant.x, ant.y = x, y
+            for direction in Direction:
+                ant.direction = direction
+                expected = visible_cells_by_angle(environment, ant)
+                got = environment.get_perception_for_ant(ant).visible_cells
+                # The order of the cells is part of the perception
+                if list(got.items()) != list(expected.items()):
+                    print(f"MISMATCH {os.path.basename(env_file)} at ({x}, {y}) facing {direction.name}")
+                    print(f"  expected: {expected}")
+                    print(f"  got:      {got}")
+                    sys.exit(1)
+                checked += 1
+    return checked
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the vision offset tables")
+    parser.add_argument(
+        "--vision-range", type=int, default=3, help="Vision range of the ant (default: 3)"
+    )
+    parser.add_argument(
+        "--vision-angle",
+        type=float,
+        default=120,
+        help="Vision angle of the ant in degrees (default: 120)",
+    )
+    args = parser.parse_args()
+
+    for env_file in sorted(glob.glob(os.path.join(ROOT, "envs", "*.txt"))):
+        checked = check_map(env_file, args.vision_range, args.vision_angle)
+        print(f"{os.path.basename(env_file):<35} {checked:>8} perceptions  ok")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+# Benchmark suite: microbenchmarks of the hot paths and end-to-end steps per
+# second on every environment of envs/, with JSON results compared against a
+# stored baseline.
+#
+# Every result is a time per operation (lower is better), so a regression is
+# a value above baseline * (1 + threshold).
+#
+# Usage (from the repository root):
+#   python benchmarks/run_benchmarks.py --save-baseline       # store benchmarks/baseline.json
+#   python benchmarks/run_benchmarks.py                       # compare against it
+#   python benchmarks/run_benchmarks.py --filter perception --output results.json
+#   python benchmarks/run_benchmarks.py --quick --threshold 0.25
+
+import argparse
+import copy
+import glob
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_pheromone_backends import prefill_trails  # noqa: E402
+from common import AntAction  # noqa: E402
+from environment import PHEROMONE_BACKENDS, Environment  # noqa: E402
+from utils import create_environment, place_ants, get_strategy_class  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+MICRO_ENV = os.path.join(ROOT, "envs", "07_round_maze.txt")
+# Side of the map of the large overview benchmark
+LARGE_MAP_SIZE = 2048
+ANT_COUNTS = (10, 100, 1000)
+
+# Actions cycled through by the execute_action benchmark
+ACTION_CYCLE = (
+    AntAction.MOVE_FORWARD,
+    AntAction.DEPOSIT_HOME_PHEROMONE,
+    AntAction.TURN_LEFT,
+    AntAction.MOVE_FORWARD,
+    AntAction.DEPOSIT_FOOD_PHEROMONE,
+    AntAction.TURN_RIGHT,
+)
+
+
+def time_per_call(function, number: int, repeat: int = 5) -> float:
+    """Best time of one call over repeat runs of number calls, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, (time.perf_counter() - start_time) / number)
+    return best
+
+
+def make_environment(env_file: str, ants: int, backend: str = "dict", warmup: int = 0):
+    """Seeded environment with ants, run for warmup steps so trails exist"""
+    random.seed(0)
+    environment = create_environment(env_file, 100, 100, verbose=False, seed=0)
+    environment.set_pheromone_backend(backend)
+    place_ants(environment, get_strategy_class("random", None, verbose=False)(), ants)
+    for _ in range(warmup):
+        environment.update()
+    return environment
+
+
+def bench_perception(scale: float) -> list:
+    environment = make_environment(MICRO_ENV, 100, warmup=50)
+    ants = list(environment.ants)
+    index = [0]
+
+    def perceive():
+        environment.get_perception_for_ant(ants[index[0] % len(ants)])
+        index[0] += 1
+
+    return [("get_perception_for_ant", time_per_call(perceive, int(20000 * scale)) * 1e6, "us")]
+
+
+def bench_evaporate(scale: float) -> list:
+    results = []
+    for backend in PHEROMONE_BACKENDS:
+        environment = make_environment(MICRO_ENV, 0, backend)
+        prefill_trails(environment, 0.8, seed=0)
+        pheromones = environment.home_pheromones
+        # Evaporation lowers the values, a fresh copy keeps the runs comparable
+        seconds = min(
+            time_per_call(copy.deepcopy(pheromones).evaporate, int(200 * scale), repeat=1)
+            for _ in range(3)
+        )
+        results.append((f"evaporate[{backend}]", seconds * 1e6, "us"))
+    return results
+
+
+def bench_strongest_direction(scale: float) -> list:
+    environment = make_environment(MICRO_ENV, 0)
+    prefill_trails(environment, 0.8, seed=0)
+    pheromones = environment.food_pheromones
+    rng = random.Random(0)
+    positions = [
+        (rng.randrange(environment.width), rng.randrange(environment.height))
+        for _ in range(1000)
+    ]
+    index = [0]
+
+    def strongest():
+        pheromones.get_strongest_direction(*positions[index[0] % len(positions)])
+        index[0] += 1
+
+    return [
+        ("get_strongest_direction", time_per_call(strongest, int(20000 * scale)) * 1e6, "us")
+    ]
+
+
+def bench_execute_action(scale: float) -> list:
+    environment = make_environment(MICRO_ENV, 100, warmup=10)
+    ants = list(environment.ants)
+    index = [0]
+
+    def execute():
+        i = index[0]
+        environment.execute_action(ants[i % len(ants)], ACTION_CYCLE[i % len(ACTION_CYCLE)])
+        index[0] += 1
+
+    return [("execute_action", time_per_call(execute, int(50000 * scale)) * 1e6, "us")]
+
+
+def make_large_environment(size: int):
+    """Empty size x size map with 1000 ants, 80% covered by trails of the array backend"""
+    import numpy as np
+
+    random.seed(0)
+    environment = Environment(size, size, "array", seed=0)
+    environment.add_colony(size // 2, size // 2)
+    rng = np.random.default_rng(0)
+    for pheromones in (environment.home_pheromones, environment.food_pheromones):
+        levels = rng.uniform(1.0, 100.0, (size, size))
+        levels[rng.random((size, size)) >= 0.8] = 0.0
+        pheromones.values[:] = levels
+    place_ants(environment, get_strategy_class("random", None, verbose=False)(), 1000)
+    return environment
+
+
+def bench_render(scale: float) -> list:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    try:
+        import pygame  # noqa: F401
+    except ImportError:
+        print("pygame is not installed, skipping render_pixel_perfect", file=sys.stderr)
+        return []
+    from gui import AntSimulationGUI
+
+    environment = make_environment(MICRO_ENV, 100, warmup=100)
+    gui = AntSimulationGUI(environment, verbose=False)
+    seconds = time_per_call(gui.render_pixel_perfect, max(1, int(20 * scale)))
+
+    def draw_frame():
+        gui.invalidate()
+        gui.draw()
+
+    frame_seconds = time_per_call(draw_frame, max(1, int(20 * scale)))
+    # Nothing changed since the last frame, only the stats are drawn
+    idle_seconds = time_per_call(gui.draw, max(1, int(20 * scale)))
+
+    # Zoomed out to blocks of 2x2 cells, the map does not fit in the view
+    gui = AntSimulationGUI(environment, verbose=False, view_size=(50, 50))
+    overview_seconds = time_per_call(draw_frame, max(1, int(20 * scale)))
+
+    # Whole large map in the view: the cost grows with the map size, as every
+    # pheromone level is read on each frame
+    large = f"[{LARGE_MAP_SIZE}]"
+    gui = AntSimulationGUI(make_large_environment(LARGE_MAP_SIZE), verbose=False, view_size=(512, 512))
+    start_time = time.perf_counter()
+    gui.draw()
+    first_seconds = time.perf_counter() - start_time
+    large_seconds = time_per_call(draw_frame, max(1, int(10 * scale)), repeat=3)
+    return [
+        ("render_pixel_perfect", seconds * 1000, "ms"),
+        ("render_frame", frame_seconds * 1000, "ms"),
+        ("render_idle_frame", idle_seconds * 1000, "ms"),
+        ("render_overview_frame", overview_seconds * 1000, "ms"),
+        ("render_overview_first_frame" + large, first_seconds * 1000, "ms"),
+        ("render_overview_frame" + large, large_seconds * 1000, "ms"),
+    ]
+
+
+def bench_end_to_end(scale: float) -> list:
+    results = []
+    for env_file in sorted(glob.glob(os.path.join(ROOT, "envs", "*.txt"))):
+        name = os.path.splitext(os.path.basename(env_file))[0]
+        for ants in ANT_COUNTS:
+            # Fewer steps with many ants keep each run under half a second.
+            # Seeded runs repeat the same steps, the fastest one is kept
+            steps = max(5, int(scale * 10000 / max(ants, 100)))
+            best = float("inf")
+            for _ in range(3):
+                environment = make_environment(env_file, ants)
+                start_time = time.perf_counter()
+                for _ in range(steps):
+                    environment.update()
+                best = min(best, (time.perf_counter() - start_time) / steps)
+            results.append((f"steps[{name},{ants}]", best * 1000, "ms"))
+    return results
+
+
+BENCHMARKS = {
+    "perception": bench_perception,
+    "evaporate": bench_evaporate,
+    "strongest_direction": bench_strongest_direction,
+    "execute_action": bench_execute_action,
+    "render": bench_render,
+    "end_to_end": bench_end_to_end,
+}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Print the results next to the baseline, return the names of the regressions"""
+    regressions = []
+    print(f"{'benchmark':<40} {'value':>12} {'baseline':>12} {'change':>8}")
+    for name, result in results.items():
+        value = f"{result['value']:.3f} {result['unit']}"
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name:<40} {value:>12} {'-':>12} {'new':>8}")
+            continue
+        change = result["value"] / reference["value"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(
+            f"{name:<40} {value:>12} {reference['value']:>9.3f} {reference['unit']:<2} "
+            f"{change * 100:>+7.1f}%{flag}"
+        )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument(
+        "--filter",
+        nargs="+",
+        choices=list(BENCHMARKS),
+        default=list(BENCHMARKS),
+        help="Benchmark groups to run (default: all)",
+    )
+    parser.add_argument("--output", type=str, help="Write the results to this JSON file")
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        default=DEFAULT_BASELINE,
+        help="Baseline JSON file to compare against (default: benchmarks/baseline.json)",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store the results as the new baseline instead of comparing",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="Slowdown flagged as a regression, as a fraction (default: 0.15)",
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="Ten times fewer iterations, for a rough check"
+    )
+    args = parser.parse_args()
+
+    scale = 0.1 if args.quick else 1.0
+    results = {}
+    for group in args.filter:
+        print(f"Running {group}...", file=sys.stderr)
+        for name, value, unit in BENCHMARKS[group](scale):
+            results[name] = {"value": value, "unit": unit}
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    else:
+        print(f"No baseline at {args.baseline}, run with --save-baseline to create one")
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold * 100:.0f}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
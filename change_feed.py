@@ -0,0 +1,127 @@
+# Change tracking of map cells for consumers reading at their own pace,
+# such as the GUI redrawing what changed, recorders or checkpoint deltas.
+#
+# Producers (the environment for the terrain, the pheromone maps) record
+# changed cells in a ChangeFeed, consumers subscribe() to it and read the
+# cells changed since their previous read with changes(cursor). Nothing is
+# recorded while nobody is subscribed.
+
+import itertools
+
+# Default maximum number of cells a feed keeps, about 2 MB of positions
+DEFAULT_CAPACITY = 1 << 16
+
+
+class ChangeFeed:
+    """Cells changed since each consumer last read them, with bounded memory
+
+    Changes are kept in generations: producers add cells to the current
+    one, a read starts a new one, and a generation is dropped once every
+    consumer read it. A cell changed several times in a generation is
+    stored once. When more than `capacity` cells would be stored, the feed
+    forgets them all and reports that everything changed, as mark_all()
+    does for changes covering the whole map: changes() returns None
+    instead of a set to the consumers that had not read them yet.
+
+    Producers only record when `active` is set, so an unread feed costs one
+    attribute test per change:
+
+        if feed.active:
+            feed.add((x, y))
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.active = False  # Whether anyone is subscribed
+        self._current = set()  # Generation being recorded
+        self._sequence = 0  # Number of the current generation
+        self._generations = []  # [(sequence, cells)] read by some consumers only
+        self._stored = 0  # Cells in self._generations
+        self._everything_changed = -1  # Last generation in which everything changed
+        self._cursors = {}  # {cursor: first generation not read yet}
+        self._next_cursor = 0
+
+    def subscribe(self) -> int:
+        """Start reading the changes made from now on, returns the cursor to read them with"""
+        self._seal()
+        cursor = self._next_cursor
+        self._next_cursor += 1
+        self._cursors[cursor] = self._sequence
+        self.active = True
+        return cursor
+
+    def unsubscribe(self, cursor: int) -> None:
+        del self._cursors[cursor]
+        if not self._cursors:
+            self.active = False
+            self._current = set()
+            self._generations = []
+            self._stored = 0
+        else:
+            self._collect()
+
+    def add(self, position) -> None:
+        """Record a changed cell (x, y)"""
+        current = self._current
+        current.add(position)
+        if len(current) + self._stored > self.capacity:
+            self.mark_all()
+
+    def add_many(self, positions) -> None:
+        """Record changed cells (x, y)"""
+        current = self._current
+        current.update(positions)
+        if len(current) + self._stored > self.capacity:
+            self.mark_all()
+
+    def add_area(self, x0: int, y0: int, x1: int, y1: int) -> None:
+        """Record the cells of a rectangle, x1 and y1 excluded"""
+        if (x1 - x0) * (y1 - y0) + self._stored > self.capacity:
+            self.mark_all()
+        else:
+            self.add_many(itertools.product(range(x0, x1), range(y0, y1)))
+
+    def mark_all(self) -> None:
+        """Record that every cell may have changed, the stored cells are dropped"""
+        self._everything_changed = self._sequence
+        self._current = set()
+        self._generations = []
+        self._stored = 0
+
+    def pending(self, cursor: int) -> bool:
+        """Whether changes(cursor) would report anything"""
+        start = self._cursors[cursor]
+        return (
+            bool(self._current)
+            or self._everything_changed >= start
+            or bool(self._generations and self._generations[-1][0] >= start)
+        )
+
+    def changes(self, cursor: int):
+        """Cells changed since the previous call with this cursor, as a set of (x, y)
+
+        None when everything may have changed.
+        """
+        start = self._cursors[cursor]
+        self._seal()
+        self._cursors[cursor] = self._sequence
+        if start <= self._everything_changed:
+            changes = None
+        else:
+            changes = set().union(*(cells for sequence, cells in self._generations if sequence >= start))
+        self._collect()
+        return changes
+
+    def _seal(self) -> None:
+        """Start a new generation if the current one holds changes"""
+        if self._current or self._everything_changed == self._sequence:
+            self._generations.append((self._sequence, self._current))
+            self._stored += len(self._current)
+            self._current = set()
+            self._sequence += 1
+
+    def _collect(self) -> None:
+        """Drop the generations every consumer read"""
+        oldest = min(self._cursors.values(), default=self._sequence)
+        while self._generations and self._generations[0][0] < oldest:
+            self._stored -= len(self._generations.pop(0)[1])
@@ -0,0 +1,306 @@
+# Save and restore the full state of an Environment in one binary file.
+# The same format caches compiled environment files, see load_cached_environment.
+#
+# File layout: the MAGIC bytes, then a zlib stream of sections. Each section
+# is a name (uint16 length + UTF-8) and a payload (uint64 length + bytes).
+# The "meta" section is JSON holding the scalars, the others are raw array
+# buffers in the byte order recorded in the metadata.
+
+import hashlib
+import json
+import os
+import pickle
+import random
+import struct
+import sys
+import zlib
+from array import array
+
+from ant import ANT_FIELDS, AntPopulation
+
+MAGIC = b"ANTCKPT\x01"
+VERSION = 1
+
+# Attributes set by EnvironmentBuilder.load_from_file, saved when present
+FILE_SETTINGS = ("requested_ant_count", "time_limit", "max_steps", "parse_warnings")
+
+# Compiled environment files go to this directory, next to the text files
+CACHE_DIRECTORY = "__envcache__"
+# Smaller files parse faster than a checkpoint loads
+CACHE_MIN_SIZE = 4096
+
+
+def _pack_sections(sections: dict) -> bytes:
+    parts = []
+    for name, payload in sections.items():
+        encoded = name.encode()
+        parts.append(struct.pack("<H", len(encoded)))
+        parts.append(encoded)
+        parts.append(struct.pack("<Q", len(payload)))
+        parts.append(payload)
+    return b"".join(parts)
+
+
+def _unpack_sections(data: bytes) -> dict:
+    sections = {}
+    offset = 0
+    while offset < len(data):
+        (name_length,) = struct.unpack_from("<H", data, offset)
+        offset += 2
+        name = data[offset : offset + name_length].decode()
+        offset += name_length
+        (length,) = struct.unpack_from("<Q", data, offset)
+        offset += 8
+        sections[name] = data[offset : offset + length]
+        offset += length
+    return sections
+
+
+def _to_array(typecode: str, payload: bytes, swap: bool) -> array:
+    values = array(typecode)
+    values.frombytes(payload)
+    if swap:
+        values.byteswap()
+    return values
+
+
+def _dump_pheromones(pheromones, backend: str, prefix: str, sections: dict) -> dict:
+    """Add the storage of a pheromone map to sections, returns its metadata"""
+    meta = {"evaporation_rate": pheromones.evaporation_rate}
+    if backend == "array":
+        sections[prefix + ".values"] = pheromones.values.astype("=f8").tobytes()
+        return meta
+
+    # Sparse maps: positions as interleaved x, y, in insertion order
+    positions = array("i")
+    for position in pheromones.values:
+        positions.extend(position)
+    sections[prefix + ".positions"] = positions.tobytes()
+    sections[prefix + ".values"] = array("d", pheromones.values.values()).tobytes()
+    if backend == "lazy":
+        sections[prefix + ".stamps"] = array("q", pheromones.stamps.values()).tobytes()
+        meta.update(
+            now=pheromones.now,
+            cutoff=pheromones.cutoff,
+            sweep_interval=pheromones.sweep_interval,
+        )
+    return meta
+
+
+def _load_pheromones(pheromones, backend: str, prefix: str, meta: dict, sections, swap):
+    """Restore a pheromone map written by _dump_pheromones"""
+    pheromones.evaporation_rate = meta["evaporation_rate"]
+    values = _to_array("d", sections[prefix + ".values"], swap)
+    if backend == "array":
+        pheromones.values.reshape(-1)[:] = values
+        return
+
+    positions = _to_array("i", sections[prefix + ".positions"], swap).tolist()
+    keys = list(zip(positions[0::2], positions[1::2]))
+    pheromones.values = dict(zip(keys, values.tolist()))
+    if backend == "lazy":
+        stamps = _to_array("q", sections[prefix + ".stamps"], swap).tolist()
+        pheromones.stamps = dict(zip(keys, stamps))
+        pheromones.now = meta["now"]
+        pheromones.cutoff = meta["cutoff"]
+        pheromones.sweep_interval = meta["sweep_interval"]
+
+
+def save_checkpoint(environment, filename: str, include_strategies: bool = False) -> None:
+    """Write the state of environment to filename
+
+    Saves the terrain, food, both pheromone maps, the ants, the counters and
+    the random generator. The strategies are pickled with include_strategies,
+    otherwise only their class names are kept and load_checkpoint needs them.
+    Profiler and decision budget are not saved.
+    """
+    population = environment.population
+    sections = {}
+    sections["cells"] = bytes(environment.cells)
+    sections["food_cells"] = environment.food_cells.tobytes()
+    sections["zone_cells"] = bytes(environment.zone_cells)
+    for name, _ in ANT_FIELDS:
+        sections["ants." + name] = getattr(population, name).tobytes()
+    food_positions = array("i")
+    for position in sorted(environment.food_positions):
+        food_positions.extend(position)
+    sections["food_positions"] = food_positions.tobytes()
+
+    backend = environment.pheromone_backend
+    pheromones = {
+        "home": _dump_pheromones(environment.home_pheromones, backend, "home", sections),
+        "food": _dump_pheromones(environment.food_pheromones, backend, "food", sections),
+    }
+    if include_strategies:
+        sections["strategies"] = pickle.dumps(
+            population.strategies, protocol=pickle.HIGHEST_PROTOCOL
+        )
+
+    version, state, gauss_next = environment.rng.getstate()
+    meta = {
+        "version": VERSION,
+        "byteorder": sys.byteorder,
+        "width": environment.width,
+        "height": environment.height,
+        "border": environment.border,
+        "pheromone_backend": backend,
+        "pheromones_enabled": environment.pheromones_enabled,
+        "pheromones": pheromones,
+        "colony_positions": environment.colony_positions,
+        "colony_radius": environment.colony_radius,
+        "initial_food_amount": environment.initial_food_amount,
+        "food_collected": environment.food_collected,
+        "steps": environment.steps,
+        "next_ant_id": environment.next_ant_id,
+        "seed": environment.seed,
+        "rng_state": [version, list(state), gauss_next],
+        "ant_fields": [list(field) for field in ANT_FIELDS],
+        "strategy_names": [type(strategy).__name__ for strategy in population.strategies],
+        "settings": {
+            name: getattr(environment, name)
+            for name in FILE_SETTINGS
+            if hasattr(environment, name)
+        },
+    }
+    sections = {"meta": json.dumps(meta).encode(), **sections}
+
+    with open(filename, "wb") as f:
+        f.write(MAGIC)
+        f.write(zlib.compress(_pack_sections(sections), 1))
+
+
+def load_checkpoint(filename: str, strategies=None):
+    """Create the Environment saved in filename by save_checkpoint
+
+    strategies replaces the saved strategies: a list in the order of the
+    saved population.strategies, or a single AntStrategy for every ant. It
+    is required when the file holds ants but no pickled strategies.
+    """
+    from environment import Environment
+
+    with open(filename, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{filename} is not an environment checkpoint")
+    sections = _unpack_sections(zlib.decompress(data[len(MAGIC) :]))
+    meta = json.loads(sections["meta"])
+    if meta["version"] != VERSION:
+        raise ValueError(f"Unsupported checkpoint version {meta['version']}")
+    if [tuple(field) for field in meta["ant_fields"]] != list(ANT_FIELDS):
+        raise ValueError("The checkpoint was written with different ant fields")
+    swap = meta["byteorder"] != sys.byteorder
+
+    environment = Environment(
+        meta["width"], meta["height"], meta["pheromone_backend"], meta["seed"]
+    )
+    if meta["border"] != environment.border:
+        environment.border = meta["border"]
+        environment.stride = environment.width + 2 * environment.border
+    environment.cells = bytearray(sections["cells"])
+    environment.food_cells = _to_array("i", sections["food_cells"], swap)
+    environment.zone_cells = bytearray(sections["zone_cells"])
+    environment._make_grid_views()
+
+    food_positions = _to_array("i", sections["food_positions"], swap).tolist()
+    environment.food_positions = set(zip(food_positions[0::2], food_positions[1::2]))
+    environment.colony_positions = [tuple(position) for position in meta["colony_positions"]]
+    environment._colony_radius = meta["colony_radius"]
+    environment.initial_food_amount = meta["initial_food_amount"]
+    environment.food_collected = meta["food_collected"]
+    environment.steps = meta["steps"]
+    environment.next_ant_id = meta["next_ant_id"]
+    environment.pheromones_enabled = meta["pheromones_enabled"]
+    version, state, gauss_next = meta["rng_state"]
+    environment.rng = random.Random()
+    environment.rng.setstate((version, tuple(state), gauss_next))
+    for name, value in meta["settings"].items():
+        setattr(environment, name, value)
+
+    backend = meta["pheromone_backend"]
+    for prefix, pheromones in (
+        ("home", environment.home_pheromones),
+        ("food", environment.food_pheromones),
+    ):
+        _load_pheromones(pheromones, backend, prefix, meta["pheromones"][prefix], sections, swap)
+
+    population = AntPopulation()
+    for name, typecode in ANT_FIELDS:
+        setattr(population, name, _to_array(typecode, sections["ants." + name], swap))
+    if strategies is None:
+        if "strategies" in sections:
+            strategies = pickle.loads(sections["strategies"])
+        elif meta["strategy_names"]:
+            raise ValueError(
+                f"{filename} does not hold the strategies "
+                f"({', '.join(meta['strategy_names'])}), pass them to load_checkpoint"
+            )
+        else:
+            strategies = []
+    elif not isinstance(strategies, (list, tuple)):
+        strategies = [strategies] * len(meta["strategy_names"])
+    if len(strategies) != len(meta["strategy_names"]):
+        raise ValueError(
+            f"{len(meta['strategy_names'])} strategies expected, got {len(strategies)}"
+        )
+    population.strategies = list(strategies)
+    environment.population = environment.ants = population
+    environment.rebuild_ant_index()
+    return environment
+
+
+def load_cached_environment(
+    filename: str, parse, verbose: bool = True, cache_dir=None, parser_version: int = 0
+):
+    """Load an environment file through its compiled binary cache
+
+    The cache file is named after a hash of the text, the parser_version and
+    the checkpoint VERSION, so edited files and files compiled by another
+    parser are compiled again. On a miss, parse(filename, verbose) builds
+    the environment, which is then saved as a checkpoint without ants in
+    cache_dir (default: __envcache__ next to the file). A cache that cannot
+    be read or written is ignored. Files under CACHE_MIN_SIZE bytes are
+    always parsed.
+    """
+    with open(filename, "rb") as f:
+        text = f.read()
+    if len(text) < CACHE_MIN_SIZE:
+        return parse(filename, verbose)
+    digest = hashlib.sha256(text).hexdigest()[:20]
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(filename)), CACHE_DIRECTORY)
+    name = os.path.splitext(os.path.basename(filename))[0]
+    cache_file = os.path.join(cache_dir, f"{name}.{digest}.p{parser_version}.v{VERSION}.envc")
+
+    try:
+        environment = load_checkpoint(cache_file)
+    except Exception:
+        # Missing, truncated or garbled cache, the text is parsed again
+        environment = None
+    if environment is not None:
+        # Draw a seed like the Environment created by parse would
+        environment.set_seed()
+        if verbose:
+            print(
+                f"Loading environment with dimensions: {environment.width}x{environment.height} "
+                f"(cached in {cache_file})"
+            )
+            if environment.requested_ant_count:
+                print(f"Loading environment with {environment.requested_ant_count} ants")
+            if environment.time_limit:
+                print(f"Environment time limit: {environment.time_limit} seconds")
+            if environment.max_steps:
+                print(f"Environment max steps: {environment.max_steps}")
+            for warning in getattr(environment, "parse_warnings", ()):
+                print(warning)
+        return environment
+
+    environment = parse(filename, verbose)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Written under a temporary name, parallel workers may compile the same file
+        temporary_file = f"{cache_file}.{os.getpid()}.tmp"
+        save_checkpoint(environment, temporary_file)
+        os.replace(temporary_file, cache_file)
+    except OSError:
+        pass
+    return environment
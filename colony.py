@@ -1,6 +1,6 @@
 import random
 from typing import List, Dict
-from environment import Direction
+from common import Direction
 from ant import Ant, AntStrategy
 
 
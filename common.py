@@ -1,6 +1,7 @@
 from enum import Enum
 from typing import Optional
 import math
+import random
 
 
 # Enum for different terrain types
@@ -81,6 +82,9 @@ class AntPerception:
         self.food_collected = 0
         self.steps_taken = 0
         self.ant_id = None
+        # Random generator for the strategy (random.Random API), the ant's own
+        # seeded stream when the perception comes from an Environment
+        self.rng = random
 
     def can_see_food(self) -> bool:
         return TerrainType.FOOD in [cell for cell in self.visible_cells.values()]
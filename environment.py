@@ -1,7 +1,18 @@
 from typing import Optional
-from ant import Ant
+from functools import lru_cache
+from array import array
+from ant import DIRECTIONS, NO_ID, Ant, AntPopulation, BatchAntStrategy
+import bisect
+import copy
+import itertools
 import random
 import math
+import re
+from time import perf_counter
+
+from change_feed import ChangeFeed
+from rng import AntRandom
+
 from common import (
     TerrainType,
     Direction,
@@ -10,6 +21,86 @@ from common import (
 )
 
 
+def _import_numpy(feature: str):
+    """Import numpy on first use, headless runs without batch strategies never load it"""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(f"{feature} requires numpy (pip install numpy)") from None
+    return numpy
+
+
+# TerrainType members indexed by their value, cheaper than TerrainType(value)
+TERRAIN_TYPES = tuple(TerrainType)
+
+# AntAction members indexed by their value, to decode batched decisions
+ANT_ACTIONS = tuple(AntAction)
+
+# Value of the cells bordering the map in the grid buffers: they block
+# movement like walls but not the line of sight, and are never visible
+OUTSIDE = 255
+
+# Width of that border, it covers the default vision range of an ant so that
+# perception and movement never need bounds checks
+GRID_BORDER = 3
+
+# Terrain reported by get_terrain() for each grid value, outside (0) and
+# inside (1) the radius of a colony
+TERRAIN_BY_ZONE = (
+    TERRAIN_TYPES,
+    (TerrainType.COLONY, TerrainType.WALL, TerrainType.COLONY, TerrainType.FOOD),
+)
+
+
+@lru_cache(maxsize=None)
+def get_vision_offsets(direction: Direction, vision_range: int, vision_angle: float):
+    """Get the cells an ant can see, relative to its position
+
+    Returns a tuple of (dx, dy, line_of_sight) entries, where line_of_sight is
+    the tuple of (dx, dy) offsets between the ant and the cell that block the
+    view if they are walls. The result only depends on the direction, range
+    and angle of the vision cone, so it is computed once per combination.
+    """
+    offsets = []
+    dir_dx, dir_dy = Direction.get_delta(direction)
+    dir_magnitude = math.sqrt(dir_dx * dir_dx + dir_dy * dir_dy)
+    if dir_magnitude > 0:
+        dir_dx, dir_dy = dir_dx / dir_magnitude, dir_dy / dir_magnitude
+    half_vision_angle = vision_angle / 2
+
+    for dx in range(-vision_range, vision_range + 1):
+        for dy in range(-vision_range, vision_range + 1):
+            if dx == 0 and dy == 0:
+                continue
+
+            # If point is too far, it's not in vision field
+            distance = math.sqrt(dx * dx + dy * dy)
+            if distance > vision_range:
+                continue
+
+            # Angle between ant's direction and point
+            point_dx, point_dy = dx / distance, dy / distance
+            dot_product = dir_dx * point_dx + dir_dy * point_dy
+            dot_product = max(-1.0, min(1.0, dot_product))
+            angle = math.degrees(math.acos(dot_product))
+            if angle > half_vision_angle:
+                continue
+
+            # Cells on the line of sight, adjacent cells are always visible
+            line_of_sight = []
+            if abs(dx) > 1 or abs(dy) > 1:
+                steps = max(abs(dx), abs(dy))
+                step_x = dx / steps
+                step_y = dy / steps
+                for step in range(1, steps):
+                    line_of_sight.append(
+                        (math.floor(step * step_x), math.floor(step * step_y))
+                    )
+
+            offsets.append((dx, dy, tuple(line_of_sight)))
+    return tuple(offsets)
+
+
 # Class for pheromone handling
 class PheromoneMap:
     def __init__(self, width: int, height: int, evaporation_rate: float = 0.999):
@@ -19,7 +110,8 @@ class PheromoneMap:
         # Use a dictionary for sparse representation of pheromones
         # Key is (x, y) tuple, value is pheromone strength
         self.values = {} # {(x, y) : pheromone_level}
-        self.modified_positions = set()
+        # Cells whose level changed, for subscribers such as the GUI, see change_feed.py
+        self.changes = ChangeFeed()
 
     def add_pheromone(self, x: int, y: int, amount: float) -> None:
         """Add pheromone at position (x, y)"""
@@ -27,7 +119,8 @@ class PheromoneMap:
             pos = (x, y)
             # Add maximum pheromone amount between current and new amount
             self.values[pos] = max(self.values.get(pos, 0), amount)
-            self.modified_positions.add(pos)
+            if self.changes.active:
+                self.changes.add(pos)
 
     def get_value(self, x: int, y: int) -> float:
         """Get pheromone value at position (x, y)"""
@@ -50,12 +143,15 @@ class PheromoneMap:
                 positions_to_remove.append(pos)
             else:
                 self.values[pos] = new_value
-                self.modified_positions.add(pos)
 
         # Remove very small values
         for pos in positions_to_remove:
             del self.values[pos]
 
+        # Every stored level changed
+        if self.changes.active and (self.values or positions_to_remove):
+            self.changes.mark_all()
+
     def get_strongest_direction(
         self, x: int, y: int, vision_range: int = 3
     ) -> Optional[Direction]:
@@ -80,236 +176,972 @@ class PheromoneMap:
 
         return best_direction
 
+    def add_pheromones(self, xs, ys, amounts) -> None:
+        """Add pheromone at several positions, in order, like add_pheromone"""
+        for x, y, amount in zip(xs, ys, amounts):
+            self.add_pheromone(x, y, amount)
+
+    def items(self):
+        """Get all (position, pheromone_level) pairs with a non-zero level"""
+        return list(self.values.items())
+
+    def copy(self) -> "PheromoneMap":
+        """Independent copy of the map"""
+        clone = copy.copy(self)
+        # dict.copy() or ndarray.copy(), both copy the whole storage at C speed
+        clone.values = self.values.copy()
+        # The subscribers follow the original map
+        clone.changes = ChangeFeed()
+        return clone
+
+    def to_array(self):
+        """Get pheromone levels as a (height, width) NumPy array, indexed [y, x]"""
+        np = _import_numpy("PheromoneMap.to_array")
+        levels = np.zeros((self.height, self.width), dtype=np.float64)
+        xs, ys, values = self._stored_arrays(np)
+        levels[ys, xs] = values
+        return levels
+
+    def _stored_arrays(self, np):
+        """Positions and levels of self.values as NumPy arrays xs, ys, levels"""
+        count = len(self.values)
+        positions = np.fromiter(
+            itertools.chain.from_iterable(self.values), dtype=np.intp, count=2 * count
+        )
+        values = np.fromiter(self.values.values(), dtype=np.float64, count=count)
+        return positions[0::2], positions[1::2], values
+
+
+# Dense pheromone map backed by a NumPy array
+class ArrayPheromoneMap(PheromoneMap):
+    """Pheromone map storing one float per cell in a (height, width) array
+
+    Same API as PheromoneMap, but evaporate() is one vectorized multiply and
+    one threshold mask instead of a Python loop over every stored entry, so
+    its cost no longer depends on how much of the map is covered by trails.
+    """
+
+    def __init__(self, width: int, height: int, evaporation_rate: float = 0.999):
+        np = _import_numpy("ArrayPheromoneMap")
+        self.width = width
+        self.height = height
+        self.evaporation_rate = evaporation_rate
+        self.values = np.zeros((height, width), dtype=np.float64) # [y, x] : pheromone_level
+        self.changes = ChangeFeed()
+
+    def add_pheromone(self, x: int, y: int, amount: float) -> None:
+        """Add pheromone at position (x, y)"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            # Keep the maximum between current and new amount
+            if amount > self.values[y, x]:
+                self.values[y, x] = amount
+            if self.changes.active:
+                self.changes.add((x, y))
+
+    def get_value(self, x: int, y: int) -> float:
+        """Get pheromone value at position (x, y)"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.values.item(y, x)
+        return 0.0
+
+    def add_pheromones(self, xs, ys, amounts) -> None:
+        """Add pheromone at several positions, in order, like add_pheromone"""
+        np = _import_numpy("ArrayPheromoneMap")
+
+        xs, ys, amounts = np.asarray(xs), np.asarray(ys), np.asarray(amounts)
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        xs, ys = xs[inside], ys[inside]
+        # Taking the maximum does not depend on the order of the deposits
+        np.maximum.at(self.values, (ys, xs), amounts[inside])
+        if self.changes.active:
+            self.changes.add_many(zip(xs.tolist(), ys.tolist()))
+
+    def evaporate(self) -> None:
+        """Evaporate pheromones"""
+        values = self.values
+        values *= self.evaporation_rate
+        # Same cut-off as the sparse map, very small values are dropped
+        values[values < 0.01] = 0.0
+        if self.changes.active:
+            self.changes.mark_all()
+
+    def items(self):
+        """Get all (position, pheromone_level) pairs with a non-zero level"""
+        np = _import_numpy("ArrayPheromoneMap")
+        ys, xs = np.nonzero(self.values)
+        levels = self.values[ys, xs].tolist()
+        return [((x, y), level) for x, y, level in zip(xs.tolist(), ys.tolist(), levels)]
+
+    def to_array(self):
+        """Get pheromone levels as a (height, width) NumPy array, indexed [y, x]
+
+        The array is the map storage itself, not a copy.
+        """
+        return self.values
+
+
+# Sparse pheromone map evaporating lazily when values are read
+class LazyPheromoneMap(PheromoneMap):
+    """Pheromone map applying evaporation on read instead of on every step
+
+    Each cell keeps the level it had and the step at which it was written,
+    get_value() returns level * evaporation_rate ** (steps elapsed since then).
+    evaporate() only advances the step counter, cells that decayed below the
+    cut-off are purged by a sweep every `sweep_interval` steps, so the
+    per-step cost no longer grows with the length of the trails.
+    Values match the eager PheromoneMap up to floating point rounding.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        evaporation_rate: float = 0.999,
+        sweep_interval: int = 256,
+    ):
+        super().__init__(width, height, evaporation_rate)
+        self.cutoff = 0.01
+        self.sweep_interval = sweep_interval
+        self.now = 0  # Number of evaporation steps so far
+        self.stamps = {} # {(x, y) : step at which values[(x, y)] was written}
+
+    def _current_value(self, pos) -> float:
+        value = self.values.get(pos)
+        if value is None:
+            return 0.0
+        elapsed = self.now - self.stamps[pos]
+        if elapsed:
+            value *= self.evaporation_rate**elapsed
+            if value < self.cutoff:
+                return 0.0
+        return value
+
+    def add_pheromone(self, x: int, y: int, amount: float) -> None:
+        """Add pheromone at position (x, y)"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            pos = (x, y)
+            self.values[pos] = max(self._current_value(pos), amount)
+            self.stamps[pos] = self.now
+            if self.changes.active:
+                self.changes.add(pos)
+
+    def get_value(self, x: int, y: int) -> float:
+        """Get pheromone value at position (x, y)"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self._current_value((x, y))
+        return 0.0
+
+    def evaporate(self) -> None:
+        """Evaporate pheromones"""
+        self.now += 1
+        if self.now % self.sweep_interval == 0:
+            self.sweep()
+        # Nothing is written, but every level read decays
+        if self.changes.active and self.values:
+            self.changes.mark_all()
+
+    def copy(self) -> "LazyPheromoneMap":
+        """Independent copy of the map"""
+        clone = super().copy()
+        clone.stamps = self.stamps.copy()
+        return clone
+
+    def sweep(self) -> None:
+        """Remove the cells whose pheromone decayed below the cut-off"""
+        expired = [pos for pos in self.values if self._current_value(pos) == 0.0]
+        for pos in expired:
+            del self.values[pos]
+            del self.stamps[pos]
+
+    def items(self):
+        """Get all (position, pheromone_level) pairs with a non-zero level"""
+        items = []
+        for pos in self.values:
+            value = self._current_value(pos)
+            if value:
+                items.append((pos, value))
+        return items
+
+    def to_array(self):
+        """Get pheromone levels as a (height, width) NumPy array, indexed [y, x]"""
+        np = _import_numpy("LazyPheromoneMap.to_array")
+        levels = np.zeros((self.height, self.width), dtype=np.float64)
+        xs, ys, values = self._stored_arrays(np)
+        # Decayed like _current_value, stamps are in the same order as values
+        elapsed = self.now - np.fromiter(self.stamps.values(), dtype=np.int64, count=len(xs))
+        decayed = elapsed != 0
+        # Python float powers, NumPy's may differ in the last bit
+        steps, inverse = np.unique(elapsed[decayed], return_inverse=True)
+        factors = np.array([self.evaporation_rate ** step for step in steps.tolist()])
+        values[decayed] *= factors[inverse]
+        values[decayed & (values < self.cutoff)] = 0.0
+        levels[ys, xs] = values
+        return levels
+
+
+# Available pheromone map implementations, selected by name in Environment
+PHEROMONE_BACKENDS = {
+    "dict": PheromoneMap,
+    "array": ArrayPheromoneMap,
+    "lazy": LazyPheromoneMap,
+}
+
+
+# State an Environment shares with its forks until one of them writes it
+FORK_LAYERS = ("terrain", "home_pheromones", "food_pheromones", "ants")
+TERRAIN_LAYER = frozenset(("terrain",))
+
 
 # Environment class to represent the world
 class Environment:
-    def __init__(self, width: int, height: int):
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        pheromone_backend: str = "dict",
+        seed: Optional[int] = None,
+    ):
+        if pheromone_backend not in PHEROMONE_BACKENDS:
+            raise ValueError(f"Unknown pheromone backend: {pheromone_backend}")
         self.width = width
         self.height = height
-        self.grid = [
-            [TerrainType.EMPTY.value for _ in range(width)] for _ in range(height)
-        ]
-        self.food_amounts = [[0 for _ in range(width)] for _ in range(height)]
-        self.home_pheromones = PheromoneMap(width, height)
-        self.food_pheromones = PheromoneMap(width, height)
-        self.ants = []
+        # Terrain, food amounts and colony zone are stored in flat buffers of
+        # (height + 2 * border) rows of (width + 2 * border) cells, the cell
+        # (x, y) being at cell_index(x, y). The grid, food_amounts and
+        # colony_zone row views keep grid[y][x] access working.
+        self.border = GRID_BORDER
+        self.stride = width + 2 * self.border
+        size = self.stride * (height + 2 * self.border)
+        self.cells = bytearray([OUTSIDE]) * size
+        for y in range(height):
+            start = self.cell_index(0, y)
+            self.cells[start : start + width] = bytes(width)
+        self.food_cells = array("i", bytes(4 * size))
+        # 1 for cells within the radius of a colony, filled by add_colony
+        self.zone_cells = bytearray(size)
+        self._make_grid_views()
+        self.pheromone_backend = pheromone_backend
+        self.home_pheromones = self._create_pheromone_map()
+        self.food_pheromones = self._create_pheromone_map()
+        # State of the ants, self.ants[i] is a view on entry i of its arrays
+        self.population = AntPopulation()
+        self.ants = self.population
+        # Occupancy index: {(x, y): sorted indices in self.ants of the ants on that cell}
+        self.ant_cells = {}
         self.colony_positions = []
-        self.colony_radius = 2  # This creates a 5x5 area (radius 2 around center point)
+        self._colony_radius = 2  # This creates a 5x5 area (radius 2 around center point)
         self.food_positions = set()
         self.initial_food_amount = 0
         self.food_collected = 0
         self.steps = 0
         self.pheromones_enabled = True
         self.next_ant_id = 1  # For tracking sequential ant IDs
+        self._vision_tables = {}  # Cache of _get_vision_table
+        self.profiler = None  # PhaseProfiler timing update(), see enable_profiling
+        self.decision_budget = None  # DecisionBudget, see set_decision_budget
+        self._shared_layers = set()  # FORK_LAYERS shared with a fork, see fork()
+        # Cells whose terrain type changes (walls, food appearing or running out,
+        # colony zones), as get_terrain() would report them, see change_feed.py
+        self.terrain_changes = ChangeFeed()
+        self.set_seed(seed)
+
+    def cell_index(self, x: int, y: int) -> int:
+        """Index of the cell (x, y) in the cells, food_cells and zone_cells buffers"""
+        return (y + self.border) * self.stride + x + self.border
+
+    def _make_grid_views(self) -> None:
+        cells = memoryview(self.cells)
+        food_cells = memoryview(self.food_cells)
+        zone_cells = memoryview(self.zone_cells)
+        self.grid = []
+        self.food_amounts = []
+        self.colony_zone = []
+        for y in range(self.height):
+            start = self.cell_index(0, y)
+            end = start + self.width
+            self.grid.append(cells[start:end])
+            self.food_amounts.append(food_cells[start:end])
+            self.colony_zone.append(zone_cells[start:end])
+
+    def ensure_border(self, border: int) -> None:
+        """Make sure the grid buffers have a border at least `border` cells wide
+
+        The buffers are reallocated if needed, which invalidates previously
+        taken grid, food_amounts and colony_zone rows.
+        """
+        if border > self.border:
+            self._grow_border(border)
+
+    def _grow_border(self, border: int) -> None:
+        """Reallocate the grid buffers with a wider border, keeping their content"""
+        self._own("terrain")
+        old_border, old_stride = self.border, self.stride
+        old_buffers = (self.cells, self.food_cells, self.zone_cells)
+        self.border = border
+        self.stride = self.width + 2 * border
+        size = self.stride * (self.height + 2 * border)
+        self.cells = bytearray([OUTSIDE]) * size
+        self.food_cells = array("i", bytes(4 * size))
+        self.zone_cells = bytearray(size)
+        self._vision_tables = {}
+        for old, new in zip(old_buffers, (self.cells, self.food_cells, self.zone_cells)):
+            for y in range(self.height):
+                old_start = (y + old_border) * old_stride + old_border
+                new_start = self.cell_index(0, y)
+                new[new_start : new_start + self.width] = old[
+                    old_start : old_start + self.width
+                ]
+        self._make_grid_views()
+
+    def __getstate__(self):
+        # Row views over the buffers cannot be pickled, they are rebuilt on load
+        state = self.__dict__.copy()
+        del state["grid"], state["food_amounts"], state["colony_zone"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._make_grid_views()
+
+    def fork(self) -> "Environment":
+        """Copy of the environment for what-if runs, sharing its state copy-on-write
+
+        The fork and the environment share the terrain and food, both
+        pheromone maps and the ants (with their strategies) until one of them
+        writes a layer, which it copies first: update() copies the ants and
+        the pheromone maps, the terrain is only copied when food is picked
+        up. Writes are detected through the Environment methods, Ant views
+        and pheromone maps taken before forking may belong to the other
+        environment once a layer is copied, take them again.
+
+        Whichever side steps first pays the copies, this environment
+        included: its strategies are then replaced by deep copies, so
+        references to them held elsewhere stop following the simulation.
+        To display a running simulation, use snapshot() instead.
+        """
+        self._shared_layers = set(FORK_LAYERS)
+        # Shallow copy, the grid views over the shared buffers are shared too
+        fork = Environment.__new__(Environment)
+        fork.__dict__.update(self.__dict__)
+        fork._shared_layers = set(FORK_LAYERS)
+        fork.rng = copy.copy(self.rng)
+        fork.profiler = None
+        fork.decision_budget = None
+        # The subscribers of the change feeds follow this environment
+        fork.terrain_changes = ChangeFeed()
+        for layer in ("home_pheromones", "food_pheromones"):
+            pheromones = copy.copy(getattr(self, layer))
+            pheromones.changes = ChangeFeed()
+            setattr(fork, layer, pheromones)
+        return fork
+
+    def snapshot(self) -> "Environment":
+        """Read-only copy of the current state, to display a running simulation
+
+        Unlike fork(), nothing is shared with this environment, which keeps
+        its layers and strategy objects and goes on writing them in place:
+        the terrain, pheromone maps and ant arrays are copied at once with
+        buffer copies. The strategies are not copied, so the snapshot must
+        not be updated.
+        """
+        snapshot = Environment.__new__(Environment)
+        snapshot.__dict__.update(self.__dict__)
+        snapshot._shared_layers = {"terrain"}
+        snapshot._own("terrain")
+        snapshot.rng = copy.copy(self.rng)
+        snapshot.profiler = None
+        snapshot.decision_budget = None
+        snapshot.terrain_changes = ChangeFeed()
+        snapshot.home_pheromones = self.home_pheromones.copy()
+        snapshot.food_pheromones = self.food_pheromones.copy()
+        snapshot.population = snapshot.ants = self.population.copy(copy_strategies=False)
+        snapshot.ant_cells = {cell: list(indices) for cell, indices in self.ant_cells.items()}
+        return snapshot
+
+    def _own(self, layer: str) -> None:
+        """Copy a layer shared with a fork before writing it"""
+        if layer not in self._shared_layers:
+            return
+        self._shared_layers.discard(layer)
+        if layer == "terrain":
+            self.cells = bytearray(self.cells)
+            self.food_cells = array("i", self.food_cells)
+            self.zone_cells = bytearray(self.zone_cells)
+            self.food_positions = set(self.food_positions)
+            self.colony_positions = list(self.colony_positions)
+            self._make_grid_views()
+        elif layer == "ants":
+            self.population = self.ants = self.population.copy()
+            self.ant_cells = {cell: list(indices) for cell, indices in self.ant_cells.items()}
+        else:
+            pheromones = getattr(self, layer).copy()
+            pheromones.changes = getattr(self, layer).changes
+            setattr(self, layer, pheromones)
+
+    def _own_step_layers(self) -> None:
+        """Copy the layers every step writes, the ants and the pheromone maps"""
+        self._own("ants")
+        if self.pheromones_enabled:
+            self._own("home_pheromones")
+            self._own("food_pheromones")
+
+    def save_checkpoint(self, filename: str, include_strategies: bool = False) -> None:
+        """Write the whole simulation state to a binary file, see checkpoint.py
+
+        With include_strategies the strategies are pickled too, keeping
+        their internal state.
+        """
+        from checkpoint import save_checkpoint
+
+        save_checkpoint(self, filename, include_strategies)
+
+    @staticmethod
+    def load_checkpoint(filename: str, strategies=None) -> "Environment":
+        """Create the Environment saved by save_checkpoint
+
+        strategies (a list in the saved order, or one strategy for all ants)
+        replaces the saved strategies, it is required if they were not saved.
+        """
+        from checkpoint import load_checkpoint
+
+        return load_checkpoint(filename, strategies)
+
+    def _create_pheromone_map(self) -> PheromoneMap:
+        return PHEROMONE_BACKENDS[self.pheromone_backend](self.width, self.height)
+
+    def set_pheromone_backend(self, pheromone_backend: str) -> None:
+        """Switch both pheromone maps to another backend, keeping their values"""
+        if pheromone_backend not in PHEROMONE_BACKENDS:
+            raise ValueError(f"Unknown pheromone backend: {pheromone_backend}")
+        if pheromone_backend == self.pheromone_backend:
+            return
+        self.pheromone_backend = pheromone_backend
+        self._shared_layers.difference_update(("home_pheromones", "food_pheromones"))
+
+        old_home, old_food = self.home_pheromones, self.food_pheromones
+        self.home_pheromones = self._replace_pheromone_map(old_home)
+        self.food_pheromones = self._replace_pheromone_map(old_food)
+        for (x, y), value in old_home.items():
+            self.home_pheromones.add_pheromone(x, y, value)
+        for (x, y), value in old_food.items():
+            self.food_pheromones.add_pheromone(x, y, value)
 
     def disable_pheromones(self) -> None:
         self.pheromones_enabled = False
-        self.home_pheromones = PheromoneMap(self.width, self.height)
-        self.food_pheromones = PheromoneMap(self.width, self.height)
+        self._shared_layers.difference_update(("home_pheromones", "food_pheromones"))
+        self.home_pheromones = self._replace_pheromone_map(self.home_pheromones)
+        self.food_pheromones = self._replace_pheromone_map(self.food_pheromones)
+
+    def _replace_pheromone_map(self, old: PheromoneMap) -> PheromoneMap:
+        """Empty map of the current backend, keeping the change feed of the old one"""
+        pheromones = self._create_pheromone_map()
+        pheromones.changes = old.changes
+        if pheromones.changes.active:
+            pheromones.changes.mark_all()
+        return pheromones
 
     def add_wall(self, x: int, y: int) -> None:
+        self._own("terrain")
         if self.is_valid_position(x, y):
-            self.grid[y][x] = TerrainType.WALL.value
+            self.cells[self.cell_index(x, y)] = TerrainType.WALL.value
+            if self.terrain_changes.active:
+                self.terrain_changes.add((x, y))
 
     def add_food(self, x: int, y: int, amount: int = 1) -> None:
-        if self.is_valid_position(x, y) and self.grid[y][x] == TerrainType.EMPTY.value:
-            self.grid[y][x] = TerrainType.FOOD.value
-            self.food_amounts[y][x] += amount
+        if not self.is_valid_position(x, y):
+            return
+        self._own("terrain")
+        index = self.cell_index(x, y)
+        if self.cells[index] == TerrainType.EMPTY.value:
+            self.cells[index] = TerrainType.FOOD.value
+            self.food_cells[index] += amount
             self.food_positions.add((x, y))
             self.initial_food_amount += amount
+            if self.terrain_changes.active:
+                self.terrain_changes.add((x, y))
+
+    def add_wall_area(self, x: int, y: int, width: int, height: int) -> None:
+        """Turn the cells of a rectangle into walls, clipped to the map"""
+        area = self._clip_area(x, y, width, height)
+        if area is None:
+            return
+        self._own("terrain")
+        x0, y0, x1, y1 = area
+        self._record_terrain_area(x0, y0, x1, y1)
+        row = bytes([TerrainType.WALL.value]) * (x1 - x0)
+        for row_y in range(y0, y1):
+            start = self.cell_index(x0, row_y)
+            self.cells[start : start + len(row)] = row
 
     def add_food_area(
         self, x: int, y: int, width: int, height: int, amount: int = 1
     ) -> None:
-        for i in range(width):
-            for j in range(height):
-                self.add_food(x + i, y + j, amount)
+        """add_food on each cell of a rectangle, clipped to the map"""
+        area = self._clip_area(x, y, width, height)
+        if area is None:
+            return
+        self._own("terrain")
+        x0, y0, x1, y1 = area
+        self._record_terrain_area(x0, y0, x1, y1)
+        count = x1 - x0
+        food_row = bytes([TerrainType.FOOD.value]) * count
+        amounts = array("i", [amount]) * count
+        for row_y in range(y0, y1):
+            start = self.cell_index(x0, row_y)
+            end = start + count
+            if self.cells.count(TerrainType.EMPTY.value, start, end) == count:
+                # Whole row empty, filled at once (empty cells hold no food)
+                self.cells[start:end] = food_row
+                self.food_cells[start:end] = amounts
+                self.food_positions.update((column, row_y) for column in range(x0, x1))
+                self.initial_food_amount += amount * count
+            else:
+                for column in range(x0, x1):
+                    self.add_food(column, row_y, amount)
+
+    def _record_terrain_area(self, x0: int, y0: int, x1: int, y1: int) -> None:
+        if self.terrain_changes.active:
+            self.terrain_changes.add_area(x0, y0, x1, y1)
+
+    def _clip_area(self, x: int, y: int, width: int, height: int):
+        """Bounds (x0, y0, x1, y1) of a rectangle within the map, None if outside"""
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + width, self.width), min(y + height, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return x0, y0, x1, y1
 
     def remove_food(self, x: int, y: int) -> bool:
-        if (
-            self.is_valid_position(x, y)
-            and self.grid[y][x] == TerrainType.FOOD.value
-            and self.food_amounts[y][x] > 0
-        ):
-            self.food_amounts[y][x] -= 1
+        if not self.is_valid_position(x, y):
+            return False
+        self._own("terrain")
+        index = self.cell_index(x, y)
+        if self.cells[index] == TerrainType.FOOD.value and self.food_cells[index] > 0:
+            self.food_cells[index] -= 1
 
-            if self.food_amounts[y][x] == 0:
-                self.grid[y][x] = TerrainType.EMPTY.value
+            if self.food_cells[index] == 0:
+                self.cells[index] = TerrainType.EMPTY.value
                 self.food_positions.discard((x, y))
+                if self.terrain_changes.active:
+                    self.terrain_changes.add((x, y))
 
             return True
 
         return False
 
     def add_colony(self, x: int, y: int) -> None:
+        self._own("terrain")
         if self.is_valid_position(x, y) and self.grid[y][x] == TerrainType.EMPTY.value:
             self.grid[y][x] = TerrainType.COLONY.value
             self.colony_positions.append((x, y))
+            self._mark_colony_zone(x, y)
+
+    def _mark_colony_zone(self, x: int, y: int) -> None:
+        radius = self._colony_radius
+        min_x, max_x = max(0, x - radius), min(self.width, x + radius + 1)
+        min_y, max_y = max(0, y - radius), min(self.height, y + radius + 1)
+        self._record_terrain_area(min_x, min_y, max_x, max_y)
+        for zone_y in range(min_y, max_y):
+            self.colony_zone[zone_y][min_x:max_x] = b"\x01" * (max_x - min_x)
+
+    @property
+    def colony_radius(self) -> int:
+        return self._colony_radius
+
+    @colony_radius.setter
+    def colony_radius(self, radius: int) -> None:
+        self._own("terrain")
+        self._colony_radius = radius
+        self._record_terrain_area(0, 0, self.width, self.height)
+        for row in self.colony_zone:
+            row[:] = bytes(self.width)
+        for x, y in self.colony_positions:
+            self._mark_colony_zone(x, y)
 
     def add_ant(self, ant) -> None:
-        self.ants.append(ant)
+        # The state of the ant moves to the population arrays of the environment
+        self._own("ants")
+        self.population.adopt(ant)
+        # Indices only grow, so appending keeps the cell list sorted
+        self.ant_cells.setdefault((int(ant.x), int(ant.y)), []).append(ant.slot)
+
+    def remove_ant(self, ant) -> None:
+        """Remove an ant of this environment
+
+        The removed ant gets a population of its own again, views on the
+        ants after it now refer to the next ant, take them again.
+        """
+        if ant.population is not self.population:
+            raise ValueError("Ant is not in this environment")
+        slot = ant.slot
+        self._own("ants")
+        AntPopulation().adopt(ant)
+        self.population.remove(slot)
+        self.rebuild_ant_index()
+
+    def rebuild_ant_index(self) -> None:
+        """Rebuild the occupancy index, needed if ants were moved outside execute_action"""
+        self._own("ants")
+        self.ant_cells = {}
+        for index, (x, y) in enumerate(zip(self.population.x, self.population.y)):
+            self.ant_cells.setdefault((x, y), []).append(index)
+
+    def _move_in_ant_index(self, ant, old_cell, new_cell) -> None:
+        if ant.population is not self.population:
+            return  # Ant not managed by this environment
+        self._move_occupant(ant.slot, old_cell, new_cell)
+
+    def _move_occupant(self, index: int, old_cell, new_cell) -> None:
+        occupants = self.ant_cells[old_cell]
+        occupants.remove(index)
+        if not occupants:
+            del self.ant_cells[old_cell]
+        bisect.insort(self.ant_cells.setdefault(new_cell, []), index)
 
     def is_valid_position(self, x: int, y: int) -> bool:
         return 0 <= x < self.width and 0 <= y < self.height
 
     def is_walkable(self, x: int, y: int) -> bool:
         return (
-            self.is_valid_position(x, y) and self.grid[y][x] != TerrainType.WALL.value
+            self.is_valid_position(x, y)
+            and self.cells[self.cell_index(x, y)] != TerrainType.WALL.value
         )
 
     def get_terrain(self, x: int, y: int) -> Optional[TerrainType]:
-        if self.is_valid_position(x, y):
-            # Check if the position is within the colony radius
-            for colony_x, colony_y in self.colony_positions:
-                # Check if the position is within the colony radius
-                if (
-                    abs(x - colony_x) <= self.colony_radius
-                    and abs(y - colony_y) <= self.colony_radius
-                ):
-                    if self.grid[y][x] == TerrainType.FOOD.value:
-                        return TerrainType.FOOD
-                    elif self.grid[y][x] == TerrainType.WALL.value:
-                        return TerrainType.WALL
-                    return TerrainType.COLONY
-
-            # If not in colony radius, return the actual terrain
-            return TerrainType(self.grid[y][x])
+        if 0 <= x < self.width and 0 <= y < self.height:
+            index = (y + self.border) * self.stride + x + self.border
+            # Within a colony radius, empty cells are reported as COLONY while
+            # food and walls keep their own type
+            return TERRAIN_BY_ZONE[self.zone_cells[index]][self.cells[index]]
         return None
 
+    def _get_vision_table(self, ant: Ant):
+        """Vision offsets of get_vision_offsets with their index offsets in the grid buffers"""
+        population, slot = ant.population, ant.slot
+        key = (
+            DIRECTIONS[population.direction[slot]],
+            population.vision_range[slot],
+            population.vision_angle[slot],
+        )
+        table = self._vision_tables.get(key)
+        if table is None:
+            self.ensure_border(key[1])
+            stride = self.stride
+            table = tuple(
+                (dx, dy, dy * stride + dx, tuple(ly * stride + lx for lx, ly in line_of_sight))
+                for dx, dy, line_of_sight in get_vision_offsets(*key)
+            )
+            self._vision_tables[key] = table
+        return table
+
+    def enable_profiling(self):
+        """Start timing the phases of update(), returns the PhaseProfiler"""
+        from profiling import PhaseProfiler
+
+        if self.profiler is None:
+            self.profiler = PhaseProfiler()
+        return self.profiler
+
+    def disable_profiling(self) -> None:
+        """Stop timing update(), also removes the decision budget"""
+        self.profiler = None
+        self.decision_budget = None
+
+    def set_decision_budget(
+        self, per_decision: float = 0.0, per_step: float = 0.0, fallback=None
+    ):
+        """Limit the time strategies spend deciding, in seconds (0 for no limit)
+
+        Decisions over budget are replaced by the decision of the fallback
+        AntStrategy, or by AntAction.NO_ACTION (see DecisionBudget in
+        profiling.py). Enables profiling, returns the DecisionBudget.
+        """
+        from profiling import DecisionBudget
+
+        self.decision_budget = DecisionBudget(per_decision, per_step, fallback)
+        self.enable_profiling()
+        return self.decision_budget
+
     def update(self) -> None:
+        if self._shared_layers:
+            self._own_step_layers()
+        if self.profiler is not None:
+            self._update_profiled(self.profiler)
+            return
+
         if self.pheromones_enabled:
             self.home_pheromones.evaporate()
             self.food_pheromones.evaporate()
-        for ant in self.ants:
-            perception = self.get_perception_for_ant(ant)
-            action = ant.decide_action(perception)
-            self.execute_action(ant, action)
 
-        self.steps += 1
-
-    def get_perception_for_ant(self, ant: Ant) -> AntPerception:
-
-        perception = AntPerception()
-        perception.has_food = ant.has_food
-        perception.direction = ant.direction
-        perception.home_pheromone_level = ant.home_pheromone
-        perception.food_pheromone_level = ant.food_pheromone
-        perception.pheromone_decrease_rate = ant.pheromone_decrease_rate
-        perception.food_collected = ant.food_collected
-        perception.steps_taken = ant.steps_taken
-        perception.ant_id = ant.id
-
-        current_terrain = self.get_terrain(int(ant.x), int(ant.y))
-        if current_terrain is not None:
-            perception.visible_cells[(0, 0)] = current_terrain
-
-        for dx in range(-ant.vision_range, ant.vision_range + 1):
-            for dy in range(-ant.vision_range, ant.vision_range + 1):
-                if dx == 0 and dy == 0:
-                    continue
+        action_codes = self._decide_batch_actions()
+        if action_codes is None:
+            for ant in self.ants:
+                perception = self.get_perception_for_ant(ant)
+                action = ant.decide_action(perception)
+                self.execute_action(ant, action)
+        elif (action_codes >= 0).all():
+            # Every ant uses a batch strategy, apply the whole step at once
+            self.execute_actions(action_codes)
+        else:
+            for ant, code in zip(self.ants, action_codes.tolist()):
+                if code >= 0:
+                    action = ANT_ACTIONS[code]
+                else:
+                    perception = self.get_perception_for_ant(ant)
+                    action = ant.decide_action(perception)
+                self.execute_action(ant, action)
 
-                check_x = int(ant.x + dx)
-                check_y = int(ant.y + dy)
+        self.steps += 1
 
-                # Check if the point is within the ant's vision field based on distance and angle
+    def _update_profiled(self, profiler) -> None:
+        """update() timing each phase and enforcing the decision budget, see profiling.py"""
+        step_start = perf_counter()
+        budget = self.decision_budget
+        if budget is not None:
+            budget.start_step()
+        if self.pheromones_enabled:
+            self.home_pheromones.evaporate()
+            self.food_pheromones.evaporate()
+        profiler.add("evaporation", perf_counter() - step_start)
+
+        action_codes = self._decide_batch_actions(profiler)
+        if action_codes is not None and (action_codes >= 0).all():
+            start = perf_counter()
+            self.execute_actions(action_codes)
+            profiler.add("execution", perf_counter() - start, len(action_codes))
+        else:
+            population = self.population
+            strategy_names = [type(strategy).__name__ for strategy in population.strategies]
+            codes = [-1] * len(population) if action_codes is None else action_codes.tolist()
+            perception_time = decision_time = execution_time = 0.0
+            decisions = 0
+            for ant, code in zip(self.ants, codes):
+                start = perf_counter()
+                if code >= 0:
+                    action = ANT_ACTIONS[code]
+                else:
+                    perception = self.get_perception_for_ant(ant)
+                    perceived = perf_counter()
+                    name = strategy_names[population.strategy_index[ant.slot]]
+                    if budget is not None and budget.step_exhausted():
+                        # No time left in this step, the strategy is not called
+                        population.steps_taken[ant.slot] += 1
+                        action = budget.substitute(name, perception, skipped=True)
+                    else:
+                        action = ant.decide_action(perception)
+                        elapsed = perf_counter() - perceived
+                        profiler.add_strategy(name, elapsed)
+                        if budget is not None and budget.over_budget(elapsed):
+                            action = budget.substitute(name, perception)
+                    decided = perf_counter()
+                    perception_time += perceived - start
+                    decision_time += decided - perceived
+                    decisions += 1
+                    start = decided
+                self.execute_action(ant, action)
+                execution_time += perf_counter() - start
+            profiler.add("perception", perception_time, decisions)
+            profiler.add("decision", decision_time, decisions)
+            profiler.add("execution", execution_time, len(codes))
 
-                # Calculate distance
-                distance = math.sqrt(dx * dx + dy * dy)
+        self.steps += 1
+        if budget is not None:
+            budget.end_step()
+        profiler.add_step(perf_counter() - step_start)
 
-                # If point is too far, it's not in vision field
-                if distance > ant.vision_range:
-                    continue
+    def _decide_batch_actions(self, profiler=None):
+        """Let every BatchAntStrategy decide for all its ants at once
 
-                # Get ant's direction vector
-                dir_dx, dir_dy = Direction.get_delta(ant.direction)
+        Returns an array with the AntAction value chosen for each ant using a
+        batch strategy and -1 for the others, or None if no ant uses one.
+        Batch decisions are all based on the state at the start of the step.
+        """
+        population = self.population
+        batch_strategies = [
+            (strategy_index, strategy)
+            for strategy_index, strategy in enumerate(population.strategies)
+            if isinstance(strategy, BatchAntStrategy)
+        ]
+        if not batch_strategies:
+            return None
 
-                # Calculate angle between ant's direction and point
-                # First normalize vectors
-                if distance > 0:
-                    point_dx, point_dy = dx / distance, dy / distance
+        import numpy as np
+
+        from batch import population_arrays, to_action_codes
+
+        strategy_indices = np.frombuffer(population.strategy_index, dtype=np.uint16)
+        batch = None
+        action_codes = np.full(len(population), -1, dtype=np.int64)
+        for strategy_index, strategy in batch_strategies:
+            indices = np.flatnonzero(strategy_indices == strategy_index)
+            if not len(indices):
+                continue
+            if batch is None:
+                start = perf_counter()
+                batch = self.perceive_all()
+                if profiler is not None:
+                    profiler.add("perception", perf_counter() - start, len(population))
+            start = perf_counter()
+            name = type(strategy).__name__
+            budget = self.decision_budget if profiler is not None else None
+            if budget is not None and budget.step_exhausted():
+                action_codes[indices] = self._substitute_batch(budget, name, indices, True)
+            else:
+                if len(indices) == len(population):
+                    strategy_batch = batch
                 else:
-                    # If distance is 0, point is at ant's position (already handled with continue above)
-                    continue
+                    strategy_batch = batch.select(indices)
+                action_codes[indices] = to_action_codes(
+                    strategy.decide_actions(strategy_batch)
+                )
+                if profiler is not None:
+                    elapsed = perf_counter() - start
+                    profiler.add_strategy(name, elapsed, len(indices))
+                    if budget is not None and budget.over_budget(elapsed, len(indices)):
+                        action_codes[indices] = self._substitute_batch(budget, name, indices)
+            if profiler is not None:
+                profiler.add("decision", perf_counter() - start, len(indices))
+            population_arrays(population)["steps_taken"][indices] += 1
+        if batch is None:
+            return None
+        return action_codes
 
-                dir_magnitude = math.sqrt(dir_dx * dir_dx + dir_dy * dir_dy)
-                if dir_magnitude > 0:
-                    dir_dx, dir_dy = dir_dx / dir_magnitude, dir_dy / dir_magnitude
+    def _substitute_batch(self, budget, name: str, indices, skipped: bool = False):
+        """Action codes replacing the batch decisions of the ants at indices"""
+        return [
+            budget.substitute(name, self.get_perception_for_ant(self.ants[index]), skipped).value
+            for index in indices.tolist()
+        ]
 
-                # Calculate dot product
-                dot_product = dir_dx * point_dx + dir_dy * point_dy
+    def set_seed(self, seed: Optional[int] = None) -> None:
+        """Seed the random generators of the environment
 
-                # Clamp to valid range for acos
-                dot_product = max(-1.0, min(1.0, dot_product))
+        self.rng is for the environment itself. Ants get their own streams
+        through their perception (see rng.py), which only depend on the
+        seed, the ant and the step. Without seed, one is drawn from the
+        random module, so random.seed() still makes runs reproducible.
+        """
+        if seed is None:
+            seed = random.getrandbits(63)
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    def ant_random_key(self, ant) -> int:
+        """Key telling apart the random streams of the ants, see rng.py"""
+        ant_id = ant.population.id[ant.slot]
+        if ant_id == NO_ID:
+            # Ants without id are told apart by their index
+            return (1 << 63) | ant.slot
+        return ant_id
+
+    def perceive_all(self):
+        """Build the perception of every ant at once as a PerceptionBatch
+
+        All perceptions are taken from the current state, while update()
+        lets each ant see the moves of the ants before it. Requires numpy.
+        """
+        from batch import build_perception_batch
 
-                # Calculate angle in degrees
-                angle = math.degrees(math.acos(dot_product))
+        return build_perception_batch(self)
 
-                # Check if angle is within vision field
-                half_vision_angle = ant.vision_angle / 2
-                if angle > half_vision_angle:
-                    continue
+    def get_perception_for_ant(self, ant: Ant) -> AntPerception:
 
-                is_blocked = False
-
-                # Simple line-of-sight check
-                if (
-                    abs(dx) > 1 or abs(dy) > 1
-                ):  # Skip line-of-sight check for adjacent cells (they're always visible)
-                    # Calculate steps for line-of-sight check
-                    steps = max(abs(dx), abs(dy))
-                    step_x = dx / steps
-                    step_y = dy / steps
-
-                    # Check each step along the line of sight
-                    for step in range(1, steps):
-                        check_step_x = int(ant.x + step * step_x)
-                        check_step_y = int(ant.y + step * step_y)
-
-                        if (
-                            self.is_valid_position(check_step_x, check_step_y)
-                            and self.grid[check_step_y][check_step_x]
-                            == TerrainType.WALL.value
-                        ):
-                            is_blocked = True
-                            break
-
-                if is_blocked:
-                    continue
+        perception = AntPerception()
+        # Read the state straight from the population arrays
+        population, slot = ant.population, ant.slot
+        perception.has_food = bool(population.has_food[slot])
+        perception.direction = DIRECTIONS[population.direction[slot]]
+        perception.home_pheromone_level = population.home_pheromone[slot]
+        perception.food_pheromone_level = population.food_pheromone[slot]
+        perception.pheromone_decrease_rate = population.pheromone_decrease_rate[slot]
+        perception.food_collected = population.food_collected[slot]
+        perception.steps_taken = population.steps_taken[slot]
+        perception.ant_id = ant.id
+        perception.rng = AntRandom(self.seed, self.ant_random_key(ant), self.steps)
+
+        # Ants always stand inside the map, so the whole vision cone lies in
+        # the grid buffers and out-of-map cells read as OUTSIDE
+        vision_table = self._get_vision_table(ant)
+        x, y = population.x[slot], population.y[slot]
+        cells = self.cells
+        index = self.cell_index(x, y)
+        perception.visible_cells[(0, 0)] = TERRAIN_BY_ZONE[self.zone_cells[index]][
+            cells[index]
+        ]
+
+        wall = TerrainType.WALL.value
+        ants_have_food = self.population.has_food
+        ant_cells = self.ant_cells
+        own_index = slot if population is self.population else -1
+
+        for dx, dy, offset, line_of_sight in vision_table:
+            terrain = cells[index + offset]
+            if terrain == OUTSIDE:
+                continue
+
+            # Simple line-of-sight check
+            is_blocked = False
+            for los_offset in line_of_sight:
+                if cells[index + los_offset] == wall:
+                    is_blocked = True
+                    break
+            if is_blocked:
+                continue
+
+            # Convert integer value to TerrainType enum for consistency
+            perception.visible_cells[(dx, dy)] = TERRAIN_TYPES[terrain]
+            check_x = x + dx
+            check_y = y + dy
+
+            # Also add pheromone information
+            perception.food_pheromone[(dx, dy)] = self.food_pheromones.get_value(
+                check_x, check_y
+            )
+            perception.home_pheromone[(dx, dy)] = self.home_pheromones.get_value(
+                check_x, check_y
+            )
+
+            # Check for other ants, the first one in self.ants order is reported
+            occupants = ant_cells.get((check_x, check_y))
+            if occupants:
+                for ant_index in occupants:
+                    if ant_index != own_index:
+                        perception.nearby_ants.append(
+                            ((dx, dy), bool(ants_have_food[ant_index]))
+                        )
+                        break
+        return perception
 
-                # If valid position and not blocked, add to visible cells
-                if self.is_valid_position(check_x, check_y):
-                    terrain = self.grid[check_y][check_x]
-                    # Convert integer value to TerrainType enum for consistency
-                    perception.visible_cells[(dx, dy)] = TerrainType(terrain)
+    def execute_actions(self, actions):
+        """Apply one action per ant, in the order of self.ants, with array operations
 
-                    # Also add pheromone information
-                    perception.food_pheromone[(dx, dy)] = (
-                        self.food_pheromones.get_value(check_x, check_y)
-                    )
-                    perception.home_pheromone[(dx, dy)] = (
-                        self.home_pheromones.get_value(check_x, check_y)
-                    )
+        actions holds AntAction members or their integer values. The result
+        is the same as calling execute_action for each ant in turn, and the
+        returned boolean array holds what execute_action would have returned.
+        Requires numpy.
+        """
+        from batch import apply_actions, to_action_codes
 
-                    # Check for other ants
-                    for other_ant in self.ants:
-                        if (
-                            other_ant != ant
-                            and int(other_ant.x) == check_x
-                            and int(other_ant.y) == check_y
-                        ):
-                            perception.nearby_ants.append(
-                                ((dx, dy), other_ant.has_food)
-                            )
-                            break
-        return perception
+        return apply_actions(self, to_action_codes(actions))
 
     def execute_action(self, ant: "Ant", action: "AntAction") -> bool:
-        if action == AntAction.MOVE_FORWARD:
-            dx, dy = Direction.get_delta(ant.direction)
-            new_x, new_y = ant.x + dx, ant.y + dy
+        if self._shared_layers and not self._shared_layers <= TERRAIN_LAYER:
+            # Ants or pheromones shared with a fork, the view must follow the copy
+            shared_population = ant.population is self.population
+            self._own_step_layers()
+            if shared_population:
+                ant = self.population[ant.slot]
+        population, slot = ant.population, ant.slot
+        x, y = population.x[slot], population.y[slot]
 
-            success = self.is_walkable(int(new_x), int(new_y))
+        if action == AntAction.MOVE_FORWARD:
+            dx, dy = Direction.get_delta(population.direction[slot])
+            # The border of the grid buffers blocks moves out of the map
+            terrain = self.cells[self.cell_index(x + dx, y + dy)]
+            success = terrain != TerrainType.WALL.value and terrain != OUTSIDE
             ant.move_forward(success)
+            if success:
+                self._move_in_ant_index(ant, (x, y), (x + dx, y + dy))
             return success
 
         elif action == AntAction.TURN_LEFT:
@@ -323,15 +1155,15 @@ class Environment:
         elif action == AntAction.PICK_UP_FOOD:
             if (
                 not ant.has_food
-                and self.get_terrain(int(ant.x), int(ant.y)) == TerrainType.FOOD
+                and self.get_terrain(x, y) == TerrainType.FOOD
             ):
-                success = self.remove_food(int(ant.x), int(ant.y))
+                success = self.remove_food(x, y)
                 ant.pick_up_food(success)
 
                 # NOTE: Automatic pheromone deposition could be implemented here like this:
                 # if success:
                 #    amount = ant.deposit_pheromone()
-                #    self.food_pheromones.add_pheromone(int(ant.x), int(ant.y), amount)
+                #    self.food_pheromones.add_pheromone(x, y, amount)
                 # This would automatically deposit food pheromones whenever an ant picks up food,
                 # without requiring the strategy to explicitly choose the DEPOSIT_FOOD_PHEROMONE action.
 
@@ -343,14 +1175,14 @@ class Environment:
         elif action == AntAction.DROP_FOOD:
             if (
                 ant.has_food
-                and self.get_terrain(int(ant.x), int(ant.y)) == TerrainType.COLONY
+                and self.get_terrain(x, y) == TerrainType.COLONY
             ):
                 self.food_collected += 1
                 ant.drop_food(True)
 
                 # NOTE: Similar automatic pheromone deposition could be implemented here:
                 # amount = ant.deposit_pheromone()
-                # self.home_pheromones.add_pheromone(int(ant.x), int(ant.y), amount)
+                # self.home_pheromones.add_pheromone(x, y, amount)
 
                 return True
             else:
@@ -360,14 +1192,14 @@ class Environment:
         elif action == AntAction.DEPOSIT_HOME_PHEROMONE:
             if self.pheromones_enabled:
                 amount = ant.deposit_pheromone()
-                self.home_pheromones.add_pheromone(int(ant.x), int(ant.y), amount)
+                self.home_pheromones.add_pheromone(x, y, amount)
                 return True
             return False
 
         elif action == AntAction.DEPOSIT_FOOD_PHEROMONE:
             if self.pheromones_enabled:
                 amount = ant.deposit_pheromone()
-                self.food_pheromones.add_pheromone(int(ant.x), int(ant.y), amount)
+                self.food_pheromones.add_pheromone(x, y, amount)
                 return True
             return False
 
@@ -388,6 +1220,13 @@ class Environment:
         return self.food_collected / self.initial_food_amount * 100.0
 
 
+# Version of the environment file parser, part of the cache key of compiled
+# files (see load_cached_environment). Bump it when parse_file builds a
+# different environment from the same text.
+# 2: WALL_RECT, WALL_RUN and FOOD_RECT sections
+PARSER_VERSION = 2
+
+
 # Environment Builder to create different scenarios
 class EnvironmentBuilder:
     @staticmethod
@@ -442,8 +1281,10 @@ class EnvironmentBuilder:
         return env
 
     @staticmethod
-    def create_maze(width: int, height: int) -> Environment:
-        env = Environment(width, height)
+    def create_maze(width: int, height: int, seed: Optional[int] = None) -> Environment:
+        # The layout is drawn from the seed when there is one
+        rng = random if seed is None else random.Random(seed)
+        env = Environment(width, height, seed=seed)
 
         center_x, center_y = width // 2, height // 2
         env.add_colony(center_x, center_y)
@@ -451,11 +1292,11 @@ class EnvironmentBuilder:
         cell_size = 20
         for x in range(0, width, cell_size):
             for y in range(0, height, cell_size):
-                if random.random() < 0.3 and (
+                if rng.random() < 0.3 and (
                     abs(x - center_x) > cell_size or abs(y - center_y) > cell_size
                 ):
-                    wall_len = random.randint(5, cell_size - 2)
-                    if random.random() < 0.5:
+                    wall_len = rng.randint(5, cell_size - 2)
+                    if rng.random() < 0.5:
                         for i in range(wall_len):
                             if x + i < width:
                                 env.add_wall(x + i, y)
@@ -466,8 +1307,8 @@ class EnvironmentBuilder:
 
         for _ in range(5):
             while True:
-                fx = random.randint(0, width - 6)
-                fy = random.randint(0, height - 6)
+                fx = rng.randint(0, width - 6)
+                fy = rng.randint(0, height - 6)
 
                 if math.sqrt((fx - center_x) ** 2 + (fy - center_y) ** 2) > width // 4:
                     env.add_food_area(fx, fy, 5, 5)
@@ -476,13 +1317,22 @@ class EnvironmentBuilder:
         return env
 
     @staticmethod
-    def load_from_file(filename: str, verbose: bool = True) -> Optional[Environment]:
+    def load_from_file(
+        filename: str, verbose: bool = True, use_cache: bool = True
+    ) -> Optional[Environment]:
         """Load environment configuration from file
 
+        Each file is compiled once into a binary cache (see load_cached_environment
+        in checkpoint.py) keyed by a hash of its content, later loads of the
+        same content read the cache instead of parsing the text.
+
         The file format supports the following sections:
         - DIMENSIONS: width height
         - WALL: x y (for adding wall/obstacle positions)
+        - WALL_RECT: x y width height (for filling a rectangle with walls)
+        - WALL_RUN: y x_start x_end (for a horizontal run of walls, both ends included)
         - FOOD: x y [amount] (for adding food with optional specific amounts)
+        - FOOD_RECT: x y width height [amount] (for food on each cell of a rectangle)
         - COLONY: x y (for adding colony positions)
         - ANTS: count (for specifying the number of ants to create)
         - TIME_LIMIT: seconds (for specifying simulation time limit in seconds)
@@ -495,9 +1345,15 @@ class EnvironmentBuilder:
         10 10
         10 11
         10 12
+        WALL_RECT:
+        30 40 10 5
+        WALL_RUN:
+        60 20 35
         FOOD:
         50 30 5
         70 80 10
+        FOOD_RECT:
+        80 10 4 4 3
         COLONY:
         10 20
         ANTS:
@@ -509,102 +1365,142 @@ class EnvironmentBuilder:
         ```
         """
         try:
-            with open(filename, "r") as f:
-                lines = f.readlines()
-
-                width, height = 100, 100
-                env = None
-                current_section = None
-                ant_count = 0
-                time_limit = 0  # Default: no time limit
-                max_steps = 0  # Default: no step limit
-
-                for line in lines:
-                    line = line.strip()
-                    if not line or line.startswith("#"):
-                        continue
-
-                    if line.endswith(":"):
-                        current_section = line[:-1].upper()
-                        continue
-
-                    if current_section == "DIMENSIONS":
-                        width, height = map(int, line.split())
-                        if verbose:
-                            print(
-                                f"Loading environment with dimensions: {width}x{height}"
-                            )
-                        env = Environment(width, height)
-                    elif current_section == "WALL" and env is not None:
-                        parts = line.split()
-                        if len(parts) >= 2:
-                            x, y = int(parts[0]), int(parts[1])
-                            if env.is_valid_position(x, y):
-                                env.add_wall(x, y)
-                    elif current_section == "FOOD" and env is not None:
-                        parts = line.split()
-                        if len(parts) >= 3:
-                            x, y = int(parts[0]), int(parts[1])
-                            amount = int(parts[2])
-                            if env.is_valid_position(x, y):
-                                env.add_food(x, y, amount)
-                        elif len(parts) >= 2:
-                            x, y = int(parts[0]), int(parts[1])
-                            if env.is_valid_position(x, y):
-                                env.add_food(x, y)
-                    elif current_section == "COLONY" and env is not None:
-                        parts = line.split()
-                        if len(parts) >= 2:
-                            x, y = int(parts[0]), int(parts[1])
-                            if env.is_valid_position(x, y):
-                                env.add_colony(x, y)
-                    elif current_section == "ANTS" and env is not None:
-                        try:
-                            ant_count = int(line.strip())
-                            if verbose:
-                                print(f"Loading environment with {ant_count} ants")
-                        except ValueError:
-                            if verbose:
-                                print(f"Invalid ant count: {line}")
-                    elif current_section == "TIME_LIMIT":
-                        try:
-                            time_limit = int(line.strip())
-                            if verbose:
-                                print(f"Environment time limit: {time_limit} seconds")
-                        except ValueError:
-                            if verbose:
-                                print(f"Invalid time limit: {line}")
-                    elif current_section == "MAX_STEPS":
-                        try:
-                            max_steps = int(line.strip())
-                            if verbose:
-                                print(f"Environment max steps: {max_steps}")
-                        except ValueError:
-                            if verbose:
-                                print(f"Invalid max steps: {line}")
-
-                if env is None:
-                    env = Environment(width, height)
+            if use_cache:
+                from checkpoint import load_cached_environment
+
+                return load_cached_environment(
+                    filename,
+                    EnvironmentBuilder.parse_file,
+                    verbose=verbose,
+                    parser_version=PARSER_VERSION,
+                )
+            return EnvironmentBuilder.parse_file(filename, verbose)
+        except Exception as e:
+            if verbose:
+                print(f"Error loading environment from file: {e}")
+            return None
+
+    @staticmethod
+    def parse_file(filename: str, verbose: bool = True) -> Environment:
+        """Build the environment described by a text file, see load_from_file
+
+        The warnings printed in verbose mode are kept in env.parse_warnings,
+        so that loads from the cache can print them again.
+        """
+        with open(filename, "r") as f:
+            lines = f.readlines()
+
+            warnings = []
+            width, height = 100, 100
+            env = None
+            current_section = None
+            ant_count = 0
+            time_limit = 0  # Default: no time limit
+            max_steps = 0  # Default: no step limit
+
+            for line in lines:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+
+                if line.endswith(":"):
+                    current_section = line[:-1].upper()
+                    continue
 
-                if not env.colony_positions:
+                if current_section == "DIMENSIONS":
+                    width, height = map(int, line.split())
                     if verbose:
                         print(
-                            "Warning: No colony positions defined in environment file. Adding one at center."
+                            f"Loading environment with dimensions: {width}x{height}"
                         )
-                    env.add_colony(env.width // 2, env.height // 2)
+                    env = Environment(width, height)
+                elif current_section == "WALL" and env is not None:
+                    parts = line.split()
+                    if len(parts) >= 2:
+                        x, y = int(parts[0]), int(parts[1])
+                        if env.is_valid_position(x, y):
+                            env.add_wall(x, y)
+                elif current_section == "WALL_RECT" and env is not None:
+                    parts = line.split()
+                    if len(parts) >= 4:
+                        x, y, w, h = map(int, parts[:4])
+                        env.add_wall_area(x, y, w, h)
+                elif current_section == "WALL_RUN" and env is not None:
+                    parts = line.split()
+                    if len(parts) >= 3:
+                        y, x0, x1 = map(int, parts[:3])
+                        env.add_wall_area(x0, y, x1 - x0 + 1, 1)
+                elif current_section == "FOOD_RECT" and env is not None:
+                    parts = line.split()
+                    if len(parts) >= 4:
+                        x, y, w, h = map(int, parts[:4])
+                        amount = int(parts[4]) if len(parts) >= 5 else 1
+                        env.add_food_area(x, y, w, h, amount)
+                elif current_section == "FOOD" and env is not None:
+                    parts = line.split()
+                    if len(parts) >= 3:
+                        x, y = int(parts[0]), int(parts[1])
+                        amount = int(parts[2])
+                        if env.is_valid_position(x, y):
+                            env.add_food(x, y, amount)
+                    elif len(parts) >= 2:
+                        x, y = int(parts[0]), int(parts[1])
+                        if env.is_valid_position(x, y):
+                            env.add_food(x, y)
+                elif current_section == "COLONY" and env is not None:
+                    parts = line.split()
+                    if len(parts) >= 2:
+                        x, y = int(parts[0]), int(parts[1])
+                        if env.is_valid_position(x, y):
+                            env.add_colony(x, y)
+                elif current_section == "ANTS" and env is not None:
+                    try:
+                        ant_count = int(line.strip())
+                        if verbose:
+                            print(f"Loading environment with {ant_count} ants")
+                    except ValueError:
+                        warnings.append(f"Invalid ant count: {line}")
+                        if verbose:
+                            print(warnings[-1])
+                elif current_section == "TIME_LIMIT":
+                    try:
+                        time_limit = int(line.strip())
+                        if verbose:
+                            print(f"Environment time limit: {time_limit} seconds")
+                    except ValueError:
+                        warnings.append(f"Invalid time limit: {line}")
+                        if verbose:
+                            print(warnings[-1])
+                elif current_section == "MAX_STEPS":
+                    try:
+                        max_steps = int(line.strip())
+                        if verbose:
+                            print(f"Environment max steps: {max_steps}")
+                    except ValueError:
+                        warnings.append(f"Invalid max steps: {line}")
+                        if verbose:
+                            print(warnings[-1])
 
-                # Store the ant count as an attribute of the environment for later use
-                env.requested_ant_count = ant_count
+            if env is None:
+                env = Environment(width, height)
 
-                # Store time limit and max steps as environment attributes
-                env.time_limit = time_limit
-                env.max_steps = max_steps
+            if not env.colony_positions:
+                warnings.append(
+                    "Warning: No colony positions defined in environment file. Adding one at center."
+                )
+                if verbose:
+                    print(warnings[-1])
+                env.add_colony(env.width // 2, env.height // 2)
 
-                return env
-        except Exception as e:
-            if verbose:
-                print(f"Error loading environment from file: {e}")
-            return None
+            # Store the ant count as an attribute of the environment for later use
+            env.requested_ant_count = ant_count
+
+            # Store time limit and max steps as environment attributes
+            env.time_limit = time_limit
+            env.max_steps = max_steps
+            env.parse_warnings = warnings
+
+            return env
 
     @staticmethod
     def save_to_file(env: Environment, filename: str) -> bool:
@@ -618,24 +1514,15 @@ class EnvironmentBuilder:
                         f.write(f"{x} {y}\n")
                     f.write("\n")
 
-                if env.food_positions:
-                    f.write("FOOD:\n")
-                    for x, y in env.food_positions:
-                        amount = env.food_amounts[y][x]
-                        f.write(f"{x} {y} {amount}\n")
-                    f.write("\n")
-
-                walls = []
-                for y in range(env.height):
-                    for x in range(env.width):
-                        if env.grid[y][x] == TerrainType.WALL.value:
-                            walls.append((x, y))
-
-                if walls:
-                    f.write("WALL:\n")
-                    for x, y in walls:
-                        f.write(f"{x} {y}\n")
-                    f.write("\n")
+                # Cells are merged into rectangles: rows of identical cells,
+                # then rows of identical runs. Single cells keep the
+                # one-cell-per-line sections.
+                food_areas = EnvironmentBuilder._find_areas(env, TerrainType.FOOD.value)
+                EnvironmentBuilder._write_areas(f, food_areas, "FOOD", "FOOD_RECT")
+                wall_areas = EnvironmentBuilder._find_areas(env, TerrainType.WALL.value)
+                EnvironmentBuilder._write_areas(
+                    f, wall_areas, "WALL", "WALL_RECT", run_section="WALL_RUN"
+                )
 
                 # Write the number of ants
                 f.write("ANTS:\n")
@@ -655,3 +1542,69 @@ class EnvironmentBuilder:
         except Exception as e:
             print(f"Error saving environment to file: {e}")
             return False
+
+    @staticmethod
+    def _find_areas(env: Environment, terrain: int) -> list:
+        """Cover the cells of the given terrain type with rectangles
+
+        Returns (x, y, width, height, food amount) tuples, a rectangle only
+        holding cells with the same food amount. Horizontal runs are found
+        in each row and stacked with the identical runs of the rows below.
+        """
+        pattern = re.compile(re.escape(bytes([terrain])) + b"+")
+        areas = []
+        open_areas = {}  # {(x, width, amount): index in areas, for runs of the previous row}
+        for y in range(env.height):
+            start = env.cell_index(0, y)
+            row = bytes(env.cells[start : start + env.width])
+            row_areas = {}
+            for match in pattern.finditer(row):
+                # Split the run where the food amount changes
+                amounts = env.food_cells[start + match.start() : start + match.end()]
+                x = match.start()
+                for amount, group in itertools.groupby(amounts):
+                    width = len(list(group))
+                    key = (x, width, amount)
+                    index = open_areas.get(key)
+                    if index is None:
+                        index = len(areas)
+                        areas.append([x, y, width, 0, amount])
+                    areas[index][3] += 1
+                    row_areas[key] = index
+                    x += width
+            open_areas = row_areas
+        return [tuple(area) for area in areas]
+
+    @staticmethod
+    def _write_areas(
+        f, areas: list, cell_section: str, rect_section: str, run_section=None
+    ) -> None:
+        """Write the areas of _find_areas to the sections of their shape
+
+        Single cells go to cell_section, one-row runs to run_section if
+        given, and the other areas to rect_section.
+        """
+        with_amount = cell_section == "FOOD"
+        cells, runs, rects = [], [], []
+        for area in areas:
+            if area[2] == area[3] == 1:
+                cells.append(area)
+            elif area[3] == 1 and run_section:
+                runs.append(area)
+            else:
+                rects.append(area)
+        if cells:
+            f.write(f"{cell_section}:\n")
+            for x, y, _, _, amount in cells:
+                f.write(f"{x} {y} {amount}\n" if with_amount else f"{x} {y}\n")
+            f.write("\n")
+        if runs:
+            f.write(f"{run_section}:\n")
+            for x, y, w, _, _ in runs:
+                f.write(f"{y} {x} {x + w - 1}\n")
+            f.write("\n")
+        if rects:
+            f.write(f"{rect_section}:\n")
+            for x, y, w, h, amount in rects:
+                f.write(f"{x} {y} {w} {h} {amount}\n" if with_amount else f"{x} {y} {w} {h}\n")
+            f.write("\n")
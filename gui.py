@@ -1,9 +1,15 @@
 import pygame
 import sys
+import threading
 import time
 import argparse
+import math
+import random
 
-from environment import Environment, TerrainType, Direction
+import numpy as np
+
+from change_feed import ChangeFeed
+from environment import Environment, TerrainType, Direction, TERRAIN_BY_ZONE
 from utils import create_environment, add_ants
 
 # Colors - using the exact same colors as in improved_ant.py
@@ -19,6 +25,90 @@ DIRT_COLOR = (DIRT_R, DIRT_G, DIRT_B)
 FOOD_COLOR = (158, 55, 17)
 HOME_R, HOME_G, HOME_B = 96, 85, 33
 FOOD_R, FOOD_G, FOOD_B = 255, 255, 255
+GRID_COLOR = (DIRT_R - 20, DIRT_G - 20, DIRT_B - 20)
+
+# Frames are composed as (height, width, 3) RGB arrays indexed [y, x] like
+# the pheromone arrays, then copied to the surface in one call through
+# pygame.surfarray, which takes them transposed to [x, y].
+
+# Blend colors as (3, 1) columns, blended channel by channel
+DIRT_CHANNELS = np.array(DIRT_COLOR, dtype=np.float64)[:, None]
+HOME_CHANNELS = np.array((HOME_R, HOME_G, HOME_B), dtype=np.float64)[:, None]
+FOOD_CHANNELS = np.array((FOOD_R, FOOD_G, FOOD_B), dtype=np.float64)[:, None]
+
+# Terrain value shown for [in colony zone][grid value], like get_terrain()
+ZONE_TERRAIN = np.zeros((2, 256), dtype=np.uint8)
+for _zone, _terrains in enumerate(TERRAIN_BY_ZONE):
+    ZONE_TERRAIN[_zone, : len(_terrains)] = [terrain.value for terrain in _terrains]
+
+# Color of each terrain value drawn over the dirt and pheromones
+TERRAIN_COLORS = np.zeros((256, 3), dtype=np.uint8)
+TERRAIN_COLORS[TerrainType.FOOD.value] = FOOD_COLOR
+TERRAIN_COLORS[TerrainType.COLONY.value] = (HOME_R, HOME_G, HOME_B)
+TERRAIN_COLORS[TerrainType.WALL.value] = GRAY
+
+# Cells covered by an ant, (dx, dy) from its position: 2x3 cells when it
+# faces a vertical or diagonal direction, 3x2 cells when it faces east or west
+ANT_SHAPES = np.array(
+    [
+        [(dx, dy) for dy in range(3) for dx in range(2)],
+        [(dx, dy) for dy in range(2) for dx in range(3)],
+    ]
+)
+# Index in ANT_SHAPES by Direction value
+ANT_SHAPE_BY_DIRECTION = np.array(
+    [abs(dx) > abs(dy) for dx, dy in map(Direction.get_delta, Direction)], dtype=np.intp
+)
+
+# Viewport moves of the arrow keys, (dx, dy)
+PAN_KEYS = {
+    pygame.K_LEFT: (-1, 0),
+    pygame.K_RIGHT: (1, 0),
+    pygame.K_UP: (0, -1),
+    pygame.K_DOWN: (0, 1),
+}
+
+# Zoom levels: screen pixels per main_surface pixel when zoomed in, and
+# blocks of cells shown as one screen pixel when zoomed out, see render_overview
+ZOOM_SCALES = (1, 2, 3, 4, 6, 8, 12, 16)
+LOD_BLOCKS = (2, 4, 8, 16, 32, 64)
+
+
+def block_reduce(layer, block: int, ufunc):
+    """Reduce each block x block cells of a 2D array with a ufunc such as np.maximum
+
+    Blocks on the right and bottom edges may be smaller. Works on strided
+    views, one pass per row and column of a block, without copying the
+    layer into blocks. Rows are reduced first, they are contiguous.
+    """
+    rows = layer[::block].copy()
+    for offset in range(1, block):
+        part = layer[offset::block]
+        target = rows[: part.shape[0]]
+        ufunc(target, part, out=target)
+    blocks = rows[:, ::block].copy()
+    for offset in range(1, block):
+        part = rows[:, offset::block]
+        target = blocks[:, : part.shape[1]]
+        ufunc(target, part, out=target)
+    return blocks
+
+
+def block_terrain(cells, zone, block: int):
+    """Terrain shown for each block x block cells of the grid values cells and zone
+
+    Food if any cell of the block has some, else the colony if any cell
+    shows it, else a wall if walls cover half of the block, else empty.
+    """
+    shown = np.zeros(((cells.shape[0] - 1) // block + 1, (cells.shape[1] - 1) // block + 1), dtype=np.uint8)
+    walls = block_reduce((cells == TerrainType.WALL.value).astype(np.uint16), block, np.add)
+    shown[walls * 2 >= block * block] = TerrainType.WALL.value
+    # Empty cells in the colony zone show the colony, like get_terrain()
+    colony = (cells == TerrainType.COLONY.value) | ((zone != 0) & (cells == TerrainType.EMPTY.value))
+    shown[block_reduce(colony, block, np.logical_or)] = TerrainType.COLONY.value
+    food = block_reduce(cells == TerrainType.FOOD.value, block, np.logical_or)
+    shown[food] = TerrainType.FOOD.value
+    return shown
 
 
 class AntSimulationGUI:
@@ -32,8 +122,17 @@ class AntSimulationGUI:
         time_limit: float = 0,  # Time limit in seconds, 0 means no limit
         verbose: bool = True,
         progress_interval: int = 100,
+        profile: bool = False,  # Show the time spent in each phase, see profiling.py
+        steps_per_frame: int = 1,  # Simulation steps run at each update
+        turbo: bool = False,  # Run the simulation at full speed, see SimulationThread
+        view_size: tuple = (1024, 768),  # Maximum size of the map area of the window
     ):
         self.environment = environment
+        # Environment drawn: the environment itself, or in turbo mode the
+        # last snapshot of the simulation thread
+        self.view = environment
+        if profile:
+            environment.enable_profiling()
         self.cell_size = cell_size
         self.fps = fps
         self.scale_factor = scale_factor
@@ -49,22 +148,62 @@ class AntSimulationGUI:
         self.verbose = verbose
         self.progress_interval = progress_interval
         self.initial_food = environment.initial_food_amount
+        self.steps_per_frame = max(1, steps_per_frame)
+        self.turbo = turbo
+        self.simulation = None  # SimulationThread in turbo mode
+        self.running = False
+        self.view_step_count = 0  # step_count of the view in turbo mode
+        self.steps_per_second = 0.0
+        self._step_rate_sample = (time.time(), environment.steps)  # (time, steps)
 
         pygame.init()
         self.width = environment.width * cell_size
         self.height = environment.height * cell_size
         self.stats_height = 100  # Increased height for stats area for better visibility
-
-        # Create scaled display for better visibility
-        self.scaled_width = self.width * scale_factor
-        self.scaled_height = self.height * scale_factor
+        if environment.profiler is not None:
+            self.stats_height += 50  # Two lines of phase timings
+
+        # Create scaled display for better visibility. Maps larger than
+        # view_size are shown in a viewport that can be panned and zoomed,
+        # scaled_width x scaled_height is the size of that viewport.
+        self.scaled_width = min(self.width * scale_factor, view_size[0])
+        self.scaled_height = min(self.height * scale_factor, view_size[1])
         self.screen = pygame.display.set_mode(
             (self.scaled_width, self.scaled_height + self.stats_height)
         )
         pygame.display.set_caption("Ant Colony Simulation")
 
-        self.main_surface = pygame.Surface((self.width, self.height))
-        self.main_surface.fill(DIRT_COLOR)
+        # Viewport: zoom level and top-left visible cell, see _visible_region
+        self.lod_block = 1  # Cells per screen pixel side when zoomed out, 1 otherwise
+        self.zoom_levels = [(1, block) for block in reversed(LOD_BLOCKS)]
+        self.zoom_levels += [(scale, 1) for scale in sorted(set(ZOOM_SCALES) | {scale_factor})]
+        self.view_x = 0.0
+        self.view_y = 0.0
+        if self.scaled_width < self.width * scale_factor or self.scaled_height < self.height * scale_factor:
+            self.fit_view()
+        self._drag_position = None  # Mouse position while panning by dragging
+
+        # Visible cells at cell_size, resized with the visible region by blit_frame
+        self.main_surface = pygame.Surface((0, 0))
+        self._overview = None  # Zoomed out frame, see render_overview
+        self._overview_terrain = None  # (lod_block, terrain of every block of the map)
+        self._overview_cursor = None  # Cursor of _overview_terrain in terrain_feed
+        # Frame being composed, one entry per visible cell: the colors and
+        # whether anything is drawn there (the dirt and grid show elsewhere)
+        self.cell_colors = None
+        self.cell_drawn = None
+        self._region = None  # Visible cells (x0, y0, x1, y1) of cell_colors
+        self._background = None  # (show_grid, cells), see _get_background
+        self._region_background = None  # (show_grid, region, pixels), see _get_region_background
+        # Static layer: background and terrain, updated from the terrain
+        # changes recorded by the environment, see _get_static_layer
+        self.terrain_feed = None
+        self._static_cursor = None
+        self._watch_terrain(environment.terrain_changes)
+        self._frame_layers = None  # "pheromones" or "terrain", drawn in the frame
+        self._ant_cells = np.empty(0, dtype=np.intp)  # Flat cells covered by ants in the frame
+        self._dirty = None  # Flat cells redrawn since the last blit, None for all
+        self._shown_state = None  # State shown on screen, see draw
 
         self.font = pygame.font.SysFont("Arial", 18)
         self.clock = pygame.time.Clock()
@@ -75,7 +214,7 @@ class AntSimulationGUI:
         self.last_food_pheromones = set()
 
     def run(self) -> None:
-        running = True
+        self.running = True
         last_update = time.time()
         self.start_time = time.time()  # Record when simulation starts
 
@@ -93,285 +232,629 @@ class AntSimulationGUI:
             else:
                 print("No step limit (unlimited)")
 
-        while running:
-            # Process events
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_SPACE:
-                        self.paused = not self.paused
-                    elif event.key == pygame.K_p:
-                        self.show_pheromones = not self.show_pheromones
-                    elif event.key == pygame.K_s:
-                        self.show_stats = not self.show_stats
-                    elif event.key == pygame.K_g:
-                        # Toggle grid
-                        self.show_grid = not self.show_grid
-                    elif event.key == pygame.K_n and self.paused:
-                        # Single step when paused
-                        self.environment.update()
-                        self.step_count += 1
-                        # Check if simulation is complete after manual step
-                        if self.environment.is_complete():
-                            self.simulation_complete = True
-                            self.paused = True
-
-            # Update simulation if not paused and not complete
-            current_time = time.time()
-            if (
-                not self.paused
-                and not self.simulation_complete
-                and current_time - last_update > 1.0 / self.fps
-            ):
-                self.environment.update()
-                self.step_count += 1
-                last_update = current_time
-
-                # Print progress updates at specified intervals
-                if self.verbose and self.step_count % self.progress_interval == 0:
-                    food_collected = self.environment.food_collected
-                    completion_pct = (
-                        (food_collected / self.initial_food * 100)
-                        if self.initial_food > 0
-                        else 0
-                    )
-                    ants_with_food = sum(
-                        1 for ant in self.environment.ants if ant.has_food
-                    )
-
-                    print(
-                        f"Step {self.step_count}: "
-                        f"Food collected: {food_collected}/{self.initial_food} ({completion_pct:.1f}%) | "
-                        f"Ants with food: {ants_with_food}/{len(self.environment.ants)}"
-                    )
-
-                # Check if simulation is complete
-                if self.environment.is_complete():
-                    self.simulation_complete = True
-                    self.paused = True
-                    if self.verbose:
-                        print(
-                            f"Simulation complete! All food collected in {self.step_count} steps."
+        if self.turbo:
+            self.simulation = SimulationThread(self)
+            # The thread hands over the terrain changes with the snapshots
+            self._watch_terrain(self.simulation.terrain_changes)
+            self.simulation.start()
+
+        try:
+            while self.running:
+                # Process events
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        self.running = False
+                    elif event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_SPACE:
+                            self.paused = not self.paused
+                            if self.simulation is not None:
+                                self.simulation.wake()
+                        elif event.key == pygame.K_p:
+                            self.show_pheromones = not self.show_pheromones
+                        elif event.key == pygame.K_s:
+                            self.show_stats = not self.show_stats
+                        elif event.key == pygame.K_g:
+                            # Toggle grid
+                            self.show_grid = not self.show_grid
+                        elif event.key == pygame.K_n and self.paused:
+                            # Single step when paused
+                            if self.simulation is not None:
+                                self.simulation.request_step()
+                            elif not self.simulation_complete:
+                                self.step()
+                        elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                            self.zoom(1)
+                        elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                            self.zoom(-1)
+                        elif event.key == pygame.K_0:
+                            self.fit_view()
+                        elif event.key in PAN_KEYS:
+                            # A quarter of the viewport per key press
+                            dx, dy = PAN_KEYS[event.key]
+                            self.pan(dx * self.scaled_width // 4, dy * self.scaled_height // 4)
+                    elif event.type == pygame.MOUSEWHEEL:
+                        # Zoom around the mouse pointer
+                        position = pygame.mouse.get_pos()
+                        self.zoom(event.y, position if position[1] < self.scaled_height else None)
+                    elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                        if event.pos[1] < self.scaled_height:
+                            self._drag_position = event.pos
+                    elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                        self._drag_position = None
+                    elif event.type == pygame.MOUSEMOTION and self._drag_position is not None:
+                        # Drag the map with the mouse
+                        self.pan(
+                            self._drag_position[0] - event.pos[0],
+                            self._drag_position[1] - event.pos[1],
                         )
+                        self._drag_position = event.pos
+
+                if self.simulation is not None:
+                    # The simulation thread runs on its own, draw where it is now
+                    self.view, self.view_step_count = self.simulation.snapshot()
+                    self.draw()
+                    # The display rate is the only limit in turbo mode
+                    self.clock.tick(self.fps)
+                    continue
 
-                # Check if we've reached time limit
-                elapsed_time = current_time - self.start_time
-                if self.time_limit > 0 and elapsed_time >= self.time_limit:
-                    self.simulation_complete = True
-                    self.paused = True
-                    if self.verbose:
-                        print(f"Time limit reached: {self.time_limit} seconds")
-                    if self.environment.is_complete():
-                        if self.verbose:
-                            print("Simulation complete! All food collected.")
-                    else:
-                        completion = self.environment.get_completion_percentage()
-                        if self.verbose:
-                            print(
-                                f"Simulation incomplete. Completion: {completion:.1f}%"
-                            )
-
-                # Check if we've reached max steps
-                if self.max_steps > 0 and self.step_count >= self.max_steps:
-                    if self.verbose:
-                        print(f"Reached maximum steps: {self.max_steps}")
-                    if self.environment.is_complete():
-                        if self.verbose:
-                            print("Simulation completed successfully!")
-                    else:
-                        if self.verbose:
-                            print(
-                                f"Simulation ended without collecting all food. Food collected: {self.environment.food_collected}/{self.environment.initial_food_amount}"
-                            )
-                    running = False
-
-            # Draw everything
-            self.draw()
-
-            # Cap framerate
-            self.clock.tick(60)
+                # Update simulation if not paused and not complete
+                current_time = time.time()
+                if (
+                    not self.paused
+                    and not self.simulation_complete
+                    and current_time - last_update > 1.0 / self.fps
+                ):
+                    last_update = current_time
+                    for _ in range(self.steps_per_frame):
+                        self.step()
+                        if self.simulation_complete or not self.running:
+                            break
+
+                # Draw everything
+                self.draw()
+
+                # Cap framerate
+                self.clock.tick(60)
+        finally:
+            if self.simulation is not None:
+                self.simulation.stop()
 
         pygame.quit()
 
-    def draw(self) -> None:
-        self.main_surface.fill(DIRT_COLOR)
-
-        if self.show_grid:
-            for x in range(0, self.width, 10):
-                pygame.draw.line(
-                    self.main_surface,
-                    (DIRT_R - 20, DIRT_G - 20, DIRT_B - 20),
-                    (x, 0),
-                    (x, self.height),
-                    1,
-                )
-            for y in range(0, self.height, 10):
-                pygame.draw.line(
-                    self.main_surface,
-                    (DIRT_R - 20, DIRT_G - 20, DIRT_B - 20),
-                    (0, y),
-                    (self.width, y),
-                    1,
+    def step(self) -> None:
+        """Run one simulation step, report progress and check the end conditions
+
+        Called by run(), or by the SimulationThread in turbo mode. Stops
+        run() when the maximum number of steps is reached.
+        """
+        self.environment.update()
+        self.step_count += 1
+
+        # Print progress updates at specified intervals
+        if self.verbose and self.step_count % self.progress_interval == 0:
+            food_collected = self.environment.food_collected
+            completion_pct = (
+                (food_collected / self.initial_food * 100)
+                if self.initial_food > 0
+                else 0
+            )
+            ants_with_food = sum(self.environment.population.has_food)
+
+            print(
+                f"Step {self.step_count}: "
+                f"Food collected: {food_collected}/{self.initial_food} ({completion_pct:.1f}%) | "
+                f"Ants with food: {ants_with_food}/{len(self.environment.ants)}"
+            )
+
+        # Check if simulation is complete
+        if self.environment.is_complete():
+            self.simulation_complete = True
+            self.paused = True
+            if self.verbose:
+                print(
+                    f"Simulation complete! All food collected in {self.step_count} steps."
                 )
 
-        if self.show_pheromones:
-            self.render_pixel_perfect()
-        else:
-            self.render_basic_terrain()
+        # Check if we've reached time limit
+        elapsed_time = time.time() - self.start_time
+        if self.time_limit > 0 and elapsed_time >= self.time_limit:
+            self.simulation_complete = True
+            self.paused = True
+            if self.verbose:
+                print(f"Time limit reached: {self.time_limit} seconds")
+            if self.environment.is_complete():
+                if self.verbose:
+                    print("Simulation complete! All food collected.")
+            else:
+                completion = self.environment.get_completion_percentage()
+                if self.verbose:
+                    print(
+                        f"Simulation incomplete. Completion: {completion:.1f}%"
+                    )
 
-        self.render_ants()
+        # Check if we've reached max steps
+        if self.max_steps > 0 and self.step_count >= self.max_steps:
+            if self.verbose:
+                print(f"Reached maximum steps: {self.max_steps}")
+            if self.environment.is_complete():
+                if self.verbose:
+                    print("Simulation completed successfully!")
+            else:
+                if self.verbose:
+                    print(
+                        f"Simulation ended without collecting all food. Food collected: {self.environment.food_collected}/{self.environment.initial_food_amount}"
+                    )
+            self.running = False
 
-        scaled_surface = pygame.transform.scale(
-            self.main_surface, (self.scaled_width, self.scaled_height)
+    def draw(self) -> None:
+        environment = self.view
+        # A frame is only composed when what it shows changed, idle frames
+        # (paused, or drawn between two steps) only redraw the stats
+        viewport = (self.scale_factor, self.lod_block, self._visible_region())
+        state = (
+            environment.steps,
+            len(environment.ants),
+            self.show_pheromones,
+            self.show_grid,
+            viewport,
         )
+        if self.lod_block > 1:
+            cursor = self._overview_cursor
+        else:
+            cursor = self._static_cursor
+        terrain_changed = cursor is not None and self.terrain_feed.pending(cursor)
+        updated = []
+        if state != self._shown_state or terrain_changed:
+            if self._shown_state is None or self._shown_state[4] != viewport:
+                # The map may not cover the whole viewport any more
+                map_area = pygame.Rect(0, 0, self.scaled_width, self.scaled_height)
+                self.screen.fill(BLACK, map_area)
+                updated.append(map_area)
+            if self.lod_block > 1:
+                self.render_overview()
+                updated.append(self.blit_overview())
+            else:
+                if self.show_pheromones:
+                    self.render_pixel_perfect()
+                else:
+                    self.render_basic_terrain()
 
-        self.screen.blit(scaled_surface, (0, 0))
+                self.render_ants()
+                updated.append(self.blit_frame())
+            self._shown_state = state
 
         if self.show_stats:
             self.draw_stats()
+            updated.append((0, self.scaled_height, self.scaled_width, self.stats_height))
+
+        pygame.display.update(updated)
+
+    def invalidate(self) -> None:
+        """Compose and show the whole frame again on the next draw()"""
+        self._shown_state = None
+        self._frame_layers = None
+
+    def _pixels_per_cell(self, level=None) -> float:
+        """Screen pixels per cell side at a zoom level, the current one by default"""
+        scale, block = level or (self.scale_factor, self.lod_block)
+        if block > 1:
+            return 1 / block
+        return self.cell_size * scale
+
+    def _map_offset(self, level=None):
+        """Screen position of the map, centered when it is smaller than the viewport"""
+        pixels_per_cell = self._pixels_per_cell(level)
+        width = math.ceil(self.view.width * pixels_per_cell)
+        height = math.ceil(self.view.height * pixels_per_cell)
+        return max(0, (self.scaled_width - width) // 2), max(0, (self.scaled_height - height) // 2)
+
+    def _visible_region(self):
+        """Cells shown in the viewport, (x0, y0, x1, y1)
+
+        Cells partly visible on the right and bottom edges are included.
+        When zoomed out the region starts on a block boundary, so blocks do
+        not change while panning.
+        """
+        pixels_per_cell = self._pixels_per_cell()
+        x0, y0 = int(self.view_x), int(self.view_y)
+        if self.lod_block > 1:
+            x0 -= x0 % self.lod_block
+            y0 -= y0 % self.lod_block
+        columns = math.ceil(self.scaled_width / pixels_per_cell)
+        rows = math.ceil(self.scaled_height / pixels_per_cell)
+        return x0, y0, min(self.view.width, x0 + columns), min(self.view.height, y0 + rows)
+
+    def _fit_level(self) -> int:
+        """Index in zoom_levels of the closest level showing the whole map"""
+        for index in range(len(self.zoom_levels) - 1, 0, -1):
+            pixels_per_cell = self._pixels_per_cell(self.zoom_levels[index])
+            if (
+                math.ceil(self.view.width * pixels_per_cell) <= self.scaled_width
+                and math.ceil(self.view.height * pixels_per_cell) <= self.scaled_height
+            ):
+                return index
+        return 0
+
+    def _clamp_view(self) -> None:
+        """Keep the viewport over the map"""
+        pixels_per_cell = self._pixels_per_cell()
+        max_x = max(0, math.ceil(self.view.width - self.scaled_width / pixels_per_cell))
+        max_y = max(0, math.ceil(self.view.height - self.scaled_height / pixels_per_cell))
+        self.view_x = min(max(self.view_x, 0.0), max_x)
+        self.view_y = min(max(self.view_y, 0.0), max_y)
+
+    def fit_view(self) -> None:
+        """Zoom to show the whole map"""
+        self.scale_factor, self.lod_block = self.zoom_levels[self._fit_level()]
+        self.view_x = self.view_y = 0.0
+
+    def zoom(self, steps: int, anchor=None) -> None:
+        """Zoom in (steps > 0) or out by zoom levels, keeping the cell under anchor in place
+
+        anchor is a position in the viewport, its center by default.
+        Zooming out stops at the level showing the whole map.
+        """
+        levels = self.zoom_levels
+        index = levels.index((self.scale_factor, self.lod_block)) + steps
+        index = min(max(index, self._fit_level()), len(levels) - 1)
+        if anchor is None:
+            anchor = (self.scaled_width // 2, self.scaled_height // 2)
+        pixels_per_cell = self._pixels_per_cell()
+        offset_x, offset_y = self._map_offset()
+        x = self.view_x + (anchor[0] - offset_x) / pixels_per_cell
+        y = self.view_y + (anchor[1] - offset_y) / pixels_per_cell
+
+        self.scale_factor, self.lod_block = levels[index]
+        pixels_per_cell = self._pixels_per_cell()
+        offset_x, offset_y = self._map_offset()
+        self.view_x = x - (anchor[0] - offset_x) / pixels_per_cell
+        self.view_y = y - (anchor[1] - offset_y) / pixels_per_cell
+        self._clamp_view()
+
+    def pan(self, dx: int, dy: int) -> None:
+        """Move the viewport by (dx, dy) screen pixels"""
+        pixels_per_cell = self._pixels_per_cell()
+        self.view_x += dx / pixels_per_cell
+        self.view_y += dy / pixels_per_cell
+        self._clamp_view()
+
+    def _grid_layers(self, region=None):
+        """Grid values (cells, zone_cells) of the map, indexed [y, x]
+
+        Only for the cells of region (x0, y0, x1, y1) if given.
+        """
+        environment = self.view
+        x0, y0, x1, y1 = region or (0, 0, environment.width, environment.height)
+        border, stride = environment.border, environment.stride
+        rows = slice(border + y0, border + y1)
+        columns = slice(border + x0, border + x1)
+        cells = np.frombuffer(environment.cells, dtype=np.uint8).reshape(-1, stride)
+        zone = np.frombuffer(environment.zone_cells, dtype=np.uint8).reshape(-1, stride)
+        return cells[rows, columns], zone[rows, columns]
+
+    def _terrain_layer(self):
+        """Terrain value of each cell as get_terrain() reports it, indexed [y, x]"""
+        cells, zone = self._grid_layers()
+        return ZONE_TERRAIN[zone, cells]
+
+    def _watch_terrain(self, feed: ChangeFeed) -> None:
+        """Follow the terrain changes of feed, the cached terrain is built again"""
+        if self.terrain_feed is not None:
+            self.terrain_feed.unsubscribe(self._static_cursor)
+            if self._overview_cursor is not None:
+                self.terrain_feed.unsubscribe(self._overview_cursor)
+        self.terrain_feed = feed
+        self._static_cursor = feed.subscribe()
+        self._overview_cursor = None
+        self._overview_terrain = None
+        self._static = None
+
+    def _get_static_layer(self):
+        """Colors of the background and terrain, where terrain is drawn, and the cells changed
+
+        Built once for the whole map, then only the cells reported by
+        terrain_feed are updated. The changed cells are returned as flat
+        indices in the map, or None when the whole layer was rebuilt.
+        """
+        environment = self.view
+        changes = self.terrain_feed.changes(self._static_cursor)
+        background = self._get_background()
+        if changes is None or self._static is None or self._static[0] != self.show_grid:
+            terrain = self._terrain_layer()
+            colors = background.copy()
+            drawn = terrain != TerrainType.EMPTY.value
+            colors[drawn] = TERRAIN_COLORS[terrain[drawn]]
+            self._static = (self.show_grid, colors, drawn)
+            return colors, drawn, None
+
+        _, colors, drawn = self._static
+        if not changes:
+            return colors, drawn, np.empty(0, dtype=np.intp)
+        xs, ys = np.array(list(changes), dtype=np.intp).T
+        cells = ys * environment.width + xs
+        index = (ys + environment.border) * environment.stride + xs + environment.border
+        terrain = ZONE_TERRAIN[
+            np.frombuffer(environment.zone_cells, dtype=np.uint8)[index],
+            np.frombuffer(environment.cells, dtype=np.uint8)[index],
+        ]
+        is_terrain = terrain != TerrainType.EMPTY.value
+        colors.reshape(-1, 3)[cells] = np.where(
+            is_terrain[:, None], TERRAIN_COLORS[terrain], background.reshape(-1, 3)[cells]
+        )
+        drawn.reshape(-1)[cells] = is_terrain
+        return colors, drawn, cells
 
-        pygame.display.flip()
+    def _region_cells(self, cells):
+        """Flat indices in cell_colors of the visible cells among flat map cells"""
+        x0, y0, x1, y1 = self._region
+        ys, xs = np.divmod(cells, self.view.width)
+        inside = (xs >= x0) & (xs < x1) & (ys >= y0) & (ys < y1)
+        return (ys[inside] - y0) * (x1 - x0) + xs[inside] - x0
 
     def render_basic_terrain(self) -> None:
-        for x in range(self.environment.width):
-            for y in range(self.environment.height):
-                terrain = self.environment.get_terrain(x, y)
-                if terrain == TerrainType.FOOD:
-                    pygame.draw.rect(
-                        self.main_surface,
-                        FOOD_COLOR,
-                        (
-                            x * self.cell_size,
-                            y * self.cell_size,
-                            self.cell_size,
-                            self.cell_size,
-                        ),
-                    )
-                elif terrain == TerrainType.COLONY:
-                    pygame.draw.rect(
-                        self.main_surface,
-                        (HOME_R, HOME_G, HOME_B),
-                        (
-                            x * self.cell_size,
-                            y * self.cell_size,
-                            self.cell_size,
-                            self.cell_size,
-                        ),
-                    )
-                elif terrain == TerrainType.WALL:
-                    pygame.draw.rect(
-                        self.main_surface,
-                        GRAY,
-                        (
-                            x * self.cell_size,
-                            y * self.cell_size,
-                            self.cell_size,
-                            self.cell_size,
-                        ),
-                    )
+        colors, drawn, changed = self._get_static_layer()
+        region = x0, y0, x1, y1 = self._visible_region()
+        if changed is None or self._frame_layers != "terrain" or self._region != region:
+            self.cell_colors = colors[y0:y1, x0:x1].copy()
+            self.cell_drawn = drawn[y0:y1, x0:x1].copy()
+            self._region = region
+            self._dirty = None
+        else:
+            # Same layers and region as the last frame, only the cells that
+            # changed and the ones the ants covered are restored
+            cells = np.concatenate((self._region_cells(changed), self._ant_cells))
+            ys, xs = np.divmod(cells, x1 - x0)
+            self.cell_colors[ys, xs] = colors[ys + y0, xs + x0]
+            self.cell_drawn[ys, xs] = drawn[ys + y0, xs + x0]
+            self._mark_dirty(cells)
+        self._frame_layers = "terrain"
 
     def render_pixel_perfect(self) -> None:
-        max_pheromone = 100.0
-
-        for y in range(self.environment.height):
-            for x in range(self.environment.width):
-                terrain = self.environment.get_terrain(x, y)
-                if terrain == TerrainType.FOOD:
-                    pygame.draw.rect(
-                        self.main_surface,
-                        FOOD_COLOR,
-                        (
-                            x * self.cell_size,
-                            y * self.cell_size,
-                            self.cell_size,
-                            self.cell_size,
-                        ),
-                    )
-                    continue
+        # Evaporation changes every stored level at each step, so the
+        # pheromones are blended again for the whole region over the static layer
+        colors, static_drawn, _ = self._get_static_layer()
+        region = x0, y0, x1, y1 = self._visible_region()
+        home_values = self.view.home_pheromones.to_array()[y0:y1, x0:x1]
+        food_values = self.view.food_pheromones.to_array()[y0:y1, x0:x1]
+        static_drawn = static_drawn[y0:y1, x0:x1]
+        pheromones = (home_values != 0) | (food_values != 0)
+        pheromones &= ~static_drawn
+        self.cell_colors = colors[y0:y1, x0:x1].copy()
+        self.cell_drawn = static_drawn | pheromones
+        self._region = region
+        self._dirty = None
+        self._frame_layers = "pheromones"
+
+        # Only computed for the cells with pheromones
+        drawn = np.flatnonzero(pheromones)
+        self.cell_colors.reshape(-1, 3)[drawn] = self._blend_pheromones(
+            home_values.take(drawn), food_values.take(drawn)
+        )
 
-                # Draw colony
-                if terrain == TerrainType.COLONY:
-                    pygame.draw.rect(
-                        self.main_surface,
-                        (HOME_R, HOME_G, HOME_B),
-                        (
-                            x * self.cell_size,
-                            y * self.cell_size,
-                            self.cell_size,
-                            self.cell_size,
-                        ),
-                    )
-                    continue
+    @staticmethod
+    def _blend_pheromones(home_values, food_values):
+        """Colors of cells with these pheromone levels, as an (n, 3) array
 
-                # Draw walls
-                if terrain == TerrainType.WALL:
-                    pygame.draw.rect(
-                        self.main_surface,
-                        GRAY,
-                        (
-                            x * self.cell_size,
-                            y * self.cell_size,
-                            self.cell_size,
-                            self.cell_size,
-                        ),
-                    )
-                    continue
+        Blended exactly like in improved_ant.py: home pheromone over the
+        dirt, then food pheromone over the result, truncated like int().
+        Computed with one row per channel.
+        """
+        max_pheromone = 100.0
+        home_pct = np.minimum(1.0, home_values / max_pheromone)
+        food_pct = np.minimum(1.0, food_values / max_pheromone)
+        pixels = np.trunc(HOME_CHANNELS * home_pct + DIRT_CHANNELS * (1 - home_pct))
+        pixels = FOOD_CHANNELS * food_pct + pixels * (1 - food_pct)
+        return pixels.T.astype(np.uint8)
 
-                # Get pheromone values
-                home_val = self.environment.home_pheromones.get_value(x, y)
-                food_val = self.environment.food_pheromones.get_value(x, y)
+    def render_ants(self) -> None:
+        from batch import population_arrays
+
+        arrays = population_arrays(self.view.population)
+        if not len(arrays["x"]):
+            self._ant_cells = np.empty(0, dtype=np.intp)
+            return
+
+        # Cells of every ant, in population order
+        shapes = ANT_SHAPES[ANT_SHAPE_BY_DIRECTION[arrays["direction"]]]
+        xs = (arrays["x"][:, None] + shapes[:, :, 0]).ravel()
+        ys = (arrays["y"][:, None] + shapes[:, :, 1]).ravel()
+        colors = np.where(
+            arrays["has_food"][:, None], np.array(FOOD_COLOR), np.array(ANT_COLOR)
+        ).astype(np.uint8)
+        ant_indices = np.arange(len(arrays["x"])).repeat(ANT_SHAPES.shape[1])
+        x0, y0, x1, y1 = self._region
+        inside = (xs >= x0) & (xs < x1) & (ys >= y0) & (ys < y1)
+        xs, ys, ant_indices = xs[inside], ys[inside], ant_indices[inside]
+
+        # Where ants overlap, the last one in the population is on top
+        cells = (ys - y0) * (x1 - x0) + xs - x0
+        _, last = np.unique(cells[::-1], return_index=True)
+        keep = len(cells) - 1 - last
+        self._ant_cells = cells[keep]
+        self.cell_colors.reshape(-1, 3)[self._ant_cells] = colors[ant_indices[keep]]
+        self.cell_drawn.reshape(-1)[self._ant_cells] = True
+        self._mark_dirty(self._ant_cells)
+
+    def _mark_dirty(self, cells) -> None:
+        if self._dirty is not None:
+            self._dirty.append(cells)
+
+    def _get_background(self):
+        """Background of each cell of the map, cached
+
+        Dirt, with the grid lines when cells are pixels. With larger cells
+        the grid is drawn between them by blit_frame, see _get_region_background.
+        """
+        if self._background is None or self._background[0] != self.show_grid:
+            cells = np.empty((self.view.height, self.view.width, 3), dtype=np.uint8)
+            cells[:] = DIRT_COLOR
+            if self.show_grid and self.cell_size == 1:
+                cells[:, ::10] = GRID_COLOR
+                cells[::10, :] = GRID_COLOR
+            self._background = (self.show_grid, cells)
+        return self._background[1]
+
+    def _get_region_background(self):
+        """Pixels of main_surface for the visible cells: dirt with the grid lines, cached"""
+        key = (self.show_grid, self._region)
+        if self._region_background is None or self._region_background[:2] != key:
+            x0, y0, x1, y1 = self._region
+            size = self.cell_size
+            pixels = np.empty(((y1 - y0) * size, (x1 - x0) * size, 3), dtype=np.uint8)
+            pixels[:] = DIRT_COLOR
+            if self.show_grid:
+                # Every 10 pixels of the whole map, wherever the region starts
+                pixels[:, -(x0 * size) % 10 :: 10] = GRID_COLOR
+                pixels[-(y0 * size) % 10 :: 10, :] = GRID_COLOR
+            self._region_background = key + (pixels,)
+        return self._region_background[2]
+
+    def blit_frame(self) -> pygame.Rect:
+        """Copy the cells redrawn since the last call to main_surface and the screen
+
+        Only the bounding box of the dirty cells is copied and scaled.
+        Returns the updated screen rectangle.
+        """
+        x0, y0, x1, y1 = self._region
+        width, height = x1 - x0, y1 - y0
+        size = self.cell_size
+        if self.main_surface.get_size() != (width * size, height * size):
+            self.main_surface = pygame.Surface((width * size, height * size))
+            self._dirty = None
+        if self._dirty is None:
+            left, top, right, bottom = 0, 0, width, height
+        else:
+            cells = np.concatenate(self._dirty) if self._dirty else []
+            if not len(cells):
+                self._dirty = []
+                return pygame.Rect(0, 0, 0, 0)
+            ys, xs = np.divmod(cells, width)
+            left, top, right, bottom = xs.min(), ys.min(), xs.max() + 1, ys.max() + 1
+        self._dirty = []
+
+        frame = self.cell_colors[top:bottom, left:right]
+        if size > 1:
+            colors = frame.repeat(size, axis=0).repeat(size, axis=1)
+            drawn = self.cell_drawn[top:bottom, left:right].repeat(size, axis=0).repeat(size, axis=1)
+            background = self._get_region_background()[
+                top * size : bottom * size, left * size : right * size
+            ]
+            frame = np.where(drawn[:, :, None], colors, background)
+        pixels = pygame.surfarray.pixels3d(self.main_surface)
+        pixels[left * size : right * size, top * size : bottom * size] = frame.transpose(1, 0, 2)
+        del pixels  # Unlocks the surface
+
+        area = pygame.Rect(left * size, top * size, (right - left) * size, (bottom - top) * size)
+        scale = self.scale_factor
+        offset_x, offset_y = self._map_offset()
+        screen_area = pygame.Rect(
+            offset_x + area.x * scale, offset_y + area.y * scale, area.w * scale, area.h * scale
+        )
+        return self._blit_map(
+            pygame.transform.scale(self.main_surface.subsurface(area), screen_area.size),
+            screen_area.topleft,
+        )
 
-                # Skip pixels with no pheromones
-                if home_val == 0 and food_val == 0:
-                    continue
+    def render_overview(self) -> None:
+        """Compose the zoomed out frame, one pixel per block of lod_block x lod_block cells
+
+        A block shows its terrain as block_terrain() reports it, else its
+        highest pheromone levels blended like a cell. Ants are blended over
+        it by the share of the block they cover. The terrain of the blocks
+        is cached and updated from the terrain changes, and the colors are
+        only computed per block. The pheromones are not cached: evaporation
+        changes every level at each step, so each frame reads and reduces
+        all the visible levels (the dict and lazy backends first build the
+        array of the whole map). The frame cost therefore grows with the
+        number of visible cells, with the map size when the whole map is
+        shown. The first frame also builds the static layer and the block
+        terrain of the whole map, see the render_overview benchmarks.
+        """
+        from batch import population_arrays
+
+        # Keeps the static layer of the zoomed in frames up to date
+        self._get_static_layer()
+        block = self.lod_block
+        x0, y0, x1, y1 = self._visible_region()
+        terrain = self._get_overview_terrain()[
+            y0 // block : -(-y1 // block), x0 // block : -(-x1 // block)
+        ]
+        rows, columns = terrain.shape
 
-                # Calculate percentages
-                home_pct = min(1.0, home_val / max_pheromone)
-                food_pct = min(1.0, food_val / max_pheromone)
-
-                # Calculate blended color, exactly like in improved_ant.py
-                pixel_r = int(HOME_R * home_pct + DIRT_R * (1 - home_pct))
-                pixel_g = int(HOME_G * home_pct + DIRT_G * (1 - home_pct))
-                pixel_b = int(HOME_B * home_pct + DIRT_B * (1 - home_pct))
-
-                pixel_r = int(FOOD_R * food_pct + pixel_r * (1 - food_pct))
-                pixel_g = int(FOOD_G * food_pct + pixel_g * (1 - food_pct))
-                pixel_b = int(FOOD_B * food_pct + pixel_b * (1 - food_pct))
-
-                # Draw the pixel
-                pygame.draw.rect(
-                    self.main_surface,
-                    (pixel_r, pixel_g, pixel_b),
-                    (
-                        x * self.cell_size,
-                        y * self.cell_size,
-                        self.cell_size,
-                        self.cell_size,
-                    ),
+        colors = np.empty((rows, columns, 3), dtype=np.uint8)
+        colors[:] = DIRT_COLOR
+        if self.show_pheromones:
+            home = self.view.home_pheromones.to_array()[y0:y1, x0:x1]
+            food = self.view.food_pheromones.to_array()[y0:y1, x0:x1]
+            home = block_reduce(home, block, np.maximum)
+            food = block_reduce(food, block, np.maximum)
+            shown = np.flatnonzero((home != 0) | (food != 0))
+            colors.reshape(-1, 3)[shown] = self._blend_pheromones(home.take(shown), food.take(shown))
+
+        drawn = terrain != TerrainType.EMPTY.value
+        colors[drawn] = TERRAIN_COLORS[terrain[drawn]]
+
+        arrays = population_arrays(self.view.population)
+        xs, ys = arrays["x"], arrays["y"]
+        inside = (xs >= x0) & (xs < x1) & (ys >= y0) & (ys < y1)
+        counts = np.bincount(
+            (ys[inside] - y0) // block * columns + (xs[inside] - x0) // block,
+            minlength=rows * columns,
+        )
+        occupied = np.flatnonzero(counts)
+        density = np.minimum(1.0, counts[occupied] * ANT_SHAPES.shape[1] / (block * block))
+        flat_colors = colors.reshape(-1, 3)
+        flat_colors[occupied] = (
+            np.array(ANT_COLOR) * density[:, None] + flat_colors[occupied] * (1 - density[:, None])
+        ).astype(np.uint8)
+
+        self._overview = colors
+        # The next zoomed in frame is composed from scratch
+        self._frame_layers = None
+        self._region = None
+
+    def _get_overview_terrain(self):
+        """Terrain shown by each block of the whole map at the current zoom level
+
+        Built when the level changes, then only the blocks holding changed
+        cells are computed again. Kept while zoomed in, its cursor in
+        terrain_feed collects the changes until the next overview.
+        """
+        block = self.lod_block
+        if self._overview_cursor is None:
+            self._overview_cursor = self.terrain_feed.subscribe()
+            self._overview_terrain = None
+        changes = self.terrain_feed.changes(self._overview_cursor)
+        if changes is None or self._overview_terrain is None or self._overview_terrain[0] != block:
+            self._overview_terrain = (block, block_terrain(*self._grid_layers(), block))
+            return self._overview_terrain[1]
+
+        terrain = self._overview_terrain[1]
+        if changes:
+            xs, ys = np.array(list(changes), dtype=np.intp).T
+            blocks = np.unique(np.stack((ys // block, xs // block), axis=1), axis=0)
+            width, height = self.view.width, self.view.height
+            for row, column in blocks.tolist():
+                region = (
+                    column * block,
+                    row * block,
+                    min(width, (column + 1) * block),
+                    min(height, (row + 1) * block),
                 )
+                terrain[row, column] = block_terrain(*self._grid_layers(region), block)[0, 0]
+        return terrain
 
-    def render_ants(self) -> None:
-        for ant in self.environment.ants:
-            color = FOOD_COLOR if ant.has_food else ANT_COLOR
-
-            this_x_f = ant.x * self.cell_size
-            this_y_f = ant.y * self.cell_size
+    def blit_overview(self) -> pygame.Rect:
+        """Copy the zoomed out frame to the screen, returns the updated screen rectangle"""
+        surface = pygame.surfarray.make_surface(self._overview.transpose(1, 0, 2))
+        return self._blit_map(surface, self._map_offset())
 
-            dx, dy = Direction.get_delta(ant.direction)
-
-            if abs(dx) > abs(dy):
-                pygame.draw.rect(
-                    self.main_surface,
-                    color,
-                    (this_x_f, this_y_f, 3 * self.cell_size, 2 * self.cell_size),
-                )
-            else:
-                pygame.draw.rect(
-                    self.main_surface,
-                    color,
-                    (this_x_f, this_y_f, 2 * self.cell_size, 3 * self.cell_size),
-                )
+    def _blit_map(self, surface, position) -> pygame.Rect:
+        """Blit to the viewport, clipped to it, returns the updated screen rectangle"""
+        self.screen.set_clip((0, 0, self.scaled_width, self.scaled_height))
+        updated = self.screen.blit(surface, position)
+        self.screen.set_clip(None)
+        return updated
 
     def draw_stats(self) -> None:
         pygame.draw.rect(
@@ -387,10 +870,10 @@ class AntSimulationGUI:
             1,
         )
 
-        total_ants = len(self.environment.ants)
-        ants_with_food = sum(1 for ant in self.environment.ants if ant.has_food)
-        food_collected = self.environment.food_collected
-        total_food = self.environment.initial_food_amount
+        total_ants = len(self.view.ants)
+        ants_with_food = sum(self.view.population.has_food)
+        food_collected = self.view.food_collected
+        total_food = self.view.initial_food_amount
 
         # Calculate elapsed time and remaining time
         elapsed_time = 0
@@ -402,6 +885,13 @@ class AntSimulationGUI:
                 remaining_time = f"{remaining:.1f}s"
 
         fps = self.clock.get_fps()
+        # Simulation speed, measured over half a second or more
+        now = time.time()
+        sample_time, sample_steps = self._step_rate_sample
+        if now - sample_time >= 0.5:
+            self.steps_per_second = (self.view.steps - sample_steps) / (now - sample_time)
+            self._step_rate_sample = (now, self.view.steps)
+        step_count = self.step_count if self.simulation is None else self.view_step_count
 
         status = (
             "COMPLETE"
@@ -410,11 +900,16 @@ class AntSimulationGUI:
         )
         grid_status = "ON" if self.show_grid else "OFF"
         pher_status = "ON" if self.show_pheromones else "OFF"
+        zoom = (
+            f"1/{self.lod_block}"
+            if self.lod_block > 1
+            else f"x{self.cell_size * self.scale_factor}"
+        )
 
         lines = [
-            f"FPS: {fps:.1f} | Status: {status} | Step: {self.step_count} | Time: {elapsed_time:.1f}s",
+            f"FPS: {fps:.1f} | Steps/s: {self.steps_per_second:.0f} | Status: {status} | Step: {step_count} | Time: {elapsed_time:.1f}s",
             f"Ants: {total_ants} | With Food: {ants_with_food} | Food Collected: {food_collected}/{total_food}",
-            f"Grid: {grid_status} | Pheromones: {pher_status}"
+            f"Grid: {grid_status} | Pheromones: {pher_status} | Zoom: {zoom}"
             + (
                 f" | Time Limit: {self.time_limit}s | Remaining: {remaining_time}"
                 if self.time_limit > 0
@@ -422,9 +917,15 @@ class AntSimulationGUI:
             ),
         ]
 
+        if self.simulation is not None:
+            # The profiler is being updated by the simulation thread
+            lines.extend(self.simulation.profile_lines)
+        elif self.environment.profiler is not None:
+            lines.extend(self.environment.profiler.format_lines())
+
         if self.simulation_complete:
             lines.append(
-                f"SIMULATION COMPLETE! All food collected in {self.step_count} steps."
+                f"SIMULATION COMPLETE! All food collected in {step_count} steps."
             )
 
         y_offset = self.scaled_height + 15
@@ -434,13 +935,119 @@ class AntSimulationGUI:
             y_offset += 25
 
         controls = self.font.render(
-            "SPACE: Pause | P: Toggle Pheromones | G: Toggle Grid | S: Toggle Stats | N: Step (when paused)",
+            "SPACE: Pause | P: Toggle Pheromones | G: Toggle Grid | S: Toggle Stats | N: Step (when paused)"
+            " | Arrows/Drag: Pan | Wheel/+/-: Zoom | 0: Whole Map",
             True,
             (180, 180, 180),
         )
         self.screen.blit(controls, (15, y_offset))
 
 
+class SimulationThread(threading.Thread):
+    """Runs the steps of an AntSimulationGUI at full speed, for its turbo mode
+
+    The GUI never reads the environment while this thread updates it, it
+    asks for a snapshot() at display rate instead. Snapshots are taken
+    between two steps with Environment.snapshot, buffer copies that leave
+    the live environment and its strategies untouched, and carry the
+    terrain changes since the previous snapshot in its own terrain_changes
+    feed, read by the GUI. Pausing, single steps and
+    the end conditions use the GUI flags, see AntSimulationGUI.step.
+    """
+
+    def __init__(self, gui: AntSimulationGUI):
+        super().__init__(name="simulation", daemon=True)
+        self.gui = gui
+        self.pending_steps = 0  # Single steps requested while paused
+        self.profile_lines = []  # Phase timings when the last snapshot was taken
+        self.error = None  # Exception raised by a step, raised again by snapshot()
+        # Terrain changes of the snapshots, the GUI must not read the live feed
+        self.terrain_changes = ChangeFeed()
+        self._cursor = gui.environment.terrain_changes.subscribe()
+        self._condition = threading.Condition()
+        self._snapshot_requested = False
+        self._snapshot = None  # (Environment.snapshot, GUI step count)
+        self._stopped = False
+
+    def _idle(self) -> bool:
+        gui = self.gui
+        if not gui.running or gui.simulation_complete:
+            return True
+        return gui.paused and not self.pending_steps
+
+    def run(self) -> None:
+        gui = self.gui
+        try:
+            while True:
+                # The lock is only taken when there is something to handle,
+                # not between two steps of a running simulation
+                if self._snapshot_requested or self._stopped or gui.paused or self._idle():
+                    with self._condition:
+                        if self._snapshot_requested:
+                            self._take_snapshot()
+                        if self._stopped:
+                            return
+                        if self._idle():
+                            self.pending_steps = 0
+                            self._condition.wait()
+                            continue
+                        if gui.paused:
+                            self.pending_steps -= 1
+                gui.step()
+        except Exception as error:
+            with self._condition:
+                self.error = error
+                self._condition.notify_all()
+
+    def _take_snapshot(self) -> None:
+        environment = self.gui.environment
+        # Nothing changed when no step ran since the last snapshot
+        if self._snapshot is None or self._snapshot[1] != self.gui.step_count:
+            view = environment.snapshot()
+            changes = environment.terrain_changes.changes(self._cursor)
+            if changes is None:
+                self.terrain_changes.mark_all()
+            elif changes:
+                self.terrain_changes.add_many(changes)
+            self._snapshot = (view, self.gui.step_count)
+            if environment.profiler is not None:
+                self.profile_lines = environment.profiler.format_lines()
+        self._snapshot_requested = False
+        self._condition.notify_all()
+
+    def snapshot(self):
+        """Environment as it is between two steps and the GUI step count then
+
+        Waits for the step being run, if any.
+        """
+        with self._condition:
+            self._snapshot_requested = True
+            self._condition.notify_all()
+            while self._snapshot_requested and self.error is None and self.is_alive():
+                self._condition.wait()
+            if self.error is not None:
+                raise self.error
+            return self._snapshot
+
+    def request_step(self) -> None:
+        """Run a single step while paused"""
+        with self._condition:
+            self.pending_steps += 1
+            self._condition.notify_all()
+
+    def wake(self) -> None:
+        """Check the GUI flags again, after pausing or resuming"""
+        with self._condition:
+            self._condition.notify_all()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self.join()
+        self.gui.environment.terrain_changes.unsubscribe(self._cursor)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Ant Colony Simulation")
     parser.add_argument(
@@ -471,7 +1078,7 @@ def main():
         "--strategy",
         type=str,
         default="random",
-        help="Ant strategy (random or filename) (default: random)",
+        help="Ant strategy (random, random_batch or filename) (default: random)",
     )
     parser.add_argument(
         "--strategy-file",
@@ -506,16 +1113,58 @@ def main():
         help="Time limit in seconds (0 = no limit) (default: 0) - command line value takes precedence over environment file",
     )
     parser.add_argument("--quiet", action="store_true", help="Suppress progress output")
+    parser.add_argument(
+        "--pheromone-backend",
+        type=str,
+        default="dict",
+        choices=["dict", "array", "lazy"],
+        help="Pheromone map storage: sparse dict, dense NumPy array or lazily evaporated dict (default: dict)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Random seed, runs with the same seed and settings give the same results (default: random)",
+    )
     parser.add_argument(
         "--progress-interval",
         type=int,
         default=100,
         help="Print progress every N steps (default: 100)",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Show the time spent in each phase of the simulation steps in the stats panel",
+    )
+    parser.add_argument(
+        "--steps-per-frame",
+        type=int,
+        default=1,
+        help="Simulation steps run at each update, --fps times per second (default: 1)",
+    )
+    parser.add_argument(
+        "--view-size",
+        type=int,
+        nargs=2,
+        default=(1024, 768),
+        metavar=("WIDTH", "HEIGHT"),
+        help="Maximum size of the map view in pixels, larger maps can be panned and zoomed (default: 1024 768)",
+    )
+    parser.add_argument(
+        "--turbo",
+        action="store_true",
+        help="Run the simulation at full speed in its own thread, the display samples it --fps times per second",
+    )
     args = parser.parse_args()
 
     try:
-        environment = create_environment(args.env, args.width, args.height)
+        if args.seed is not None:
+            # Also seed the random module, for strategies that do not use perception.rng
+            random.seed(args.seed)
+        environment = create_environment(
+            args.env, args.width, args.height, seed=args.seed
+        )
+        environment.set_pheromone_backend(args.pheromone_backend)
 
         # Check if environment file specified a number of ants
         ant_count = args.ants
@@ -561,6 +1210,10 @@ def main():
             time_limit=time_limit,
             verbose=not args.quiet,
             progress_interval=args.progress_interval,
+            profile=args.profile,
+            steps_per_frame=args.steps_per_frame,
+            turbo=args.turbo,
+            view_size=tuple(args.view_size),
         )
         gui.run()
 
@@ -1,5 +1,4 @@
-import random
-from environment import TerrainType, AntPerception
+from common import TerrainType, AntPerception
 from ant import AntAction, AntStrategy
 
 
@@ -143,7 +142,7 @@ class FirstStrategy(AntStrategy):
         """Decide which direction to move based on current state"""
 
         # Random movement if no specific goal
-        movement_choice = random.random()
+        movement_choice = perception.rng.random()
 
         if check_move(perception) == False:  # Only one cell visible
             return AntAction.TURN_RIGHT
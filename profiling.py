@@ -0,0 +1,206 @@
+# Optional timing of the phases of Environment.update(), latency histograms
+# of the strategy decisions and decision time budgets.
+#
+# Profiling is off by default: Environment.update() only checks that
+# environment.profiler is None and runs the uninstrumented code.
+
+import math
+from time import perf_counter
+
+from ant import BatchAntStrategy
+from common import AntAction
+
+# Phases of Environment.update(), in execution order
+PHASES = ("evaporation", "perception", "decision", "execution")
+
+# Latency histogram buckets: 8 per power of two, from 2**-24 s (60 ns) to 2**8 s
+BUCKETS_PER_OCTAVE = 8
+MIN_EXPONENT = -24
+BUCKET_COUNT = (8 - MIN_EXPONENT) * BUCKETS_PER_OCTAVE
+
+
+class LatencyHistogram:
+    """Log-scale histogram of durations, percentiles are within 9% of the exact value"""
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        if seconds <= 0:
+            # frexp(0.0) is (0.0, 0), which would land around 0.25 s
+            bucket = 0
+        else:
+            # seconds = mantissa * 2**exponent with 0.5 <= mantissa < 1
+            mantissa, exponent = math.frexp(seconds)
+            bucket = (exponent - MIN_EXPONENT) * BUCKETS_PER_OCTAVE + int(
+                (mantissa - 0.5) * 2 * BUCKETS_PER_OCTAVE
+            )
+        self.counts[min(max(bucket, 0), BUCKET_COUNT - 1)] += 1
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent: float) -> float:
+        """Upper bound of the bucket holding the given percentile, in seconds"""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * percent / 100) or 1
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                exponent, step = divmod(bucket, BUCKETS_PER_OCTAVE)
+                upper = math.ldexp(
+                    0.5 + (step + 1) / (2 * BUCKETS_PER_OCTAVE), exponent + MIN_EXPONENT
+                )
+                return min(upper, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        """Count, p50, p95, p99 and max, durations in microseconds"""
+        return {
+            "calls": self.count,
+            "p50_us": self.percentile(50) * 1e6,
+            "p95_us": self.percentile(95) * 1e6,
+            "p99_us": self.percentile(99) * 1e6,
+            "max_us": self.max * 1e6,
+        }
+
+
+class PhaseProfiler:
+    """Wall time and call counts per phase of Environment.update() and per strategy"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        # {phase: [seconds, calls]}, one call is one ant for per-ant phases
+        self.phases = {phase: [0.0, 0] for phase in PHASES}
+        self.strategies = {}  # {strategy name: [seconds, decisions]}
+        # {strategy name: LatencyHistogram of its decide_action(s) calls}
+        self.latencies = {}
+        self.steps = 0
+        self.step_time = 0.0
+
+    def add(self, phase: str, seconds: float, calls: int = 1) -> None:
+        totals = self.phases[phase]
+        totals[0] += seconds
+        totals[1] += calls
+
+    def add_strategy(self, name: str, seconds: float, calls: int = 1) -> None:
+        """Add one decide_action call, or one decide_actions call for calls ants"""
+        totals = self.strategies.get(name)
+        if totals is None:
+            totals = self.strategies[name] = [0.0, 0]
+            self.latencies[name] = LatencyHistogram()
+        totals[0] += seconds
+        totals[1] += calls
+        self.latencies[name].add(seconds)
+
+    def add_step(self, seconds: float) -> None:
+        self.step_time += seconds
+        self.steps += 1
+
+    def summary(self) -> dict:
+        """Totals as a JSON-friendly dict, share is the fraction of the step time"""
+        step_time = self.step_time or 1.0
+        return {
+            "steps": self.steps,
+            "step_time": self.step_time,
+            "phases": {
+                phase: {"seconds": seconds, "calls": calls, "share": seconds / step_time}
+                for phase, (seconds, calls) in self.phases.items()
+            },
+            "strategies": {
+                name: {
+                    "seconds": seconds,
+                    "decisions": calls,
+                    "us_per_decision": seconds / calls * 1e6 if calls else 0.0,
+                    "latency": self.latencies[name].summary(),
+                }
+                for name, (seconds, calls) in self.strategies.items()
+            },
+        }
+
+    def format_lines(self) -> list:
+        """Short text lines for the GUI stats panel"""
+        step_time = self.step_time or 1.0
+        ms_per_step = self.step_time / self.steps * 1000 if self.steps else 0.0
+        lines = [
+            f"Step: {ms_per_step:.2f} ms | "
+            + " | ".join(
+                f"{phase.capitalize()}: {seconds / step_time * 100:.0f}%"
+                for phase, (seconds, _) in self.phases.items()
+            )
+        ]
+        if self.strategies:
+            lines.append(
+                " | ".join(
+                    f"{name}: {seconds / calls * 1e6:.1f} us/decision, "
+                    f"p99 {self.latencies[name].percentile(99) * 1e6:.0f} us"
+                    for name, (seconds, calls) in self.strategies.items()
+                    if calls
+                )
+            )
+        return lines
+
+
+class DecisionBudget:
+    """Time limits on the decisions of the strategies, enforced by Environment.update()
+
+    per_decision: a decision taking longer is replaced (0 for no limit).
+    For batch strategies, the time of decide_actions divided by the number
+    of ants is compared to it, and all their decisions are replaced.
+    per_step: once the decisions of a step took that long, the remaining
+    ants of the step do not call their strategy (0 for no limit).
+    Replaced and skipped decisions become the decision of the fallback
+    strategy, or AntAction.NO_ACTION without fallback. Python cannot stop a
+    call in progress, so a decision over budget still costs its time once.
+    """
+
+    def __init__(self, per_decision: float = 0.0, per_step: float = 0.0, fallback=None):
+        if isinstance(fallback, BatchAntStrategy):
+            raise ValueError("The fallback strategy must decide ant by ant")
+        self.per_decision = per_decision
+        self.per_step = per_step
+        self.fallback = fallback
+        self.step_time = 0.0  # Decision time spent in the current step
+        self.replaced = {}  # {strategy name: decisions over per_decision}
+        self.skipped = {}  # {strategy name: decisions skipped by per_step}
+        self.steps_over_budget = 0
+
+    def start_step(self) -> None:
+        self.step_time = 0.0
+
+    def end_step(self) -> None:
+        if self.per_step and self.step_time > self.per_step:
+            self.steps_over_budget += 1
+
+    def step_exhausted(self) -> bool:
+        return 0 < self.per_step <= self.step_time
+
+    def over_budget(self, seconds: float, calls: int = 1) -> bool:
+        """Add the time of a decision to the step, tell if it exceeds per_decision"""
+        self.step_time += seconds
+        return 0 < self.per_decision < seconds / calls
+
+    def substitute(self, name: str, perception, skipped: bool = False) -> AntAction:
+        """Action replacing a decision of the strategy name"""
+        counts = self.skipped if skipped else self.replaced
+        counts[name] = counts.get(name, 0) + 1
+        if self.fallback is None:
+            return AntAction.NO_ACTION
+        return self.fallback.decide_action(perception)
+
+    def summary(self) -> dict:
+        return {
+            "per_decision": self.per_decision,
+            "per_step": self.per_step,
+            "fallback": self.fallback.get_name() if self.fallback else None,
+            "replaced": dict(self.replaced),
+            "skipped": dict(self.skipped),
+            "steps_over_budget": self.steps_over_budget,
+        }
+
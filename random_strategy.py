@@ -1,5 +1,4 @@
-import random
-from environment import TerrainType, AntPerception
+from common import TerrainType, AntPerception
 from ant import AntAction, AntStrategy
 
 
@@ -82,7 +81,7 @@ class RandomStrategy(AntStrategy):
                         return AntAction.MOVE_FORWARD
 
         # Random movement if no specific goal
-        movement_choice = random.random()
+        movement_choice = perception.rng.random()
 
         if movement_choice < 0.6:  # 60% chance to move forward
             return AntAction.MOVE_FORWARD
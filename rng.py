@@ -0,0 +1,73 @@
+# Counter-based random streams, one per (seed, ant, step).
+#
+# The n-th draw of an ant during a step is a hash of (seed, ant, step, n):
+# it does not depend on the other ants, on their order or on how they are
+# split between batches and worker processes, so seeded runs are
+# reproducible whatever the way they are executed. batch.py computes the
+# same draws with NumPy for whole populations.
+
+import random
+
+MASK64 = (1 << 64) - 1
+GAMMA = 0x9E3779B97F4A7C15  # Increment of the SplitMix64 generator
+
+
+def mix64(z: int) -> int:
+    """SplitMix64 finalizer, scrambles a 64-bit integer"""
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+
+def stream_key(seed: int, ant_key: int, step: int) -> int:
+    """Key of the random stream of an ant during a step"""
+    key = mix64(((seed & MASK64) + GAMMA) & MASK64)
+    key = mix64(((key ^ (ant_key & MASK64)) + GAMMA) & MASK64)
+    return mix64(((key ^ (step & MASK64)) + GAMMA) & MASK64)
+
+
+def draw64(key: int, draw: int) -> int:
+    """64 random bits, draw number draw (from 1) of the stream key"""
+    return mix64((key + draw * GAMMA) & MASK64)
+
+
+class AntRandom(random.Random):
+    """random.Random API over the stream of one ant during one step
+
+    Given to strategies as AntPerception.rng. random(), choice(), randint()...
+    all draw from the stream, which restarts with the same values for equal
+    (seed, ant_key, step). The object cannot be reseeded.
+    """
+
+    def __init__(self, seed: int, ant_key: int, step: int):
+        # random.Random.__init__ would seed the unused Mersenne Twister state.
+        # Most perceptions are not drawn from, the key is computed on first use
+        self.stream = (seed, ant_key, step)
+        self.key = None
+        self.draws = 0
+        self.gauss_next = None
+
+    def seed(self, a=None, version=2):
+        raise NotImplementedError("Ant random streams are derived from the environment seed")
+
+    def random(self) -> float:
+        if self.key is None:
+            self.key = stream_key(*self.stream)
+        self.draws += 1
+        return (draw64(self.key, self.draws) >> 11) * (1.0 / (1 << 53))
+
+    def getrandbits(self, k: int) -> int:
+        if self.key is None:
+            self.key = stream_key(*self.stream)
+        bits = 0
+        for shift in range(0, k, 64):
+            self.draws += 1
+            bits |= draw64(self.key, self.draws) << shift
+        return bits & ((1 << k) - 1)
+
+    def getstate(self):
+        return (self.stream, self.draws)
+
+    def setstate(self, state) -> None:
+        self.stream, self.draws = state
+        self.key = None
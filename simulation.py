@@ -1,11 +1,13 @@
 # Command-line simulation runner for ant colony simulation.
+# "simulation.py batch ..." runs many simulations in parallel, see batch_runner.py
 
 import argparse
+import random
 import time
 import sys
 
 from environment import Environment
-from utils import create_environment, add_ants
+from utils import create_environment, add_ants, get_strategy_class
 
 
 class SimulationRunner:
@@ -15,15 +17,37 @@ class SimulationRunner:
         max_steps: int = 10000,
         progress_interval: int = 100,
         time_limit: float = 0,  # Time limit in seconds, 0 means no limit
+        profile: bool = False,  # Time the phases of each step, see profiling.py
+        decision_budget: float = 0,  # Seconds per decision, 0 means no limit
+        step_budget: float = 0,  # Seconds of decisions per step, 0 means no limit
+        budget_fallback=None,  # AntStrategy used for decisions over budget, None for NO_ACTION
+        checkpoint: str = None,  # File the state is saved to, see Environment.save_checkpoint
+        checkpoint_interval: int = 0,  # Also save every N steps, 0 means only at the end
+        checkpoint_strategies: bool = False,  # Pickle the strategies in the checkpoint
     ):
         self.environment = environment
+        self.profile = profile
+        self.decision_budget = decision_budget
+        self.step_budget = step_budget
+        self.budget_fallback = budget_fallback
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_strategies = checkpoint_strategies
         self.max_steps = max_steps
         self.progress_interval = progress_interval
-        self.step_count = 0
+        # A resumed environment continues from its step, max_steps counts all steps
+        self.step_count = environment.steps
+        self.start_step = environment.steps  # Steps run before this session, see run()
         self.time_limit = time_limit
         self.duration = 0.0  # Initialize duration attribute
 
     def run(self, verbose: bool = True) -> dict:
+        if self.profile:
+            self.environment.enable_profiling()
+        if self.decision_budget > 0 or self.step_budget > 0:
+            self.environment.set_decision_budget(
+                self.decision_budget, self.step_budget, self.budget_fallback
+            )
         start_time = time.time()
         initial_food = self.environment.initial_food_amount
         if verbose:
@@ -51,6 +75,12 @@ class SimulationRunner:
         ):
             self.environment.update()
             self.step_count += 1
+            if (
+                self.checkpoint
+                and self.checkpoint_interval > 0
+                and self.step_count % self.checkpoint_interval == 0
+            ):
+                self.environment.save_checkpoint(self.checkpoint, self.checkpoint_strategies)
             # print(f"Step {self.step_count} / {self.max_steps}")
             # Print progress updates at specified intervals
             if verbose and self.step_count % self.progress_interval == 0:
@@ -58,7 +88,7 @@ class SimulationRunner:
                 completion_pct = (
                     (food_collected / initial_food * 100) if initial_food > 0 else 0
                 )
-                ants_with_food = sum(1 for ant in self.environment.ants if ant.has_food)
+                ants_with_food = sum(self.environment.population.has_food)
 
                 print(
                     f"Step {self.step_count}: "
@@ -69,6 +99,10 @@ class SimulationRunner:
         # Print final results
         end_time = time.time()
         self.duration = end_time - start_time
+        if self.checkpoint:
+            self.environment.save_checkpoint(self.checkpoint, self.checkpoint_strategies)
+            if verbose:
+                print(f"Checkpoint saved to {self.checkpoint}")
 
         if verbose:
             if self.environment.is_complete():
@@ -91,7 +125,18 @@ class SimulationRunner:
                 )
 
             print(f"Total runtime: {self.duration:.2f} seconds")
-            print(f"Average steps per second: {self.step_count / self.duration:.1f}")
+            # Steps of this session only, a resumed run started at start_step
+            steps_run = self.step_count - self.start_step
+            print(f"Average steps per second: {steps_run / self.duration:.1f}")
+            if self.environment.profiler is not None:
+                for line in self.environment.profiler.format_lines():
+                    print(line)
+            budget = self.environment.decision_budget
+            if budget is not None:
+                print(
+                    f"Decisions replaced (over budget): {sum(budget.replaced.values())} | "
+                    f"Skipped (step budget spent): {sum(budget.skipped.values())}"
+                )
 
         # Calculate completion percentage
         completion_percentage = (
@@ -101,7 +146,7 @@ class SimulationRunner:
         )
 
         # Return a dictionary with completion percentage, number of steps, and time taken
-        return {
+        result = {
             "completion_percentage": completion_percentage,
             "food_collected": self.environment.food_collected,
             "total_food": self.environment.initial_food_amount,
@@ -109,7 +154,13 @@ class SimulationRunner:
             "max_steps": self.max_steps,
             "steps": self.step_count,
             "time_taken": self.duration,
+            "seed": self.environment.seed,
         }
+        if self.environment.profiler is not None:
+            result["profile"] = self.environment.profiler.summary()
+        if self.environment.decision_budget is not None:
+            result["budget"] = self.environment.decision_budget.summary()
+        return result
 
 
 def main():
@@ -144,7 +195,7 @@ def main():
         "--strategy",
         type=str,
         default="random",
-        help="Ant strategy to use (random or custom) (default: random)",
+        help="Ant strategy to use (random, random_batch or custom) (default: random)",
     )
     parser.add_argument(
         "--strategy-file",
@@ -171,13 +222,87 @@ def main():
         help="Time limit for simulation (in seconds) (default: 0, no limit) - command line value takes precedence over environment file",
     )
     parser.add_argument("--quiet", action="store_true", help="Suppress progress output")
+    parser.add_argument(
+        "--pheromone-backend",
+        type=str,
+        default="dict",
+        choices=["dict", "array", "lazy"],
+        help="Pheromone map storage: sparse dict, dense NumPy array or lazily evaporated dict (default: dict)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Random seed, runs with the same seed and settings give the same results (default: random)",
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time each phase of the simulation steps and each strategy, reported in the result",
+    )
+    parser.add_argument(
+        "--decision-budget",
+        type=float,
+        default=0,
+        help="Time budget per decision in milliseconds, slower decisions are replaced (default: 0, no limit)",
+    )
+    parser.add_argument(
+        "--step-budget",
+        type=float,
+        default=0,
+        help="Time budget for the decisions of a step in milliseconds, the remaining ants are replaced (default: 0, no limit)",
+    )
+    parser.add_argument(
+        "--budget-fallback",
+        type=str,
+        help="Built-in strategy (e.g., random) replacing decisions over budget (default: NO_ACTION)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        help="Save the simulation state to this file at the end of the run",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=int,
+        default=0,
+        help="Also save the checkpoint every N steps (default: 0, only at the end)",
+    )
+    parser.add_argument(
+        "--checkpoint-strategies",
+        action="store_true",
+        help=(
+            "Pickle the strategies in the checkpoint, keeping their internal state. "
+            "With --resume, restore the pickled strategies instead of --strategy"
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        type=str,
+        help="Continue the simulation saved in this checkpoint file (--env and --ants are ignored)",
+    )
 
     args = parser.parse_args()
 
     try:
-        environment = create_environment(
-            args.env, args.width, args.height, verbose=not args.quiet
-        )
+        if args.seed is not None:
+            # Also seed the random module, for strategies that do not use perception.rng
+            random.seed(args.seed)
+        if args.resume:
+            # The checkpoint holds the ants, the seed and the pheromone backend
+            strategies = None
+            if not args.checkpoint_strategies:
+                strategies = get_strategy_class(
+                    args.strategy, args.strategy_file, verbose=not args.quiet
+                )()
+            environment = Environment.load_checkpoint(args.resume, strategies)
+            if not args.quiet:
+                print(f"Resuming {args.resume} at step {environment.steps}")
+        else:
+            environment = create_environment(
+                args.env, args.width, args.height, verbose=not args.quiet, seed=args.seed
+            )
+            environment.set_pheromone_backend(args.pheromone_backend)
 
         # Check if environment file specified a number of ants
         ant_count = args.ants
@@ -213,18 +338,30 @@ def main():
             if not args.quiet:
                 print(f"Using max steps from environment file: {max_steps} steps")
 
-        add_ants(
-            environment,
-            args.strategy,
-            args.strategy_file,
-            ant_count,
-            verbose=not args.quiet,
-        )
+        if not args.resume:
+            add_ants(
+                environment,
+                args.strategy,
+                args.strategy_file,
+                ant_count,
+                verbose=not args.quiet,
+            )
         runner = SimulationRunner(
             environment,
             max_steps=max_steps,
             progress_interval=args.progress_interval,
             time_limit=time_limit,
+            profile=args.profile,
+            decision_budget=args.decision_budget / 1000,
+            step_budget=args.step_budget / 1000,
+            budget_fallback=(
+                get_strategy_class(args.budget_fallback, None, verbose=False)()
+                if args.budget_fallback
+                else None
+            ),
+            checkpoint=args.checkpoint,
+            checkpoint_interval=args.checkpoint_interval,
+            checkpoint_strategies=args.checkpoint_strategies,
         )
 
         result = runner.run(verbose=not args.quiet)
@@ -264,6 +401,12 @@ def main():
 
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["batch"]:
+        # Many simulations across worker processes, see batch_runner.py
+        from batch_runner import main as batch_main
+
+        sys.exit(batch_main(sys.argv[2:]))
+
     result = main()
     # Return 0 for success (100% completion) or 1 for incomplete simulation
     exit_code = (
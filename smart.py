@@ -1,4 +1,3 @@
-import random
 from ant import AntStrategy
 from common import AntPerception, AntAction, TerrainType, Direction
 
@@ -244,7 +243,7 @@ class CollabStrategy(AntStrategy):
         """Decide which direction to move based on current state"""
 
         ant_id = perception.ant_id
-        movement_choice = random.random()
+        movement_choice = perception.rng.random()
 
         if perception.steps_taken < 100 :
             forward = 0.9
@@ -274,7 +273,7 @@ class CollabStrategy(AntStrategy):
         ant_id = perception.ant_id
         diff = (dir_a - dir_b) % 8
 
-        randomizer = random.random()
+        randomizer = perception.rng.random()
         if perception.steps_taken > 250 and randomizer < 0.1:  # 10% chance to take a random décision
             return self.decide_random_movement(perception)
 
@@ -301,7 +300,7 @@ class CollabStrategy(AntStrategy):
             if ant_id not in self.ants_turns:
                 self.ants_turns[ant_id] = 0
             self.ants_turns[ant_id] += 1
-            return random.choice([AntAction.TURN_LEFT, AntAction.TURN_RIGHT])
+            return perception.rng.choice([AntAction.TURN_LEFT, AntAction.TURN_RIGHT])
 
     def update_position(self, perception : AntPerception):
         """
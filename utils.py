@@ -1,7 +1,6 @@
 import os.path
 import importlib.util
-import inspect
-import random
+import sys
 from typing import Optional, Type
 
 from environment import Environment, EnvironmentBuilder
@@ -11,6 +10,9 @@ from common import Direction
 
 
 def load_strategy_from_file(filepath: str, verbose: bool = True) -> Type[AntStrategy]:
+    # Imported here, inspect is slow to import and only needed for strategy files
+    import inspect
+
     if not os.path.exists(filepath):
         raise ValueError(f"Strategy file not found: {filepath}")
 
@@ -21,11 +23,21 @@ def load_strategy_from_file(filepath: str, verbose: bool = True) -> Type[AntStra
         raise ValueError(f"Could not load module from {filepath}")
 
     module = importlib.util.module_from_spec(spec)
+    # Registered so that strategies can be pickled (checkpoints, worker
+    # processes), unless it would hide another module of the same name
+    registered = sys.modules.get(module_name)
+    if registered is None or getattr(registered, "__file__", None) == spec.origin:
+        sys.modules[module_name] = module
     spec.loader.exec_module(module)
 
     strategy_classes = []
     for _, obj in inspect.getmembers(module):
-        if inspect.isclass(obj) and issubclass(obj, AntStrategy) and obj != AntStrategy:
+        # Abstract classes such as BatchAntStrategy are interfaces, not strategies
+        if (
+            inspect.isclass(obj)
+            and issubclass(obj, AntStrategy)
+            and not inspect.isabstract(obj)
+        ):
             strategy_classes.append(obj)
 
     if not strategy_classes:
@@ -40,14 +52,27 @@ def load_strategy_from_file(filepath: str, verbose: bool = True) -> Type[AntStra
 
 
 def create_environment(
-    env_type: str, width: int, height: int, verbose: bool = True
+    env_type: str,
+    width: int,
+    height: int,
+    verbose: bool = True,
+    seed: Optional[int] = None,
+) -> Environment:
+    environment = _build_environment(env_type, width, height, verbose, seed)
+    if seed is not None:
+        environment.set_seed(seed)
+    return environment
+
+
+def _build_environment(
+    env_type: str, width: int, height: int, verbose: bool, seed: Optional[int]
 ) -> Environment:
     if env_type == "simple":
         return EnvironmentBuilder.create_simple(width, height)
     elif env_type == "obstacle":
         return EnvironmentBuilder.create_obstacle_course(width, height)
     elif env_type == "maze":
-        return EnvironmentBuilder.create_maze(width, height)
+        return EnvironmentBuilder.create_maze(width, height, seed=seed)
     elif env_type == "empty":
         return EnvironmentBuilder.create_empty(width, height)
     elif os.path.isfile(env_type):
@@ -61,36 +86,48 @@ def create_environment(
         raise ValueError(f"Unknown environment type: {env_type}")
 
 
-def add_ants(
-    environment: Environment,
-    strategy_name: str,
-    strategy_file: Optional[str],
-    count: int,
-    verbose: bool = True,
-) -> None:
-
-    # Create strategy based on name or load from file
-    strategy = None
-
+def get_strategy_class(
+    strategy_name: str, strategy_file: Optional[str], verbose: bool = True
+) -> Type[AntStrategy]:
+    """Get the strategy class loaded from strategy_file, or the built-in one named strategy_name"""
     if strategy_file:
         try:
             # Load strategy class from file
             strategy_class = load_strategy_from_file(strategy_file, verbose=verbose)
-            strategy = strategy_class()
             if verbose:
                 print(
                     f"Loaded strategy '{strategy_class.__name__}' from {strategy_file}"
                 )
+            return strategy_class
         except Exception as e:
             raise ValueError(f"Error loading strategy from {strategy_file}: {str(e)}")
 
-    # If no strategy loaded from file, use built-in strategy
-    if strategy is None:
-        if strategy_name == "random":
-            strategy = RandomStrategy()
-        else:
-            raise ValueError(f"Unknown strategy: {strategy_name}")
+    # If no strategy file, use built-in strategy
+    if strategy_name == "random":
+        return RandomStrategy
+    elif strategy_name == "random_batch":
+        # Imported here as it requires numpy
+        from batch_random_strategy import BatchRandomStrategy
+
+        return BatchRandomStrategy
+    raise ValueError(f"Unknown strategy: {strategy_name}")
+
+
+def add_ants(
+    environment: Environment,
+    strategy_name: str,
+    strategy_file: Optional[str],
+    count: int,
+    verbose: bool = True,
+) -> None:
+
+    # Create strategy based on name or load from file
+    strategy = get_strategy_class(strategy_name, strategy_file, verbose=verbose)()
+    place_ants(environment, strategy, count)
+
 
+def place_ants(environment: Environment, strategy: AntStrategy, count: int) -> None:
+    """Add count ants sharing the same strategy, spread across the colonies"""
     # Add ants at colony positions
     if not environment.colony_positions:
         raise ValueError("No colony positions in environment")
@@ -99,7 +136,7 @@ def add_ants(
     for i in range(count):
         colony_pos = environment.colony_positions[i % len(environment.colony_positions)]
         x, y = colony_pos
-        # Create ant with random initial direction
-        direction = random.choice(list(Direction))
+        # Create ant with random initial direction, drawn from the environment generator
+        direction = environment.rng.choice(list(Direction))
         ant = Ant(x, y, direction, strategy, ant_id=i + 1)
         environment.add_ant(ant)